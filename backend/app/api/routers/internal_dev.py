@@ -2,6 +2,8 @@ from fastapi import APIRouter
 import json
 from pathlib import Path
 
+from app.core.control_event_store import list_all_events
+
 router = APIRouter()
 BASE_DIR = Path(__file__).resolve().parents[3]
 
@@ -20,7 +22,7 @@ def process_instances():
 
 @router.get("/control-events-store-v2/")
 def control_events_store():
-    return load_json_safe("control_events_store.json", [])
+    return list_all_events()
 
 @router.get("/client-profiles")
 def client_profiles():
@@ -2,9 +2,11 @@
 
 import inspect
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from .chain_registry import ChainHandler, get_chain_handler
+from .control_event_adapter import control_event_batch
+from .internal_process_adapter import task_generation_batch
 
 logger = logging.getLogger(__name__)
 
@@ -45,12 +47,16 @@ class ChainExecutor:
         )
 
         try:
-            if inspect.iscoroutinefunction(handler):
-                await handler(client_id, ctx)
-            else:
-                result = handler(client_id, ctx)
-                if inspect.isawaitable(result):
-                    await result  # type: ignore[func-returns-value]
+            # Control events of the chain are stored and dispatched together, and
+            # the instances it triggers are generated as one pool batch, when it
+            # finishes (inside run_chains: when the whole run finishes).
+            with control_event_batch(), task_generation_batch():
+                if inspect.iscoroutinefunction(handler):
+                    await handler(client_id, ctx)
+                else:
+                    result = handler(client_id, ctx)
+                    if inspect.isawaitable(result):
+                        await result  # type: ignore[func-returns-value]
         except Exception as exc:
             logger.exception(
                 "Error while executing chain %s for client_id=%s: %s",
@@ -65,3 +71,21 @@ class ChainExecutor:
             chain_id,
             client_id,
         )
+
+    async def run_chains(self, runs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Run several chains (e.g. a reglament run over many clients) sequentially.
+
+        Each run: {"chain_id", "client_id", "context"}. Control events created by
+        the chains are stored and dispatched as one batch at the end; process
+        instances they trigger are generated as one batch in the worker pool.
+        Returns generate-tasks results per instance.
+        """
+        with control_event_batch(), task_generation_batch() as generation:
+            for run in runs:
+                await self.run_chain(
+                    chain_id=str(run.get("chain_id") or ""),
+                    client_id=run.get("client_id"),
+                    context=run.get("context"),
+                )
+        return await generation.results()
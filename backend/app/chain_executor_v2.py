@@ -1,7 +1,15 @@
-﻿import json
+﻿import asyncio
 import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.control_event_index import ControlEventIndex, get_event_index
+from app.core.store_json import load_json_file, save_json_file, store_transaction
+from app.core.store_locks import store_locks
+from app.core.task_repository import get_task_repository
 
 logger = logging.getLogger(__name__)
 
@@ -12,22 +20,29 @@ STORE_TEMPLATES = BASE_DIR / "process_step_templates_store.json"
 STORE_PROFILES = BASE_DIR / "client_profiles_store.json"
 STORE_EVENTS = BASE_DIR / "control_events_store.json"
 STORE_EVENT_TEMPLATES = BASE_DIR / "control_events_templates_store.json"
-STORE_TASKS = BASE_DIR / "tasks_store.json"
+
+DEFAULT_REGLEMENT_CONCURRENCY = 4
+
+# Progress hook of reglament runs: called on the event loop thread with
+# {"stage": "plan", "done", "total", "client", "period"} after every planned client
+# and {"stage": "commit"} / {"stage": "done"} around the store commit.
+ProgressCallback = Callable[[Dict[str, Any]], None]
+# Fencing check of runs done on behalf of the elected leader: called under the
+# store locks right before the commit; False aborts the run with nothing written.
+FenceCheck = Callable[[], bool]
+
+
+class RunFencedError(RuntimeError):
+    pass
 
 
 def _safe_load(path: Path, default):
-    try:
-        if not path.exists():
-            return default
-        txt = path.read_text(encoding="utf-8-sig")
-        return json.loads(txt)
-    except Exception as exc:
-        logger.warning("Failed to load %s: %s", path, exc)
-        return default
+    # Parsed documents are shared through the store cache: callers copy before mutating.
+    return load_json_file(path, default)
 
 
 def _safe_save(path: Path, data: Any):
-    path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    save_json_file(path, data)
 
 
 def _load_profiles():
@@ -45,7 +60,7 @@ def _load_templates():
 def _load_instances():
     data = _safe_load(STORE_INSTANCES, {})
     if isinstance(data, dict):
-        return data
+        return dict(data)
     logger.warning("process_instances_store.json has non-dict root, resetting to empty mapping")
     return {}
 
@@ -55,11 +70,9 @@ def _load_event_templates():
 
 
 def _load_events():
-    return _safe_load(STORE_EVENTS, {"events": []})
-
-
-def _load_tasks():
-    return _safe_load(STORE_TASKS, {"tasks": []})
+    store = dict(_safe_load(STORE_EVENTS, {"events": []}))
+    store["events"] = list(store.get("events", []))
+    return store
 
 
 def _save_instances(data):
@@ -70,8 +83,9 @@ def _save_events(data):
     _safe_save(STORE_EVENTS, data)
 
 
-def _save_tasks(data):
-    _safe_save(STORE_TASKS, data)
+def _run_locks():
+    # Exclusive locks on every store a run writes, held until the transaction is on disk.
+    return store_locks(STORE_INSTANCES, STORE_EVENTS, *get_task_repository().lock_paths())
 
 
 # ===========================================================
@@ -85,17 +99,38 @@ def _generate_control_events_for_client_period(profile: Dict[str, Any], year: in
     events_store = _load_events()
     events = events_store.get("events", [])
 
+    new_events = _build_client_events(profile, year, month, templates, events)
+
+    events_store["events"] = events
+    _save_events(events_store)
+
+    return new_events
+
+
+def _build_client_events(
+    profile: Dict[str, Any],
+    year: int,
+    month: int,
+    templates: List[Dict[str, Any]],
+    events: List[Dict[str, Any]],
+    index: Optional[ControlEventIndex] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Generate missing control events for one client/period in memory.
+
+    New events are appended to events (the caller's private list) and returned.
+    index must describe events; bulk runs build it once and pass it for every client.
+    """
     client = profile["code"]
     period = f"{year}-{month:02d}"
 
+    if index is None:
+        index = ControlEventIndex(events)
+
     new_events: List[Dict[str, Any]] = []
 
     def event_exists(code: str) -> bool:
-        for ev in events:
-            ev_client = ev.get("client_code") or ev.get("client_id")
-            if ev_client == client and ev.get("period") == period and (ev.get("type") == code or ev.get("code") == code):
-                return True
-        return False
+        return index.contains(client, period, code)
 
     def add_event(code: str):
         if event_exists(code):
@@ -112,6 +147,7 @@ def _generate_control_events_for_client_period(profile: Dict[str, Any], year: in
             "status": "new"
         }
         events.append(e)
+        index.add(e)
         new_events.append(e)
 
     add_event("bank_statement")
@@ -128,9 +164,6 @@ def _generate_control_events_for_client_period(profile: Dict[str, Any], year: in
     if profile.get("has_tourist_tax"):
         add_event("tourist_tax")
 
-    events_store["events"] = events
-    _save_events(events_store)
-
     return new_events
 
 
@@ -138,17 +171,15 @@ def _generate_control_events_for_client_period(profile: Dict[str, Any], year: in
 # TASK GENERATION
 # ===========================================================
 def _generate_tasks_for_events(events: List[Dict[str, Any]]):
-    tasks_store = _load_tasks()
-    tasks = tasks_store.get("tasks", [])
+    # Task store backend (JSON file or SQLite) is selected by the repository.
+    return get_task_repository().add_tasks_if_absent(_build_tasks_for_events(events))
 
-    new_tasks: List[Dict[str, Any]] = []
 
-    existing_ids = {t.get("id") for t in tasks}
+def _build_tasks_for_events(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    candidates: List[Dict[str, Any]] = []
 
     for e in events:
         task_id = f"task-{e['id']}"
-        if task_id in existing_ids:
-            continue
         t = {
             "id": task_id,
             "client_code": e["client_code"],
@@ -158,14 +189,9 @@ def _generate_tasks_for_events(events: List[Dict[str, Any]]):
             "status": "new",
             "priority": "normal"
         }
-        tasks.append(t)
-        new_tasks.append(t)
-        existing_ids.add(task_id)
-
-    tasks_store["tasks"] = tasks
-    _save_tasks(tasks_store)
+        candidates.append(t)
 
-    return new_tasks
+    return candidates
 
 
 # ===========================================================
@@ -177,22 +203,24 @@ async def run_dev_for_client(client_code: str, year: int, month: int):
     if not profile:
         raise ValueError(f"Unknown client_code={client_code}")
 
-    instances = _load_instances()
-    templates = _load_templates()
+    # All store saves of the run are coalesced into one write per store.
+    with _run_locks(), store_transaction():
+        instances = _load_instances()
+        templates = _load_templates()
 
-    key = f"{client_code}::{year}-{month:02d}"
+        key = f"{client_code}::{year}-{month:02d}"
 
-    instances[key] = {
-        "client_code": client_code,
-        "year": year,
-        "month": month,
-        "steps": templates,
-        "status": "completed"
-    }
-    _save_instances(instances)
+        instances[key] = {
+            "client_code": client_code,
+            "year": year,
+            "month": month,
+            "steps": templates,
+            "status": "completed"
+        }
+        _save_instances(instances)
 
-    events = _generate_control_events_for_client_period(profile, year, month)
-    _generate_tasks_for_events(events)
+        events = _generate_control_events_for_client_period(profile, year, month)
+        _generate_tasks_for_events(events)
 
     return {
         "mode": "dev",
@@ -205,41 +233,278 @@ async def run_dev_for_client(client_code: str, year: int, month: int):
 # ===========================================================
 # REGLAMENT: mass generation
 # ===========================================================
-async def run_reglament_for_period(year: int, month: int):
-    profiles = _load_profiles().get("profiles", [])
-    instances = _load_instances()
-    templates = _load_templates()
+def _reglament_concurrency(concurrency: Optional[int]) -> int:
+    if concurrency is None:
+        try:
+            concurrency = int(os.getenv("REGLEMENT_CONCURRENCY", DEFAULT_REGLEMENT_CONCURRENCY))
+        except ValueError:
+            concurrency = DEFAULT_REGLEMENT_CONCURRENCY
+    return max(1, int(concurrency))
+
+
+def _report(progress: Optional[ProgressCallback], info: Dict[str, Any]) -> None:
+    if progress is None:
+        return
+    try:
+        progress(info)
+    except Exception as exc:
+        logger.warning("REGLEMENT_PROGRESS_CALLBACK_FAILED: %s", exc)
+
+
+def _plan_client_events(
+    profile: Dict[str, Any],
+    year: int,
+    month: int,
+    templates: List[Dict[str, Any]],
+    index: ControlEventIndex,
+) -> Tuple[List[Dict[str, Any]], float]:
+    """
+    Worker: plan new events for one client. Pure function (safe for thread/process pools).
+
+    Returns (planned events, elapsed ms).
+    """
+    started = time.perf_counter()
+    planned = _build_client_events(profile, year, month, templates, [], index)
+    return planned, (time.perf_counter() - started) * 1000.0
+
+
+async def _plan_all_clients(
+    targets: List[Tuple[Dict[str, Any], int, int]],
+    templates: List[Dict[str, Any]],
+    concurrency: int,
+    progress: Optional[ProgressCallback] = None,
+) -> List[Tuple[List[Dict[str, Any]], float]]:
+    """
+    Fan out per-client planning (one job per profile/year/month) over a bounded pool.
+
+    Workers see a read-only snapshot of the events store (only their own
+    client/period keys). Results come back in target order; progress is reported
+    in completion order.
+    Pool kind: env REGLEMENT_EXECUTOR=thread (default) or process.
+    """
+    total = len(targets)
+
+    def _planned(pos: int, done: int) -> None:
+        profile, year, month = targets[pos]
+        _report(progress, {
+            "stage": "plan",
+            "done": done,
+            "total": total,
+            "client": profile.get("code"),
+            "period": f"{year}-{month:02d}",
+        })
 
-    total_events = 0
-    total_instances = 0
+    if not templates:
+        for pos in range(total):
+            _planned(pos, pos + 1)
+        return [([], 0.0) for _ in targets]
+
+    snapshot = _safe_load(STORE_EVENTS, {"events": []})
+    index = get_event_index(snapshot.get("events") if isinstance(snapshot, dict) else snapshot)
+    jobs = [
+        (p, year, month, templates, index.subset(p["code"], f"{year}-{month:02d}"))
+        for p, year, month in targets
+    ]
+
+    results: List[Tuple[List[Dict[str, Any]], float]] = [([], 0.0)] * total
+
+    if concurrency <= 1 or total <= 1:
+        for pos, job in enumerate(jobs):
+            results[pos] = _plan_client_events(*job)
+            _planned(pos, pos + 1)
+        return results
+
+    kind = os.getenv("REGLEMENT_EXECUTOR", "thread").strip().lower()
+    pool_cls = ProcessPoolExecutor if kind == "process" else ThreadPoolExecutor
+    loop = asyncio.get_running_loop()
+
+    with pool_cls(max_workers=min(concurrency, total)) as pool:
+        async def _run(pos: int, job: Tuple[Any, ...]) -> Tuple[int, Tuple[List[Dict[str, Any]], float]]:
+            return pos, await loop.run_in_executor(pool, _plan_client_events, *job)
+
+        done = 0
+        for next_done in asyncio.as_completed([_run(pos, job) for pos, job in enumerate(jobs)]):
+            pos, result = await next_done
+            results[pos] = result
+            done += 1
+            _planned(pos, done)
+
+    return results
+
+
+async def run_reglament_for_period(
+    year: int,
+    month: int,
+    concurrency: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    fence: Optional[FenceCheck] = None,
+):
+    """
+    Bulk single-pass run over all client profiles.
+
+    Per-client event planning fans out over a bounded pool (concurrency argument or
+    env REGLEMENT_CONCURRENCY, default 4; 1 = sequential). Plans are merged in
+    profile order under the store locks, re-checked against the current store, so
+    the result does not depend on worker timing.
+
+    Every store is loaded once, events and tasks for all profiles are generated in
+    memory and committed in one step at the end. Any exception before the commit
+    leaves all stores untouched.
+
+    Tasks are written last: with the SQLite task backend a failed task insert rolls
+    back the JSON stores too, and task ids are derived from event ids, so a rerun
+    after a failed JSON commit does not duplicate tasks.
+
+    fence (scheduled runs): re-checked under the store locks before the commit;
+    RunFencedError is raised and nothing is written when it returns False.
+    """
+    results = await _run_reglament_periods([(year, month)], None, concurrency, progress, fence)
+    return results[0]
+
+
+async def run_reglament_for_range(
+    periods: List[Tuple[int, int]],
+    client_codes: Optional[List[str]] = None,
+    concurrency: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    fence: Optional[FenceCheck] = None,
+) -> Dict[str, Any]:
+    """
+    Run reglament for a client x period matrix inside one process.
+
+    Profiles and templates are loaded once, stores are loaded once for the whole
+    range and committed together (all-or-nothing), see run_reglament_for_period.
+    client_codes limits the run to these clients; unknown codes are reported as
+    failed matrix cells.
+    """
+    run_started = time.perf_counter()
+    period_results = await _run_reglament_periods(periods, client_codes, concurrency, progress, fence)
+
+    known = {p["code"] for p in _load_profiles().get("profiles", [])}
+    rows: List[Dict[str, Any]] = []
+    for (year, month), result in zip(periods, period_results):
+        timings = {c["client_code"]: c for c in result["clients"]}
+        for client in (client_codes if client_codes is not None else list(timings)):
+            cell = timings.get(client)
+            rows.append({
+                "client": client,
+                "year": year,
+                "month": month,
+                "ok": cell is not None,
+                "status": "ok" if cell is not None else "fail",
+                "events_created": cell["events_created"] if cell else 0,
+                "elapsed_ms": cell["elapsed_ms"] if cell else None,
+                "error": None if cell is not None or client in known else f"Unknown client_code={client}",
+            })
 
-    for profile in profiles:
-        client = profile["code"]
-        key = f"{client}::{year}-{month:02d}"
+    return {
+        "mode": "reglament_range",
+        "summary": {
+            "periods": [f"{y}-{m:02d}" for y, m in periods],
+            "clients": sorted({r["client"] for r in rows}),
+            "total": len(rows),
+            "failed": sum(1 for r in rows if not r["ok"]),
+            "events_created": sum(r["events_created"] for r in rows),
+            "elapsed_ms": round((time.perf_counter() - run_started) * 1000.0, 3),
+        },
+        "periods": period_results,
+        "results": rows,
+    }
 
-        instances[key] = {
-            "client_code": client,
-            "year": year,
-            "month": month,
-            "steps": templates,
-            "status": "completed"
-        }
-        total_instances += 1
 
-        events = _generate_control_events_for_client_period(profile, year, month)
-        _generate_tasks_for_events(events)
-        total_events += len(events)
+async def _run_reglament_periods(
+    periods: List[Tuple[int, int]],
+    client_codes: Optional[List[str]],
+    concurrency: Optional[int],
+    progress: Optional[ProgressCallback] = None,
+    fence: Optional[FenceCheck] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Shared engine of run_reglament_for_period / run_reglament_for_range.
+
+    Returns one result dict per period (same shape as run_reglament_for_period).
+    """
+    run_started = time.perf_counter()
+    concurrency = _reglament_concurrency(concurrency)
+    profiles = _load_profiles().get("profiles", [])
+    if client_codes is not None:
+        wanted = set(client_codes)
+        profiles = [p for p in profiles if p.get("code") in wanted]
+    event_templates = _load_event_templates().get("templates", [])
 
-    _save_instances(instances)
+    targets = [(profile, year, month) for year, month in periods for profile in profiles]
 
-    return {
-        "mode": "reglament",
-        "period": f"{year}-{month:02d}",
-        "process_instances": total_instances,
-        "events_created": total_events,
-        "tasks_created": total_events
+    # No awaits below this point while store locks are held.
+    plans = await _plan_all_clients(targets, event_templates, concurrency, progress)
+    _report(progress, {"stage": "commit", "done": len(targets), "total": len(targets)})
+
+    period_stats: Dict[Tuple[int, int], Dict[str, Any]] = {
+        ym: {"process_instances": 0, "events_created": 0, "clients": []} for ym in periods
     }
 
+    with _run_locks(), store_transaction():
+        instances = _load_instances()
+        templates = _load_templates()
+        events_store = _load_events()
+        events = events_store["events"]
+        index = ControlEventIndex(events)
+        new_events: List[Dict[str, Any]] = []
+
+        for (profile, year, month), (planned, elapsed_ms) in zip(targets, plans):
+            client = profile["code"]
+            period = f"{year}-{month:02d}"
+            key = f"{client}::{year}-{month:02d}"
+            stats = period_stats[(year, month)]
+
+            instances[key] = {
+                "client_code": client,
+                "year": year,
+                "month": month,
+                "steps": templates,
+                "status": "completed"
+            }
+            stats["process_instances"] += 1
+
+            created = 0
+            for e in planned:
+                if index.contains(client, period, e["type"]):
+                    continue
+                events.append(e)
+                index.add(e)
+                new_events.append(e)
+                created += 1
+            stats["events_created"] += created
+
+            stats["clients"].append({
+                "client_code": client,
+                "events_created": created,
+                "elapsed_ms": round(elapsed_ms, 3),
+            })
+
+        if fence is not None and not fence():
+            # Leadership moved while planning: the new leader owns this run.
+            raise RunFencedError("Leader lease lost before commit")
+        _save_instances(instances)
+        if new_events:
+            _save_events(events_store)
+            _generate_tasks_for_events(new_events)
+
+    _report(progress, {"stage": "done", "done": len(targets), "total": len(targets)})
+    elapsed_ms = round((time.perf_counter() - run_started) * 1000.0, 3)
+    return [
+        {
+            "mode": "reglament",
+            "period": f"{year}-{month:02d}",
+            "process_instances": period_stats[(year, month)]["process_instances"],
+            "events_created": period_stats[(year, month)]["events_created"],
+            "tasks_created": period_stats[(year, month)]["events_created"],
+            "concurrency": concurrency,
+            "elapsed_ms": elapsed_ms,
+            "clients": period_stats[(year, month)]["clients"],
+        }
+        for year, month in periods
+    ]
+
 
 # ===========================================================
 # PUBLIC ENTRYPOINT
@@ -254,7 +519,10 @@ async def execute_chain(payload: Dict[str, Any]):
         raise ValueError("year and month are required")
 
     if mode == "reglament":
-        return await run_reglament_for_period(int(year), int(month))
+        concurrency = payload.get("concurrency")
+        return await run_reglament_for_period(
+            int(year), int(month), int(concurrency) if concurrency else None
+        )
 
     if not client:
         raise ValueError("client_code is required for dev mode")
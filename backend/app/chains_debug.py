@@ -5,7 +5,7 @@ from typing import Any, Dict, Optional
 from fastapi import APIRouter
 from pydantic import BaseModel
 
-from app.core.events import EventTypes, get_event_system
+from app.core.event_system import EventTypes, get_event_system
 
 
 router = APIRouter(
@@ -43,3 +43,11 @@ async def debug_trigger(payload: DebugChainTrigger) -> Dict[str, Any]:
         "chain_id": payload.chain_id,
         "client_id": payload.client_id,
     }
+
+
+@router.get("/events/metrics")
+async def events_metrics() -> Dict[str, Any]:
+    """
+    Event bus metrics: per event type queue depth and handler latency.
+    """
+    return get_event_system().metrics()
@@ -1,12 +1,14 @@
 ﻿from __future__ import annotations
 
-import json
 import os
 import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from app.core.store_json import load_json_file, save_json_file
+from app.core.store_locks import store_lock
+
 _LOCK = threading.Lock()
 
 _default_path = (
@@ -18,35 +20,25 @@ _default_path = (
 FILE_PATH = Path(os.getenv("CLIENT_PROFILES_PATH", str(_default_path)))
 
 
-def _load_raw() -> List[Dict[str, Any]]:
-    if not FILE_PATH.exists():
-        return []
-    try:
-        with FILE_PATH.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-        if not isinstance(data, list):
-            return []
-        return [x for x in data if isinstance(x, dict)]
-    except Exception:
-        # In safe mode we never propagate errors up
+def _load_raw(for_update: bool = False) -> List[Dict[str, Any]]:
+    # In safe mode we never propagate errors up
+    data = load_json_file(FILE_PATH, [], copy_result=for_update)
+    if not isinstance(data, list):
         return []
+    return [x for x in data if isinstance(x, dict)]
 
 
 def _save_raw(items: List[Dict[str, Any]]) -> None:
-    FILE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    tmp_path = FILE_PATH.with_suffix(".tmp")
-    with tmp_path.open("w", encoding="utf-8") as f:
-        json.dump(items, f, ensure_ascii=False, indent=2)
-    tmp_path.replace(FILE_PATH)
+    save_json_file(FILE_PATH, items)
 
 
 def list_profiles() -> List[Dict[str, Any]]:
-    with _LOCK:
+    with store_lock(FILE_PATH, shared=True), _LOCK:
         return _load_raw()
 
 
 def get_profile(profile_id: str) -> Optional[Dict[str, Any]]:
-    with _LOCK:
+    with store_lock(FILE_PATH, shared=True), _LOCK:
         items = _load_raw()
         for item in items:
             if str(item.get("id")) == str(profile_id):
@@ -59,8 +51,8 @@ def _now_iso() -> str:
 
 
 def upsert_profile(data: Dict[str, Any]) -> Dict[str, Any]:
-    with _LOCK:
-        items = _load_raw()
+    with store_lock(FILE_PATH), _LOCK:
+        items = _load_raw(for_update=True)
 
         raw_id = data.get("id")
         if not raw_id:
@@ -98,7 +90,7 @@ def upsert_profile(data: Dict[str, Any]) -> Dict[str, Any]:
 
 
 def delete_profile(profile_id: str) -> bool:
-    with _LOCK:
+    with store_lock(FILE_PATH), _LOCK:
         items = _load_raw()
         new_items = [x for x in items if str(x.get("id")) != str(profile_id)]
         deleted = len(new_items) != len(items)
@@ -1,13 +1,52 @@
 ﻿from __future__ import annotations
 
 import logging
-from typing import Any, Dict, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
 
-from app.core.control_event_store import add_event_from_chain
-from app.core.control_event_dispatcher import dispatch_control_event
+from app.core.control_event_store import add_event_from_chain, add_events, build_event
+from app.core.control_event_dispatcher import dispatch_control_event, dispatch_control_events
 
 logger = logging.getLogger(__name__)
 
+# Events created inside control_event_batch(), persisted and dispatched on exit.
+_BATCH: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("control_event_batch", default=None)
+
+
+@contextmanager
+def control_event_batch() -> Iterator[List[Dict[str, Any]]]:
+    """
+    Defer control events created from chains (e.g. during a reglament run).
+
+    Inside the block create_control_event_from_chain only collects events; on
+    exit they are stored with one write, dispatched, and their statuses are
+    patched with one more write (instead of two store rewrites per event).
+    Nested blocks join the outermost one.
+    """
+    if _BATCH.get() is not None:
+        yield _BATCH.get()  # type: ignore[misc]
+        return
+
+    pending: List[Dict[str, Any]] = []
+    token = _BATCH.set(pending)
+    try:
+        yield pending
+    finally:
+        _BATCH.reset(token)
+        flush_control_events(pending)
+
+
+def flush_control_events(events: List[Dict[str, Any]]) -> None:
+    if not events:
+        return
+    add_events(events)
+    logger.info("CONTROL_EVENT_BATCH_STORED: events=%s", len(events))
+    try:
+        dispatch_control_events(events)
+    except Exception as exc:
+        logger.warning("CONTROL_EVENT_DISPATCH_EXCEPTION: %s", exc)
+
 
 def create_control_event_from_chain(
     *,
@@ -16,6 +55,7 @@ def create_control_event_from_chain(
     period: str,
     event_code: str,
     payload: Dict[str, Any],
+    defer_dispatch: Optional[bool] = None,
 ) -> None:
     """
     Adapter between chains and control events engine.
@@ -25,17 +65,38 @@ def create_control_event_from_chain(
       2) Log the fact of creation.
       3) Optionally forward into a dedicated service function if it exists.
       4) Dispatch event to internal control-event handlers.
+
+    defer_dispatch (default: when a control_event_batch() is open) moves steps 1
+    and 4 into the open batch.
     """
     safe_payload: Dict[str, Any] = dict(payload or {})
 
-    event = add_event_from_chain(
-        client_id=client_id,
-        profile_code=profile_code,
-        period=period,
-        event_code=event_code,
-        payload=safe_payload,
-        source="chain",
-    )
+    batch = _BATCH.get()
+    if defer_dispatch is None:
+        defer_dispatch = batch is not None
+    elif defer_dispatch and batch is None:
+        logger.debug("CONTROL_EVENT_DEFER_WITHOUT_BATCH: dispatching immediately")
+        defer_dispatch = False
+
+    if defer_dispatch:
+        event = build_event(
+            client_id=client_id,
+            profile_code=profile_code,
+            period=period,
+            event_code=event_code,
+            payload=safe_payload,
+            source="chain",
+        )
+        batch.append(event)  # type: ignore[union-attr]
+    else:
+        event = add_event_from_chain(
+            client_id=client_id,
+            profile_code=profile_code,
+            period=period,
+            event_code=event_code,
+            payload=safe_payload,
+            source="chain",
+        )
 
     logger.info(
         "CONTROL_EVENT_FROM_CHAIN: stored_id=%s client_id=%s profile_code=%s period=%s event_code=%s",
@@ -68,6 +129,8 @@ def create_control_event_from_chain(
             logger.warning("CONTROL_EVENT_FORWARD_TO_SERVICE_FAILED: %s", exc)
 
     # Internal dispatch for control-event handlers.
+    if defer_dispatch:
+        return
     try:
         dispatch_control_event(event)
     except Exception as exc:
@@ -1,9 +1,9 @@
 ﻿from __future__ import annotations
 
 import logging
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 
-from app.core.control_event_store import update_event_fields
+from app.core.control_event_store import update_events_fields
 
 logger = logging.getLogger(__name__)
 
@@ -23,33 +23,28 @@ def register_event_handler(event_code: str, handler: EventHandler) -> None:
     logger.info("CONTROL_EVENT_HANDLER_REGISTERED: code=%s", event_code)
 
 
-def dispatch_control_event(event: ControlEvent) -> None:
+def _run_handler(event: ControlEvent) -> Optional[str]:
     """
-    Dispatch event to a handler based on event_code.
-
-    If handler is not found, event remains with status 'new'.
-    If handler succeeds, status is set to 'handled'.
-    If handler fails, status is set to 'error'.
+    Run the handler for event_code; return resulting status or None (no handler).
     """
     event_id = str(event.get("id") or "")
     code = str(event.get("event_code") or "")
 
     if not code:
         logger.debug("CONTROL_EVENT_DISPATCH_SKIP: missing event_code")
-        return
+        return None
 
     handler: Optional[EventHandler] = _HANDLERS.get(code)
     if handler is None:
         logger.debug("CONTROL_EVENT_DISPATCH_NO_HANDLER: code=%s id=%s", code, event_id)
-        return
+        return None
 
     try:
         handler(event)
-        if event_id:
-            update_event_fields(event_id, {"status": "handled"})
         logger.info(
             "CONTROL_EVENT_DISPATCH_HANDLED: code=%s id=%s", code, event_id
         )
+        return "handled"
     except Exception as exc:
         logger.warning(
             "CONTROL_EVENT_DISPATCH_FAILED: code=%s id=%s error=%s",
@@ -57,8 +52,37 @@ def dispatch_control_event(event: ControlEvent) -> None:
             event_id,
             exc,
         )
-        if event_id:
-            update_event_fields(event_id, {"status": "error"})
+        return "error"
+
+
+def dispatch_control_events(events: List[ControlEvent]) -> Dict[str, str]:
+    """
+    Dispatch many events and persist all resulting statuses with one store write.
+
+    Returns {event_id: status} for events that had a handler.
+    """
+    statuses: Dict[str, str] = {}
+    for event in events:
+        status = _run_handler(event)
+        event_id = str(event.get("id") or "")
+        if status is not None and event_id:
+            statuses[event_id] = status
+
+    if statuses:
+        update_events_fields({event_id: {"status": status} for event_id, status in statuses.items()})
+        logger.info("CONTROL_EVENT_DISPATCH_BATCH: events=%s patched=%s", len(events), len(statuses))
+    return statuses
+
+
+def dispatch_control_event(event: ControlEvent) -> None:
+    """
+    Dispatch event to a handler based on event_code.
+
+    If handler is not found, event remains with status 'new'.
+    If handler succeeds, status is set to 'handled'.
+    If handler fails, status is set to 'error'.
+    """
+    dispatch_control_events([event])
 
 
 def _handler_monthly_reglament(event: ControlEvent) -> None:
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+def _event_client(event: Dict[str, Any]) -> Any:
+    return event.get("client_code") or event.get("client_id")
+
+
+class ControlEventIndex:
+    """
+    Hash index over control events for O(1) dedup checks.
+
+    Keys:
+      - (client, period, code) for both "type" and "code" of each event
+      - (client, period) for "any event of this client in this period"
+    Plus the positions of the events by client and by (client, period), for
+    filtered listings of the indexed list (see positions()).
+
+    Client is client_code or client_id (same precedence as the stores use).
+    Build it once per run and keep it in sync with add() when appending events.
+    """
+
+    def __init__(self, events: Iterable[Dict[str, Any]] = ()):
+        # (client, period) -> codes
+        self._codes: Dict[Tuple[Any, Any], Set[Any]] = {}
+        # client -> positions, (client, period) -> positions; keys as strings
+        self._by_client: Dict[str, List[int]] = {}
+        self._by_client_period: Dict[Tuple[str, str], List[int]] = {}
+        self._size = 0
+        for event in events:
+            if isinstance(event, dict):
+                self.add(event)
+            else:
+                self._size += 1
+
+    def add(self, event: Dict[str, Any]) -> None:
+        client, period = _event_client(event), event.get("period")
+        codes = self._codes.setdefault((client, period), set())
+        for code in (event.get("type"), event.get("code")):
+            if code is not None:
+                codes.add(code)
+        self._by_client.setdefault(str(client), []).append(self._size)
+        self._by_client_period.setdefault((str(client), str(period)), []).append(self._size)
+        self._size += 1
+
+    def contains(self, client: Any, period: Any, code: Any) -> bool:
+        return code in self._codes.get((client, period), ())
+
+    def has_client_period(self, client: Any, period: Any) -> bool:
+        return (client, period) in self._codes
+
+    def positions(self, client: Any, period: Optional[Any] = None) -> List[int]:
+        """
+        Ascending positions of the events of a client (optionally of one period)
+        in the indexed list. Do not modify the returned list.
+        """
+        if period is None:
+            return self._by_client.get(str(client), [])
+        return self._by_client_period.get((str(client), str(period)), [])
+
+    def subset(self, client: Any, period: Any) -> "ControlEventIndex":
+        """
+        Small independent index with the keys of one client/period only
+        (cheap to hand over to a worker thread or process). Positions are not kept.
+        """
+        other = ControlEventIndex()
+        if (client, period) in self._codes:
+            other._codes[(client, period)] = set(self._codes[(client, period)])
+        return other
+
+    def copy(self) -> "ControlEventIndex":
+        other = ControlEventIndex()
+        other._codes = {key: set(codes) for key, codes in self._codes.items()}
+        other._by_client = {key: list(pos) for key, pos in self._by_client.items()}
+        other._by_client_period = {key: list(pos) for key, pos in self._by_client_period.items()}
+        other._size = self._size
+        return other
+
+
+# Index of the last events list seen by get_event_index(). The store cache hands out
+# a new list object only when the file changed, so the index is rebuilt only then.
+_CACHED: Dict[str, Any] = {"source": None, "index": None}
+_CACHED_LOCK = threading.Lock()
+
+
+def get_event_index(events: Any) -> ControlEventIndex:
+    """
+    Return index for a (shared, read-only) events list, cached by list identity.
+
+    The returned index must not be modified; use .copy() before add().
+    """
+    with _CACHED_LOCK:
+        if _CACHED["source"] is not events or _CACHED["index"] is None:
+            index = ControlEventIndex(events if isinstance(events, list) else [])
+            _CACHED.update(source=events, index=index)
+        return _CACHED["index"]
@@ -1,5 +1,6 @@
 ﻿from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
@@ -8,10 +9,20 @@ import uuid
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
+from app.core.store_json import load_json_file, save_json_file, store_transaction
+from app.core.store_locks import store_lock
+
 logger = logging.getLogger(__name__)
 
 _STORE_LOCK = threading.Lock()
 
+# Journaled mode state: replayed view of snapshot + journal per store path.
+_JOURNAL_VIEWS: Dict[str, Dict[str, Any]] = {}
+
+_compactor_task: Optional[asyncio.Task] = None
+
+DEFAULT_COMPACT_INTERVAL_SEC = 30.0
+
 
 def _get_store_path() -> str:
     """
@@ -33,21 +44,43 @@ def _get_store_path() -> str:
     return os.path.join(base_dir, "control_events_store.json")
 
 
+def _journal_enabled() -> bool:
+    """
+    Journaled mode is enabled by env CONTROL_EVENTS_STORE_JOURNAL=1.
+
+    In journaled mode new events and patches are appended to an NDJSON journal
+    (<store>.journal) instead of rewriting the whole store; reads merge the
+    snapshot with the journal and the compactor folds the journal back.
+    """
+    value = os.getenv("CONTROL_EVENTS_STORE_JOURNAL", "")
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _get_journal_path(store_path: str) -> str:
+    return store_path + ".journal"
+
+
 def _load_events(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Return current events list (shared snapshot: never mutated by the store,
+    callers copy before mutating).
+    """
     store_path = path or _get_store_path()
 
-    if not os.path.exists(store_path):
-        return []
+    if _journal_enabled():
+        return _load_journaled_events(store_path)
+
+    return _load_snapshot(store_path)
 
-    try:
-        with open(store_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception as exc:
-        logger.warning("CONTROL_EVENT_STORE_LOAD_FAILED: %s", exc)
-        return []
+
+def _load_snapshot(store_path: str) -> List[Dict[str, Any]]:
+    data = load_json_file(store_path, [])
 
     if isinstance(data, list):
         return data
+    # Reglament runs (chain_executor_v2) keep the store as {"events": [...]}.
+    if isinstance(data, dict) and isinstance(data.get("events"), list):
+        return data["events"]
 
     logger.warning(
         "CONTROL_EVENT_STORE_INVALID_ROOT: expected list, got %s", type(data)
@@ -55,22 +88,210 @@ def _load_events(path: Optional[str] = None) -> List[Dict[str, Any]]:
     return []
 
 
-def _save_events(events: List[Dict[str, Any]], path: Optional[str] = None) -> None:
+def _apply_journal_record(view: Dict[str, Any], record: Dict[str, Any]) -> None:
+    events: List[Dict[str, Any]] = view["events"]
+    index: Dict[str, int] = view["index"]
+    op = record.get("op")
+
+    if op == "add":
+        event = record.get("event")
+        if not isinstance(event, dict):
+            return
+        event_id = str(event.get("id"))
+        # Replay is idempotent: a journal that survived a crash mid-compaction
+        # must not duplicate events already folded into the snapshot.
+        if event_id in index:
+            return
+        index[event_id] = len(events)
+        events.append(event)
+        return
+
+    if op == "patch":
+        idx = index.get(str(record.get("id")))
+        if idx is None:
+            return
+        new_item = dict(events[idx])
+        new_item.update(dict(record.get("patch") or {}))
+        events[idx] = new_item
+        return
+
+    logger.warning("CONTROL_EVENT_JOURNAL_UNKNOWN_OP: %s", op)
+
+
+def _load_journaled_events(store_path: str) -> List[Dict[str, Any]]:
+    """
+    Merge snapshot with the journal.
+
+    The merged view is kept in memory together with the journal offset it was
+    replayed to, so each read only parses journal lines appended since the last one.
+    New records are applied to a fresh copy of the list (copy-on-write): a list
+    returned earlier is never changed, so callers may read it after releasing the lock.
+    Must be called under _STORE_LOCK.
+    """
+    base = _load_snapshot(store_path)
+    journal_path = _get_journal_path(store_path)
+
+    try:
+        st = os.stat(journal_path)
+        inode: Optional[int] = st.st_ino
+        size = st.st_size
+    except OSError:
+        inode = None
+        size = 0
+
+    view = _JOURNAL_VIEWS.get(store_path)
+    if (
+        view is None
+        or view["base"] is not base
+        or view["inode"] != inode
+        or size < view["offset"]
+    ):
+        index: Dict[str, int] = {}
+        for idx, item in enumerate(base):
+            index.setdefault(str(item.get("id")), idx)
+        view = {
+            "base": base,
+            "inode": inode,
+            "offset": 0,
+            "records": 0,
+            "events": list(base),
+            "index": index,
+        }
+        _JOURNAL_VIEWS[store_path] = view
+
+    if size > view["offset"]:
+        with open(journal_path, "rb") as f:
+            f.seek(view["offset"])
+            chunk = f.read(size - view["offset"])
+
+        # Ignore a trailing partial line: it is still being written.
+        end = chunk.rfind(b"\n")
+        if end >= 0:
+            view["events"] = list(view["events"])
+            for line in chunk[: end + 1].splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as exc:
+                    logger.warning("CONTROL_EVENT_JOURNAL_BAD_LINE: %s", exc)
+                    continue
+                if isinstance(record, dict):
+                    _apply_journal_record(view, record)
+                    view["records"] += 1
+            view["offset"] += end + 1
+
+    return view["events"]
+
+
+def _append_journal_records(records: List[Dict[str, Any]], path: Optional[str] = None) -> None:
+    """
+    Append records with a single write.
+    """
+    if not records:
+        return
     store_path = path or _get_store_path()
-    directory = os.path.dirname(store_path) or "."
+    journal_path = _get_journal_path(store_path)
+    lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
 
     try:
-        os.makedirs(directory, exist_ok=True)
+        os.makedirs(os.path.dirname(journal_path) or ".", exist_ok=True)
+        with open(journal_path, "a", encoding="utf-8") as f:
+            f.write(lines)
     except Exception as exc:
-        logger.warning("CONTROL_EVENT_STORE_MKDIR_FAILED: %s", exc)
+        logger.warning("CONTROL_EVENT_JOURNAL_APPEND_FAILED: %s", exc)
+
+
+def compact_journal(path: Optional[str] = None) -> int:
+    """
+    Fold the journal into the snapshot file and remove the journal.
+
+    Returns number of journal records folded (0 if there was nothing to do).
+    """
+    store_path = path or _get_store_path()
+    journal_path = _get_journal_path(store_path)
+
+    with store_lock(store_path), _STORE_LOCK:
+        if not os.path.exists(journal_path):
+            return 0
+
+        events = _load_journaled_events(store_path)
+        folded = _JOURNAL_VIEWS[store_path]["records"]
+
+        try:
+            # Snapshot must be on disk before the journal goes (no write-behind here).
+            with store_transaction():
+                save_json_file(store_path, _store_document(store_path, list(events)))
+            os.remove(journal_path)
+        except Exception as exc:
+            logger.warning("CONTROL_EVENT_JOURNAL_COMPACT_FAILED: %s", exc)
+            return 0
+        finally:
+            _JOURNAL_VIEWS.pop(store_path, None)
+
+    logger.info("CONTROL_EVENT_JOURNAL_COMPACTED: records=%s path=%s", folded, store_path)
+    return folded
+
+
+def start_journal_compactor(interval_sec: Optional[float] = None) -> None:
+    """
+    Start background compactor (journaled mode only).
+
+    Interval: argument, env CONTROL_EVENTS_JOURNAL_COMPACT_INTERVAL_SEC, or 30 seconds.
+    """
+    global _compactor_task
+
+    if not _journal_enabled():
+        return
+
+    if _compactor_task is not None:
+        logger.info("Control event journal compactor already running")
+        return
+
+    if interval_sec is None:
+        try:
+            interval_sec = float(
+                os.getenv("CONTROL_EVENTS_JOURNAL_COMPACT_INTERVAL_SEC", DEFAULT_COMPACT_INTERVAL_SEC)
+            )
+        except ValueError:
+            interval_sec = DEFAULT_COMPACT_INTERVAL_SEC
+
+    async def _worker() -> None:
+        logger.info("Control event journal compactor started")
+        while True:
+            await asyncio.sleep(interval_sec)
+            try:
+                await asyncio.to_thread(compact_journal)
+            except Exception as exc:
+                logger.exception("Error in control event journal compactor: %s", exc)
+
+    loop = asyncio.get_event_loop()
+    _compactor_task = loop.create_task(_worker())
+
+
+def stop_journal_compactor() -> None:
+    global _compactor_task
+
+    if _compactor_task is None:
         return
+    _compactor_task.cancel()
+    _compactor_task = None
+    logger.info("Control event journal compactor stopped")
+
+
+def _store_document(store_path: str, events: List[Dict[str, Any]]) -> Any:
+    # Keep the root shape of the file: plain list or {"events": [...], ...}.
+    data = load_json_file(store_path, [])
+    if isinstance(data, dict) and isinstance(data.get("events"), list):
+        return dict(data, events=events)
+    return events
+
 
-    tmp_path = store_path + ".tmp"
+def _save_events(events: List[Dict[str, Any]], path: Optional[str] = None) -> None:
+    store_path = path or _get_store_path()
 
     try:
-        with open(tmp_path, "w", encoding="utf-8") as f:
-            json.dump(events, f, ensure_ascii=False, indent=2)
-        os.replace(tmp_path, store_path)
+        save_json_file(store_path, _store_document(store_path, events))
     except Exception as exc:
         logger.warning("CONTROL_EVENT_STORE_SAVE_FAILED: %s", exc)
 
@@ -79,7 +300,7 @@ def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
 
-def add_event_from_chain(
+def build_event(
     *,
     client_id: Optional[str],
     profile_code: str,
@@ -89,7 +310,7 @@ def add_event_from_chain(
     source: str = "chain",
 ) -> Dict[str, Any]:
     """
-    Append a new control event into JSON store.
+    Build a new control event (not persisted; see add_events).
 
     Structure:
       - id: unique identifier
@@ -104,7 +325,7 @@ def add_event_from_chain(
     """
     safe_payload: Dict[str, Any] = dict(payload or {})
 
-    event: Dict[str, Any] = {
+    return {
         "id": str(uuid.uuid4()),
         "client_id": client_id,
         "profile_code": profile_code,
@@ -116,10 +337,44 @@ def add_event_from_chain(
         "created_at": _utc_now_iso(),
     }
 
-    with _STORE_LOCK:
-        events = _load_events()
-        events.append(event)
-        _save_events(events)
+
+def add_events(new_events: List[Dict[str, Any]]) -> None:
+    """
+    Append built events into JSON store with one write (one journal append).
+    """
+    if not new_events:
+        return
+
+    with store_lock(_get_store_path()), _STORE_LOCK:
+        if _journal_enabled():
+            _append_journal_records([{"op": "add", "event": event} for event in new_events])
+        else:
+            events = list(_load_events())
+            events.extend(new_events)
+            _save_events(events)
+
+
+def add_event_from_chain(
+    *,
+    client_id: Optional[str],
+    profile_code: str,
+    period: str,
+    event_code: str,
+    payload: Dict[str, Any],
+    source: str = "chain",
+) -> Dict[str, Any]:
+    """
+    Append a new control event into JSON store (structure: see build_event).
+    """
+    event = build_event(
+        client_id=client_id,
+        profile_code=profile_code,
+        period=period,
+        event_code=event_code,
+        payload=payload,
+        source=source,
+    )
+    add_events([event])
 
     logger.info(
         "CONTROL_EVENT_STORE_ADDED: id=%s client_id=%s profile_code=%s period=%s code=%s source=%s",
@@ -143,26 +398,69 @@ def update_event_fields(event_id: str, patch: Dict[str, Any]) -> Optional[Dict[s
     if not event_id:
         return None
 
-    with _STORE_LOCK:
-        events = _load_events()
-        updated: Optional[Dict[str, Any]] = None
+    return update_events_fields({str(event_id): dict(patch or {})}).get(str(event_id))
+
+
+def update_events_fields(patches: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Apply shallow patches {event_id: patch} with one store write.
+
+    Returns {event_id: updated event} for the events that were found.
+    """
+    patches = {str(k): dict(v or {}) for k, v in patches.items() if k}
+    if not patches:
+        return {}
+
+    if _journal_enabled():
+        return _update_events_fields_journaled(patches)
+
+    updated: Dict[str, Dict[str, Any]] = {}
+
+    with store_lock(_get_store_path()), _STORE_LOCK:
+        events = list(_load_events())
 
         for idx, item in enumerate(events):
-            if str(item.get("id")) != str(event_id):
+            event_id = str(item.get("id"))
+            patch = patches.get(event_id)
+            if patch is None or event_id in updated:
                 continue
 
             new_item = dict(item)
-            new_item.update(dict(patch or {}))
+            new_item.update(patch)
             events[idx] = new_item
-            updated = new_item
-            break
+            updated[event_id] = new_item
+            if len(updated) == len(patches):
+                break
 
-        if updated is not None:
+        if updated:
             _save_events(events)
 
     return updated
 
 
+def _update_events_fields_journaled(patches: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    store_path = _get_store_path()
+    updated: Dict[str, Dict[str, Any]] = {}
+    records: List[Dict[str, Any]] = []
+
+    with store_lock(store_path), _STORE_LOCK:
+        events = _load_journaled_events(store_path)
+        index = _JOURNAL_VIEWS[store_path]["index"]
+
+        for event_id, patch in patches.items():
+            idx = index.get(event_id)
+            if idx is None:
+                continue
+            records.append({"op": "patch", "id": event_id, "patch": patch})
+            item = dict(events[idx])
+            item.update(patch)
+            updated[event_id] = item
+
+        _append_journal_records(records, store_path)
+
+    return updated
+
+
 def list_events(
     *,
     client_id: Optional[str] = None,
@@ -175,7 +473,7 @@ def list_events(
       - client_id: exact match if provided
       - period: exact match if provided
     """
-    with _STORE_LOCK:
+    with store_lock(_get_store_path(), shared=True), _STORE_LOCK:
         events = _load_events()
 
     result: List[Dict[str, Any]] = []
@@ -193,7 +491,19 @@ def list_all_events() -> List[Dict[str, Any]]:
     """
     Return all events without filters.
     """
-    with _STORE_LOCK:
+    with store_lock(_get_store_path(), shared=True), _STORE_LOCK:
         events = _load_events()
 
     return [dict(item) for item in events]
+
+
+def get_events_snapshot() -> List[Dict[str, Any]]:
+    """
+    Return the current events list without copying it (for read-only listings).
+
+    The list and its events are shared: never modify them. The same list object
+    is returned until the store changes, so indexes can be cached by identity
+    (see control_event_index.get_event_index).
+    """
+    with store_lock(_get_store_path(), shared=True), _STORE_LOCK:
+        return _load_events()
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import datetime
+from collections import deque
+from typing import FrozenSet, List, Tuple
+
+# Five-field cron: minute hour day-of-month month day-of-week
+_FIELDS: List[Tuple[str, int, int]] = [
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 6),
+]
+
+_MONTH_NAMES = {
+    name: i + 1
+    for i, name in enumerate(["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"])
+}
+_WEEKDAY_NAMES = {name: i for i, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])}
+
+_ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+# Upper bound for next_after() search (a valid expression always fires within 4 years,
+# e.g. "0 0 29 2 *").
+_MAX_SEARCH_DAYS = 366 * 5
+
+
+class CronError(ValueError):
+    pass
+
+
+def _parse_value(token: str, name: str) -> int:
+    token = token.strip().lower()
+    if name == "month" and token in _MONTH_NAMES:
+        return _MONTH_NAMES[token]
+    if name == "weekday" and token in _WEEKDAY_NAMES:
+        return _WEEKDAY_NAMES[token]
+    try:
+        return int(token)
+    except ValueError:
+        raise CronError(f"Invalid {name} value: {token!r}")
+
+
+def _parse_field(expr: str, name: str, lo: int, hi: int) -> FrozenSet[int]:
+    values = set()
+    for part in expr.split(","):
+        part = part.strip()
+        if not part:
+            raise CronError(f"Empty {name} list item")
+
+        step = 1
+        if "/" in part:
+            part, step_s = part.split("/", 1)
+            try:
+                step = int(step_s)
+            except ValueError:
+                raise CronError(f"Invalid {name} step: {step_s!r}")
+            if step < 1:
+                raise CronError(f"Invalid {name} step: {step}")
+
+        if part == "*":
+            start, end = lo, hi
+        elif "-" in part:
+            a, b = part.split("-", 1)
+            start, end = _parse_value(a, name), _parse_value(b, name)
+        else:
+            start = _parse_value(part, name)
+            # "5/15" means "from 5 every 15"
+            end = hi if step > 1 else start
+
+        # 7 is Sunday too
+        if name == "weekday":
+            if start == 7 and end == 7:
+                start = end = 0
+            elif end == 7:
+                values.add(0)
+                end = 6
+
+        if start < lo or end > hi or start > end:
+            raise CronError(f"{name} out of range {lo}-{hi}: {part!r}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronExpr:
+    """
+    Parsed five-field cron expression ("m h dom mon dow").
+
+    Supports *, lists (1,15), ranges (1-5), steps (*/15, 0-30/10), month and
+    weekday names (jan, mon) and @daily-style aliases. As in classic cron, when
+    both day-of-month and day-of-week are restricted a day matching either fires.
+    Times are naive datetimes (interpreted in the caller's local time).
+    """
+
+    def __init__(self, expr: str):
+        self.expr = expr.strip()
+        text = _ALIASES.get(self.expr.lower(), self.expr)
+        parts = text.split()
+        if len(parts) != 5:
+            raise CronError(f"Expected 5 fields, got {len(parts)}: {expr!r}")
+
+        parsed = [_parse_field(p, name, lo, hi) for p, (name, lo, hi) in zip(parts, _FIELDS)]
+        self.minutes, self.hours, self.days, self.months, self.weekdays = parsed
+        self._day_any = parts[2] == "*"
+        self._weekday_any = parts[4] == "*"
+
+    def __repr__(self) -> str:
+        return f"CronExpr({self.expr!r})"
+
+    def _day_matches(self, d: datetime.date) -> bool:
+        in_days = d.day in self.days
+        # date.weekday(): Monday=0 .. Sunday=6; cron: Sunday=0
+        in_weekdays = (d.weekday() + 1) % 7 in self.weekdays
+        if self._day_any and self._weekday_any:
+            return True
+        if self._day_any:
+            return in_weekdays
+        if self._weekday_any:
+            return in_days
+        return in_days or in_weekdays
+
+    def matches(self, dt: datetime.datetime) -> bool:
+        return (
+            dt.minute in self.minutes
+            and dt.hour in self.hours
+            and dt.month in self.months
+            and self._day_matches(dt.date())
+        )
+
+    def next_after(self, dt: datetime.datetime) -> datetime.datetime:
+        """
+        First fire time strictly after dt (seconds are dropped).
+        """
+        t = dt.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = t + datetime.timedelta(days=_MAX_SEARCH_DAYS)
+
+        while t <= limit:
+            if t.month not in self.months:
+                # first day of next month
+                year, month = (t.year + 1, 1) if t.month == 12 else (t.year, t.month + 1)
+                t = t.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(t.date()):
+                t = (t + datetime.timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if t.hour not in self.hours:
+                t = (t + datetime.timedelta(hours=1)).replace(minute=0)
+                continue
+            if t.minute not in self.minutes:
+                t += datetime.timedelta(minutes=1)
+                continue
+            return t
+
+        raise CronError(f"Expression never fires: {self.expr!r}")
+
+    def fires_between(self, start: datetime.datetime, end: datetime.datetime, limit: int = 100) -> List[datetime.datetime]:
+        """
+        Fire times in (start, end], at most limit (the latest ones are kept).
+        """
+        out: deque = deque(maxlen=limit)
+        t = start
+        while True:
+            t = self.next_after(t)
+            if t > end:
+                break
+            out.append(t)
+        return list(out)
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Fresh lifetime per Dolibarr resource (seconds); env DOLI_CACHE_TTL_<RESOURCE> overrides.
+DEFAULT_TTLS: Dict[str, float] = {
+    "thirdparties": 300.0,
+    "products": 300.0,
+    "invoices": 30.0,
+}
+DEFAULT_TTL_SEC = 60.0
+# After the TTL an entry is still served (and refreshed in the background) this long.
+DEFAULT_STALE_SEC = 600.0
+DEFAULT_MAX_ENTRIES = 256
+
+# Upstream call: () -> (ok, data_or_error), see doliproxy._call_dolibarr.
+Fetch = Callable[[], Awaitable[Tuple[bool, Any]]]
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+def _make_key(resource: str, params: Optional[Dict[str, Any]]) -> Hashable:
+    return (resource, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items())))
+
+
+class DolibarrCache:
+    """
+    In-process cache of Dolibarr reads keyed by (resource, params).
+
+    - fresh (age < TTL): served from memory
+    - stale (age < TTL + stale window): served from memory, refreshed in background
+    - missing / expired: fetched; concurrent misses of one key share one upstream call
+    Failed fetches are never cached; a failed background refresh keeps the stale entry.
+    """
+
+    def __init__(self, stale_sec: Optional[float] = None, max_entries: Optional[int] = None):
+        self.stale_sec = stale_sec if stale_sec is not None else _env_float("DOLI_CACHE_STALE_SEC", DEFAULT_STALE_SEC)
+        self.max_entries = max_entries or int(_env_float("DOLI_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)) or 1
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._stats: Dict[str, int] = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "refreshes": 0,
+            "errors": 0,
+        }
+
+    def ttl(self, resource: str) -> float:
+        default = DEFAULT_TTLS.get(resource, DEFAULT_TTL_SEC)
+        return _env_float(f"DOLI_CACHE_TTL_{resource.upper()}", default)
+
+    async def get(self, resource: str, params: Optional[Dict[str, Any]], fetch: Fetch) -> Tuple[bool, Any]:
+        key = _make_key(resource, params)
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            ttl = self.ttl(resource)
+            if age < ttl:
+                self._stats["hits"] += 1
+                self._entries.move_to_end(key)
+                return True, entry[1]
+            if age < ttl + self.stale_sec:
+                self._stats["stale_hits"] += 1
+                self._entries.move_to_end(key)
+                if key not in self._inflight:
+                    self._stats["refreshes"] += 1
+                    self._start(key, fetch)
+                return True, entry[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats["coalesced"] += 1
+        else:
+            self._stats["misses"] += 1
+            task = self._start(key, fetch)
+        # Shielded: a cancelled caller does not cancel the call the other waiters share.
+        return await asyncio.shield(task)
+
+    def _start(self, key: Hashable, fetch: Fetch) -> asyncio.Future:
+        """
+        Singleflight: one upstream call per key at a time, running as its own task.
+        """
+        task = asyncio.ensure_future(self._fetch(key, fetch))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def _fetch(self, key: Hashable, fetch: Fetch) -> Tuple[bool, Any]:
+        try:
+            ok, data = await fetch()
+        except Exception as exc:
+            ok, data = False, f"Dolibarr call failed: {exc}"
+        if ok:
+            self._store(key, data)
+        else:
+            self._stats["errors"] += 1
+            logger.warning("DOLIBARR_CACHE_FETCH_FAILED: key=%s error=%s", key, data)
+        return ok, data
+
+    def _store(self, key: Hashable, data: Any) -> None:
+        self._entries[key] = (time.monotonic(), data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, resource: Optional[str] = None) -> None:
+        if resource is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] == resource]:  # type: ignore[index]
+            self._entries.pop(key, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        served = stats["hits"] + stats["stale_hits"]
+        total = served + stats["misses"] + stats["coalesced"]
+        stats["requests"] = total
+        stats["hit_ratio"] = round(served / total, 4) if total else 0.0
+        stats["entries"] = len(self._entries)
+        stats["inflight"] = len(self._inflight)
+        return stats
+
+
+_cache: Optional[DolibarrCache] = None
+
+
+def get_dolibarr_cache() -> DolibarrCache:
+    global _cache
+    if _cache is None:
+        _cache = DolibarrCache()
+    return _cache
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE = 10
+DEFAULT_KEEPALIVE_SEC = 30.0
+DEFAULT_TIMEOUT_SEC = 10.0
+DEFAULT_CONNECT_TIMEOUT_SEC = 5.0
+DEFAULT_API_URL = "http://host.docker.internal:8282/api/index.php"
+DEFAULT_PAGE_SIZE = 100
+# Pages requested ahead of the one being consumed.
+DEFAULT_PREFETCH = 2
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.1, float(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+def dolibarr_settings() -> Tuple[str, Optional[str]]:
+    """
+    Dolibarr REST base URL (DOLI_API_URL) and API key (DOLI_API_KEY, None if unset).
+    """
+    base = os.getenv("DOLI_API_URL") or DEFAULT_API_URL
+    return base.rstrip("/"), os.getenv("DOLI_API_KEY")
+
+
+def _build_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=_env_int("DOLI_HTTP_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS),
+        max_keepalive_connections=_env_int("DOLI_HTTP_MAX_KEEPALIVE", DEFAULT_MAX_KEEPALIVE),
+        keepalive_expiry=_env_float("DOLI_HTTP_KEEPALIVE_SEC", DEFAULT_KEEPALIVE_SEC),
+    )
+    timeout = httpx.Timeout(
+        _env_float("DOLI_HTTP_TIMEOUT_SEC", DEFAULT_TIMEOUT_SEC),
+        connect=_env_float("DOLI_HTTP_CONNECT_TIMEOUT_SEC", DEFAULT_CONNECT_TIMEOUT_SEC),
+    )
+    verify = os.getenv("DOLI_HTTP_VERIFY", "1").strip().lower() not in ("0", "false", "no")
+    logger.info(
+        "DOLIBARR_HTTP_CLIENT_CREATED: max_connections=%s keepalive=%s verify=%s",
+        limits.max_connections,
+        limits.max_keepalive_connections,
+        verify,
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout, verify=verify)
+
+
+def get_dolibarr_client() -> httpx.AsyncClient:
+    """
+    Application-wide pooled client for Dolibarr REST calls (keep-alive connections
+    are reused across requests). Do not close it; see close_dolibarr_client().
+
+    Created on startup; created lazily if startup hooks did not run.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+def start_dolibarr_client() -> None:
+    get_dolibarr_client()
+
+
+class DolibarrError(Exception):
+    pass
+
+
+async def fetch_dolibarr_page(
+    resource: str,
+    page: int,
+    *,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    params: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    One page of a Dolibarr collection in rowid order ([] past the end).
+    Raises DolibarrError on configuration / HTTP errors.
+    """
+    base, key = dolibarr_settings()
+    if not key:
+        raise DolibarrError("DOLI_API_KEY is not set")
+    query: Dict[str, Any] = {"sortfield": "t.rowid", "sortorder": "ASC"}
+    query.update(params or {})
+    query.update(DOLAPIKEY=key, limit=page_size, page=page)
+    try:
+        resp = await get_dolibarr_client().get(f"{base}/{resource.lstrip('/')}", params=query)
+    except httpx.RequestError as exc:
+        raise DolibarrError(f"Dolibarr unreachable: {exc}")
+    if resp.status_code == 404:
+        # Dolibarr answers 404 for an empty page.
+        return []
+    if resp.status_code != 200:
+        raise DolibarrError(f"Dolibarr error {resp.status_code} on {resource} page {page}")
+    data = resp.json()
+    if isinstance(data, dict):
+        data = data.get("data", data.get("items"))
+    return [r for r in data if isinstance(r, dict)] if isinstance(data, list) else []
+
+
+async def iter_dolibarr_pages(
+    resource: str,
+    *,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    prefetch: int = DEFAULT_PREFETCH,
+    params: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Walk all pages of a Dolibarr collection.
+
+    While page N is consumed, pages N+1..N+prefetch are already requested, so
+    network waits overlap with the consumer. Memory stays bounded by
+    (prefetch + 1) pages. The walk ends at the first short page; requests
+    still in flight are cancelled (also when the consumer stops early).
+    """
+    ahead: Deque[asyncio.Task] = deque()
+    next_page = 0
+
+    def _request() -> None:
+        nonlocal next_page
+        ahead.append(
+            asyncio.ensure_future(fetch_dolibarr_page(resource, next_page, page_size=page_size, params=params))
+        )
+        next_page += 1
+
+    try:
+        for _ in range(max(0, prefetch) + 1):
+            _request()
+        while ahead:
+            records = await ahead.popleft()
+            if records:
+                yield records
+            if len(records) < page_size:
+                return
+            _request()
+    finally:
+        for task in ahead:
+            if task.done():
+                if not task.cancelled():
+                    task.exception()
+            else:
+                task.cancel()
+
+
+async def iter_dolibarr_keyset(
+    resource: str,
+    *,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    params: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Walk all records of a Dolibarr collection by rowid keyset: every request is
+    the first page of (t.rowid > last id seen), combined with params["sqlfilters"].
+
+    Unlike page offsets, records inserted or deleted during the walk do not shift
+    the following pages, so every record that exists for the whole walk is
+    returned exactly once. The next page is requested as soon as a page arrives,
+    while the consumer handles it.
+    """
+    base_filter = (params or {}).get("sqlfilters")
+
+    def _request(after: int) -> asyncio.Task:
+        keyset = f"(t.rowid:>:{after})"
+        query = dict(params or {}, sqlfilters=f"{base_filter} and {keyset}" if base_filter else keyset)
+        return asyncio.ensure_future(fetch_dolibarr_page(resource, 0, page_size=page_size, params=query))
+
+    pending: Optional[asyncio.Task] = _request(0)
+    try:
+        while pending is not None:
+            records = await pending
+            pending = None
+            ids = [int(r["id"]) for r in records if str(r.get("id", "")).isdigit()]
+            if len(records) >= page_size and ids:
+                pending = _request(max(ids))
+            if records:
+                yield records
+    finally:
+        if pending is not None:
+            if pending.done():
+                if not pending.cancelled():
+                    pending.exception()
+            else:
+                pending.cancel()
+
+
+async def close_dolibarr_client() -> None:
+    """
+    Close pooled connections (application shutdown).
+    """
+    global _client
+    client, _client = _client, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+        logger.info("DOLIBARR_HTTP_CLIENT_CLOSED")
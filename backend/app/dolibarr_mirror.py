@@ -0,0 +1,435 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.dolibarr_http import dolibarr_settings, iter_dolibarr_keyset
+
+logger = logging.getLogger(__name__)
+
+# This file lives in app/core/dolibarr_mirror.py
+# BASE_DIR points to backend root (data/ holds the SQLite files).
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+DEFAULT_MIRROR_PATH = BASE_DIR / "data" / "dolibarr_mirror.db"
+
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_INTERVAL_SEC = 300.0
+# An entity not synced for this long is not served from the mirror (live calls instead).
+DEFAULT_MAX_AGE_SEC = 900.0
+# Full resync (also drops records deleted in Dolibarr) at most this often.
+DEFAULT_FULL_EVERY_SEC = 86400.0
+# Incremental syncs re-read this much before the cursor: Dolibarr compares t.tms in
+# its server time zone while the cursor is UTC; upserts make the overlap harmless.
+DEFAULT_OVERLAP_SEC = 86400
+
+# Mirrored Dolibarr resources -> fields copied into indexed columns (name, ref, socid).
+ENTITIES: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "thirdparties": {"name": ("name", "nom"), "ref": ("code_client", "ref"), "socid": ()},
+    "invoices": {"name": ("ref_client",), "ref": ("ref",), "socid": ("socid", "fk_soc")},
+    "products": {"name": ("label",), "ref": ("ref",), "socid": ()},
+}
+
+_TABLE = "doli_records"
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {_TABLE} (
+    entity TEXT NOT NULL,
+    rowid INTEGER NOT NULL,
+    modified INTEGER,
+    name TEXT,
+    ref TEXT,
+    status TEXT,
+    socid TEXT,
+    gen INTEGER NOT NULL DEFAULT 0,
+    doc TEXT NOT NULL,
+    PRIMARY KEY (entity, rowid)
+);
+CREATE INDEX IF NOT EXISTS ix_{_TABLE}_modified ON {_TABLE}(entity, modified);
+CREATE INDEX IF NOT EXISTS ix_{_TABLE}_status ON {_TABLE}(entity, status);
+CREATE INDEX IF NOT EXISTS ix_{_TABLE}_socid ON {_TABLE}(entity, socid);
+CREATE TABLE IF NOT EXISTS {_TABLE}_state (
+    entity TEXT PRIMARY KEY,
+    cursor INTEGER,
+    gen INTEGER NOT NULL DEFAULT 0,
+    last_sync_at TEXT,
+    last_full_sync_at TEXT,
+    last_error TEXT
+);
+"""
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def parse_modified(value: Any) -> Optional[int]:
+    """
+    Dolibarr date_modification -> epoch seconds.
+    Most objects return epoch ints (or digit strings), products return "YYYY-MM-DD HH:MM:SS".
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip()
+    if text.isdigit():
+        return int(text)
+    try:
+        return int(datetime.fromisoformat(text.replace(" ", "T")).replace(tzinfo=timezone.utc).timestamp())
+    except ValueError:
+        return None
+
+
+def _first(record: Dict[str, Any], keys: Iterable[str]) -> Optional[str]:
+    for k in keys:
+        value = record.get(k)
+        if value not in (None, ""):
+            return str(value)
+    return None
+
+
+class DolibarrMirror:
+    """
+    Local SQLite copy of Dolibarr thirdparties, invoices and products.
+
+    - full sync: rowid keyset pages (t.rowid > last id), so records inserted or
+      deleted in Dolibarr during the walk cannot hide a live record; records not
+      seen any more (deleted in Dolibarr) are dropped afterwards
+    - incremental sync: only records with t.tms >= cursor (sqlfilters), keyset pages
+    - cursor = newest date_modification stored, kept per entity in the state table
+    Queries run against the mirror only, so they work while Dolibarr is slow or down;
+    an entity not synced within DOLI_MIRROR_MAX_AGE_SEC is reported as not ready.
+
+    SQLite work runs in worker threads (asyncio.to_thread, one connection per
+    thread); the async methods never block the event loop.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = str(db_path or os.getenv("DOLI_MIRROR_PATH") or DEFAULT_MIRROR_PATH)
+        self.page_size = _env_int("DOLI_MIRROR_PAGE_SIZE", DEFAULT_PAGE_SIZE)
+        self.max_age_sec = _env_float("DOLI_MIRROR_MAX_AGE_SEC", DEFAULT_MAX_AGE_SEC)
+        self.overlap_sec = int(_env_float("DOLI_MIRROR_OVERLAP_SEC", DEFAULT_OVERLAP_SEC))
+        self.full_every_sec = _env_float("DOLI_MIRROR_FULL_EVERY_SEC", DEFAULT_FULL_EVERY_SEC)
+        self._local = threading.local()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            # isolation_level=None: autocommit, transactions are opened explicitly.
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------------------------------------------------------
+    # state
+    # ---------------------------------------------------------
+    def _state(self, entity: str) -> Dict[str, Any]:
+        row = self._connect().execute(
+            f"SELECT cursor, gen, last_sync_at, last_full_sync_at, last_error FROM {_TABLE}_state WHERE entity = ?",
+            (entity,),
+        ).fetchone()
+        if row is None:
+            return {"cursor": None, "gen": 0, "last_sync_at": None, "last_full_sync_at": None, "last_error": None}
+        return dict(zip(("cursor", "gen", "last_sync_at", "last_full_sync_at", "last_error"), row))
+
+    def _save_state(self, entity: str, **fields: Any) -> None:
+        state = self._state(entity)
+        state.update(fields)
+        self._connect().execute(
+            f"INSERT OR REPLACE INTO {_TABLE}_state (entity, cursor, gen, last_sync_at, last_full_sync_at, last_error) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                entity,
+                state["cursor"],
+                state["gen"],
+                state["last_sync_at"],
+                state["last_full_sync_at"],
+                state["last_error"],
+            ),
+        )
+
+    def _age_sec(self, state: Dict[str, Any]) -> Optional[float]:
+        if not state["last_sync_at"]:
+            return None
+        try:
+            last = datetime.fromisoformat(str(state["last_sync_at"]).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return (datetime.now(timezone.utc) - last).total_seconds()
+
+    async def is_ready(self, entity: str) -> bool:
+        """
+        True when the entity synced within max_age_sec (the mirror can answer queries).
+        """
+        age = self._age_sec(await asyncio.to_thread(self._state, entity))
+        return age is not None and age <= self.max_age_sec
+
+    def _status(self) -> Dict[str, Any]:
+        conn = self._connect()
+        out: Dict[str, Any] = {}
+        for entity in ENTITIES:
+            (count,) = conn.execute(f"SELECT COUNT(*) FROM {_TABLE} WHERE entity = ?", (entity,)).fetchone()
+            state = self._state(entity)
+            age = self._age_sec(state)
+            out[entity] = dict(state, count=count, stale=age is None or age > self.max_age_sec)
+        return out
+
+    async def status(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._status)
+
+    # ---------------------------------------------------------
+    # store
+    # ---------------------------------------------------------
+    def _upsert(self, entity: str, records: List[Dict[str, Any]], gen: int) -> Optional[int]:
+        """
+        Insert / replace records in one transaction. Returns newest modification time.
+        """
+        fields = ENTITIES[entity]
+        rows = []
+        newest: Optional[int] = None
+        for r in records:
+            try:
+                rowid = int(r.get("id"))
+            except (TypeError, ValueError):
+                continue
+            modified = parse_modified(r.get("date_modification") or r.get("tms") or r.get("date_creation"))
+            if modified is not None and (newest is None or modified > newest):
+                newest = modified
+            status = r.get("status", r.get("statut"))
+            rows.append(
+                (
+                    entity,
+                    rowid,
+                    modified,
+                    _first(r, fields["name"]),
+                    _first(r, fields["ref"]),
+                    str(status) if status is not None else None,
+                    _first(r, fields["socid"]),
+                    gen,
+                    json.dumps(r, ensure_ascii=False),
+                )
+            )
+        if not rows:
+            return newest
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {_TABLE} (entity, rowid, modified, name, ref, status, socid, gen, doc) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return newest
+
+    async def query(
+        self,
+        entity: str,
+        **filters: Any,
+    ) -> List[Dict[str, Any]]:
+        """
+        Records of entity in Dolibarr order (rowid), Dolibarr-style limit / page.
+        q matches name or ref (substring, case-insensitive for ASCII); other
+        filters: status, socid, modified_since.
+        """
+        return await asyncio.to_thread(self._query, entity, **filters)
+
+    def _query(
+        self,
+        entity: str,
+        *,
+        q: Optional[str] = None,
+        status: Optional[str] = None,
+        socid: Optional[str] = None,
+        modified_since: Optional[int] = None,
+        limit: int = 100,
+        page: int = 0,
+    ) -> List[Dict[str, Any]]:
+        if entity not in ENTITIES:
+            raise ValueError(f"Unknown entity: {entity}")
+        where = ["entity = ?"]
+        args: List[Any] = [entity]
+        if q:
+            where.append("(name LIKE ? OR ref LIKE ?)")
+            args += [f"%{q}%", f"%{q}%"]
+        if status is not None:
+            where.append("status = ?")
+            args.append(str(status))
+        if socid is not None:
+            where.append("socid = ?")
+            args.append(str(socid))
+        if modified_since is not None:
+            where.append("modified >= ?")
+            args.append(int(modified_since))
+        limit = max(1, int(limit))
+        args += [limit, max(0, int(page)) * limit]
+        rows = self._connect().execute(
+            f"SELECT doc FROM {_TABLE} WHERE {' AND '.join(where)} ORDER BY rowid LIMIT ? OFFSET ?",
+            args,
+        ).fetchall()
+        return [json.loads(doc) for (doc,) in rows]
+
+    # ---------------------------------------------------------
+    # sync
+    # ---------------------------------------------------------
+    async def _full_sync(self, entity: str, state: Dict[str, Any]) -> int:
+        gen = int(state["gen"]) + 1
+        newest: Optional[int] = None
+        total = 0
+        async for records in iter_dolibarr_keyset(entity, page_size=self.page_size):
+            modified = await asyncio.to_thread(self._upsert, entity, records, gen)
+            if modified is not None and (newest is None or modified > newest):
+                newest = modified
+            total += len(records)
+        await asyncio.to_thread(self._finish_full_sync, entity, gen, newest)
+        return total
+
+    def _finish_full_sync(self, entity: str, gen: int, newest: Optional[int]) -> None:
+        # The keyset walk saw every record that existed throughout it and tagged it
+        # with gen: older ones were deleted in Dolibarr.
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(f"DELETE FROM {_TABLE} WHERE entity = ? AND gen < ?", (entity, gen))
+            now = _utc_now_iso()
+            self._save_state(entity, cursor=newest, gen=gen, last_sync_at=now, last_full_sync_at=now, last_error=None)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    async def _incremental_sync(self, entity: str, state: Dict[str, Any]) -> int:
+        cursor = int(state["cursor"])
+        since = datetime.fromtimestamp(max(0, cursor - self.overlap_sec), tz=timezone.utc)
+        sqlfilters = f"(t.tms:>=:'{since.strftime('%Y-%m-%d %H:%M:%S')}')"
+        newest = cursor
+        total = 0
+        async for records in iter_dolibarr_keyset(entity, page_size=self.page_size, params={"sqlfilters": sqlfilters}):
+            modified = await asyncio.to_thread(self._upsert, entity, records, int(state["gen"]))
+            if modified is not None and modified > newest:
+                newest = modified
+            total += len(records)
+        await asyncio.to_thread(self._save_state, entity, cursor=newest, last_sync_at=_utc_now_iso(), last_error=None)
+        return total
+
+    def _full_due(self, state: Dict[str, Any]) -> bool:
+        if state["cursor"] is None or not state["last_full_sync_at"]:
+            return True
+        try:
+            last = datetime.fromisoformat(str(state["last_full_sync_at"]).replace("Z", "+00:00"))
+        except ValueError:
+            return True
+        return (datetime.now(timezone.utc) - last).total_seconds() >= self.full_every_sec
+
+    async def sync(self, entity: str, full: bool = False) -> Dict[str, Any]:
+        """
+        Sync one entity (full on first run / when due / when asked, else incremental).
+        Errors are recorded in the state and re-raised.
+        """
+        if entity not in ENTITIES:
+            raise ValueError(f"Unknown entity: {entity}")
+        lock = self._locks.setdefault(entity, asyncio.Lock())
+        async with lock:
+            state = await asyncio.to_thread(self._state, entity)
+            mode = "full" if full or self._full_due(state) else "incremental"
+            try:
+                if mode == "full":
+                    count = await self._full_sync(entity, state)
+                else:
+                    count = await self._incremental_sync(entity, state)
+            except Exception as exc:
+                await asyncio.to_thread(self._save_state, entity, last_error=str(exc))
+                logger.warning("DOLIBARR_MIRROR_SYNC_FAILED: entity=%s mode=%s error=%s", entity, mode, exc)
+                raise
+            logger.info("DOLIBARR_MIRROR_SYNCED: entity=%s mode=%s records=%s", entity, mode, count)
+            return {"entity": entity, "mode": mode, "records": count}
+
+    async def sync_all(self, full: bool = False) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = []
+        for entity in ENTITIES:
+            try:
+                results.append(await self.sync(entity, full=full))
+            except Exception as exc:
+                results.append({"entity": entity, "error": str(exc)})
+        return results
+
+
+_mirror: Optional[DolibarrMirror] = None
+_mirror_task: Optional[asyncio.Task] = None
+
+
+def get_dolibarr_mirror() -> DolibarrMirror:
+    global _mirror
+    if _mirror is None:
+        _mirror = DolibarrMirror()
+    return _mirror
+
+
+def start_dolibarr_mirror() -> None:
+    """
+    Periodic sync loop (leader only). Disabled with DOLI_MIRROR_ENABLED=0 or without DOLI_API_KEY.
+    """
+    global _mirror_task
+
+    if _mirror_task is not None:
+        return
+    if os.getenv("DOLI_MIRROR_ENABLED", "1").strip().lower() in ("0", "false", "no"):
+        logger.info("DOLIBARR_MIRROR_DISABLED")
+        return
+    if not dolibarr_settings()[1]:
+        logger.info("DOLIBARR_MIRROR_SKIPPED: DOLI_API_KEY is not set")
+        return
+
+    interval = _env_float("DOLI_MIRROR_INTERVAL_SEC", DEFAULT_INTERVAL_SEC)
+    mirror = get_dolibarr_mirror()
+
+    async def _worker() -> None:
+        while True:
+            await mirror.sync_all()
+            await asyncio.sleep(interval)
+
+    loop = asyncio.get_event_loop()
+    _mirror_task = loop.create_task(_worker())
+    logger.info("DOLIBARR_MIRROR_STARTED: interval=%s path=%s", interval, mirror.db_path)
+
+
+def stop_dolibarr_mirror() -> None:
+    global _mirror_task
+
+    if _mirror_task is None:
+        return
+    _mirror_task.cancel()
+    _mirror_task = None
+    logger.info("DOLIBARR_MIRROR_STOPPED")
@@ -1,8 +1,16 @@
-﻿import os
-from typing import Any, Dict, Optional, Tuple, List
+﻿import json
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Tuple, List
 
 import httpx
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.core.dolibarr_cache import get_dolibarr_cache
+from app.core.dolibarr_http import DolibarrError, dolibarr_settings, get_dolibarr_client, iter_dolibarr_pages
+from app.core.dolibarr_mirror import ENTITIES, get_dolibarr_mirror
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Dolibarr"])
 
@@ -13,9 +21,7 @@ def _get_dolibarr_base_and_key() -> Tuple[str, Optional[str]]:
     DOLI_API_URL example: http://host.docker.internal:8282/api/index.php
     This function NEVER raises HTTP exceptions. It only returns (base, key or None).
     """
-    base = os.getenv("DOLI_API_URL") or "http://host.docker.internal:8282/api/index.php"
-    key = os.getenv("DOLI_API_KEY")
-    return base.rstrip("/"), key
+    return dolibarr_settings()
 
 
 async def _call_dolibarr(path: str, params: Optional[Dict[str, Any]] = None) -> Tuple[bool, Any]:
@@ -33,11 +39,8 @@ async def _call_dolibarr(path: str, params: Optional[Dict[str, Any]] = None) ->
     q: Dict[str, Any] = dict(params or {})
     q["DOLAPIKEY"] = key
 
-    timeout = httpx.Timeout(10.0, connect=5.0)
-
     try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            resp = await client.get(url, params=q)
+        resp = await get_dolibarr_client().get(url, params=q)
     except httpx.RequestError as exc:
         return False, f"Dolibarr unreachable: {exc}"
 
@@ -51,6 +54,14 @@ async def _call_dolibarr(path: str, params: Optional[Dict[str, Any]] = None) ->
         return True, resp.text
 
 
+async def _cached_call(path: str, params: Optional[Dict[str, Any]] = None) -> Tuple[bool, Any]:
+    """
+    _call_dolibarr through the reference data cache (TTL per resource,
+    stale-while-revalidate, one upstream call per key at a time).
+    """
+    return await get_dolibarr_cache().get(path, params, lambda: _call_dolibarr(path, params=params))
+
+
 def _normalize_list(data: Any, key: str) -> List[Any]:
     """
     Try to extract a list from Dolibarr response.
@@ -83,46 +94,166 @@ async def health_dolibarr() -> Dict[str, Any]:
     return {"status": "error"}
 
 
-@router.get("/clients")
-async def list_clients(limit: int = 100, page: int = 0) -> Dict[str, Any]:
+@router.get("/health/dolibarr/cache")
+async def dolibarr_cache_metrics() -> Dict[str, Any]:
     """
-    Map /clients -> Dolibarr /thirdparties.
-    On any error returns { "clients": [] } with HTTP 200.
+    Reference data cache counters and hit ratio.
     """
-    params = {
+    return get_dolibarr_cache().metrics()
+
+
+# Dolibarr columns searched by q: the same fields the mirror keeps as name / ref.
+_SEARCH_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "thirdparties": ("t.nom", "t.code_client"),
+    "invoices": ("t.ref_client", "t.ref"),
+    "products": ("t.label", "t.ref"),
+}
+
+
+def _sql_text(value: str) -> str:
+    # sqlfilters values are quoted; Dolibarr rejects quotes inside them.
+    return value.replace("'", "").replace("%", "")
+
+
+async def _list_entity(
+    entity: str,
+    key: str,
+    *,
+    limit: int,
+    page: int = 0,
+    q: Optional[str] = None,
+    status: Optional[str] = None,
+    socid: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    List records of a Dolibarr resource: from the local mirror while it is fresh
+    (works while Dolibarr is slow or down), otherwise live through the cache with
+    the same filters as Dolibarr sqlfilters (q: name or ref substring in both).
+    On any error returns { key: [] } with HTTP 200.
+    """
+    try:
+        mirror = get_dolibarr_mirror()
+        if await mirror.is_ready(entity):
+            items = await mirror.query(entity, q=q, status=status, socid=socid, limit=limit, page=page)
+            return {key: items}
+    except Exception as exc:
+        logger.warning("DOLIBARR_MIRROR_QUERY_FAILED: entity=%s error=%s", entity, exc)
+
+    params: Dict[str, Any] = {
         "limit": limit,
         "page": page,
         "sortfield": "t.rowid",
         "sortorder": "ASC",
     }
-    ok, data = await _call_dolibarr("thirdparties", params=params)
-    clients = _normalize_list(data, "clients") if ok else []
-    return {"clients": clients}
+    filters = []
+    if q:
+        text = _sql_text(q)
+        filters.append("(" + " or ".join(f"({c}:like:'%{text}%')" for c in _SEARCH_COLUMNS[entity]) + ")")
+    if status is not None:
+        column = "t.fk_statut" if entity == "invoices" else ("t.tosell" if entity == "products" else "t.status")
+        filters.append(f"({column}:=:'{_sql_text(status)}')")
+    if socid is not None:
+        filters.append(f"(t.fk_soc:=:'{_sql_text(socid)}')")
+    if filters:
+        params["sqlfilters"] = " and ".join(filters)
+
+    ok, data = await _cached_call(entity, params=params)
+    return {key: _normalize_list(data, key) if ok else []}
+
+
+@router.get("/clients")
+async def list_clients(
+    limit: int = 100,
+    page: int = 0,
+    q: Optional[str] = None,
+    status: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Map /clients -> Dolibarr /thirdparties (q: name / code substring).
+    On any error returns { "clients": [] } with HTTP 200.
+    """
+    return await _list_entity("thirdparties", "clients", limit=limit, page=page, q=q, status=status)
 
 
 @router.get("/invoices")
-async def list_invoices(limit: int = 100) -> Dict[str, Any]:
+async def list_invoices(
+    limit: int = 100,
+    page: int = 0,
+    socid: Optional[str] = None,
+    status: Optional[str] = None,
+    q: Optional[str] = None,
+) -> Dict[str, Any]:
     """
-    Map /invoices -> Dolibarr /invoices.
+    Map /invoices -> Dolibarr /invoices (socid: client id, q: ref / client ref substring).
     On any error returns { "invoices": [] } with HTTP 200.
     """
-    params = {
-        "limit": limit,
-    }
-    ok, data = await _call_dolibarr("invoices", params=params)
-    invoices = _normalize_list(data, "invoices") if ok else []
-    return {"invoices": invoices}
+    return await _list_entity("invoices", "invoices", limit=limit, page=page, q=q, status=status, socid=socid)
 
 
 @router.get("/products")
-async def list_products(limit: int = 100) -> Dict[str, Any]:
+async def list_products(
+    limit: int = 100,
+    page: int = 0,
+    q: Optional[str] = None,
+    status: Optional[str] = None,
+) -> Dict[str, Any]:
     """
-    Map /products -> Dolibarr /products.
+    Map /products -> Dolibarr /products (q: label / ref substring).
     On any error returns { "products": [] } with HTTP 200.
     """
-    params = {
-        "limit": limit,
-    }
-    ok, data = await _call_dolibarr("products", params=params)
-    products = _normalize_list(data, "products") if ok else []
-    return {"products": products}
+    return await _list_entity("products", "products", limit=limit, page=page, q=q, status=status)
+
+
+async def _iter_ndjson(entity: str, page_size: int, prefetch: int) -> AsyncIterator[str]:
+    try:
+        async for records in iter_dolibarr_pages(entity, page_size=page_size, prefetch=prefetch):
+            yield "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+    except DolibarrError as exc:
+        # Status line is already sent: report the failure as the last record.
+        logger.warning("DOLIBARR_STREAM_FAILED: entity=%s error=%s", entity, exc)
+        yield json.dumps({"error": str(exc)}) + "\n"
+
+
+@router.get("/dolibarr/{entity}/stream")
+async def stream_dolibarr_collection(
+    entity: str,
+    page_size: int = Query(100, ge=1, le=1000),
+    prefetch: int = Query(2, ge=0, le=8),
+) -> StreamingResponse:
+    """
+    Whole Dolibarr collection (thirdparties, invoices, products) as NDJSON,
+    one record per line, read live page by page with prefetch pages in flight.
+    Memory stays at a few pages whatever the collection size.
+    A failure mid-stream ends it with an {"error": ...} line.
+    """
+    if entity not in ENTITIES:
+        raise HTTPException(status_code=404, detail=f"Unknown entity: {entity}")
+    return StreamingResponse(
+        _iter_ndjson(entity, page_size, prefetch),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{entity}.ndjson"'},
+    )
+
+
+@router.get("/dolibarr/mirror")
+async def dolibarr_mirror_status() -> Dict[str, Any]:
+    """
+    Sync state and record counts of the local Dolibarr mirror.
+    """
+    return await get_dolibarr_mirror().status()
+
+
+@router.post("/dolibarr/mirror/sync")
+async def dolibarr_mirror_sync(entity: Optional[str] = None, full: bool = False) -> Dict[str, Any]:
+    """
+    Run a mirror sync now (all entities, or one); full=true forces a full resync.
+    """
+    mirror = get_dolibarr_mirror()
+    if entity is None:
+        return {"results": await mirror.sync_all(full=full)}
+    if entity not in ENTITIES:
+        raise HTTPException(status_code=404, detail=f"Unknown entity: {entity}")
+    try:
+        return {"results": [await mirror.sync(entity, full=full)]}
+    except Exception as exc:
+        return {"results": [{"entity": entity, "error": str(exc)}]}
@@ -3,7 +3,7 @@
 import logging
 from typing import Any, Dict
 
-from app.core.events import EventTypes, get_event_system
+from app.core.event_system import EventTypes, get_event_system
 from app.core.chain_executor import ChainExecutor
 
 logger = logging.getLogger("app.events")
@@ -79,8 +79,16 @@ async def handle_chain_triggered(event_type: str, payload: Dict[str, Any]) -> No
     """
     Entry point for chain execution.
 
-    For now it delegates to ChainExecutor, which is a safe no-op skeleton.
+    Delegates to ChainExecutor. A payload with "runs" ([{"chain_id", "client_id",
+    "context"}, ...], e.g. one reglament run over many clients) is executed with
+    run_chains, so control events of all runs are stored and dispatched as one batch.
     """
+    runs = payload.get("runs")
+    if isinstance(runs, list):
+        logger.info("CHAIN_TRIGGERED: runs=%s", len(runs))
+        await chain_executor.run_chains([r for r in runs if isinstance(r, dict) and r.get("chain_id")])
+        return
+
     chain_id = payload.get("chain_id")
     client_id = payload.get("client_id")
     context = payload.get("context", {})
@@ -0,0 +1,292 @@
+﻿from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[str, Dict[str, Any]], Union[None, Awaitable[None]]]
+
+# Dispatch modes: "queued" - per-subscriber queue + worker (default);
+# "inline" - publish() awaits handlers one after another.
+DISPATCH_QUEUED = "queued"
+DISPATCH_INLINE = "inline"
+
+DEFAULT_QUEUE_SIZE = 100
+# Handler latencies kept per subscriber for avg / p95.
+LATENCY_WINDOW = 200
+
+
+class EventTypes:
+    """Centralized list of event type names."""
+
+    TASK_CREATED = "task_created"
+    TASK_STATUS_CHANGED = "task_status_changed"
+    TASK_OVERDUE = "task_overdue"
+
+    CONTROL_EVENT_TRIGGERED = "control_event_triggered"
+    CHAIN_TRIGGERED = "chain_triggered"
+
+    NOTIFICATION_SENT = "notification_sent"
+
+    EMAIL_RECEIVED = "email_received"
+    EMAIL_ACTION_REQUIRED = "email_action_required"
+    EMAIL_ACTION_CREATED = "email_action_created"
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+def _handler_name(handler: EventHandler) -> str:
+    module = getattr(handler, "__module__", None)
+    name = getattr(handler, "__qualname__", None) or repr(handler)
+    return f"{module}.{name}" if module else name
+
+
+class _Subscriber:
+    """
+    One (event type, handler) pair: its queue, worker task and stats.
+    """
+
+    def __init__(self, event_type: str, handler: EventHandler, queue_size: int):
+        self.event_type = event_type
+        self.handler = handler
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.task: Optional[asyncio.Task] = None
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.latencies_ms: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.max_ms = 0.0
+
+    async def call(self, payload: Dict[str, Any]) -> None:
+        started = time.perf_counter()
+        try:
+            result = self.handler(self.event_type, payload)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception:
+            self.failed += 1
+            logger.exception("Error while handling event %s in %r", self.event_type, self.handler)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000.0
+            self.processed += 1
+            self.latencies_ms.append(elapsed)
+            self.max_ms = max(self.max_ms, elapsed)
+
+    async def run(self) -> None:
+        while True:
+            payload = await self.queue.get()
+            try:
+                await self.call(payload)
+            finally:
+                self.queue.task_done()
+
+    def metrics(self) -> Dict[str, Any]:
+        window = sorted(self.latencies_ms)
+        latency: Dict[str, Any] = {"last": None, "avg": None, "p95": None, "max": None}
+        if window:
+            latency = {
+                "last": round(self.latencies_ms[-1], 3),
+                "avg": round(sum(window) / len(window), 3),
+                "p95": round(window[min(len(window) - 1, int(len(window) * 0.95))], 3),
+                "max": round(self.max_ms, 3),
+            }
+        return {
+            "handler": _handler_name(self.handler),
+            "queue_depth": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "processed": self.processed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "latency_ms": latency,
+        }
+
+
+class EventSystem:
+    """
+    Simple in-process pub/sub event system.
+
+    Handlers can be sync or async callables with signature:
+        handler(event_type: str, payload: Dict[str, Any]) -> None | Awaitable[None]
+
+    In "queued" mode (default, env EVENTS_DISPATCH) every subscribed handler has
+    its own bounded queue (env EVENTS_QUEUE_SIZE) and worker task, so a slow
+    handler (e.g. a whole chain run) neither blocks the publisher nor the other
+    handlers. Events reach each handler in publish order.
+
+    publish() waits only for queue space (backpressure when a handler falls
+    behind); fire_and_forget=True never waits and drops the event for handlers
+    whose queue is full. "inline" mode keeps the old behaviour: handlers are
+    awaited sequentially inside publish().
+    """
+
+    def __init__(self, mode: Optional[str] = None, queue_size: Optional[int] = None) -> None:
+        self.mode = (mode or os.getenv("EVENTS_DISPATCH") or DISPATCH_QUEUED).lower()
+        if self.mode not in (DISPATCH_QUEUED, DISPATCH_INLINE):
+            raise ValueError(f"Unknown event dispatch mode: {self.mode}")
+        self.queue_size = queue_size or _env_int("EVENTS_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)
+        self._subscribers: Dict[str, List[_Subscriber]] = defaultdict(list)
+        self._published: Dict[str, int] = defaultdict(int)
+        self._lock = asyncio.Lock()
+
+    async def subscribe(self, event_type: str, handler: EventHandler) -> None:
+        """
+        Register a handler for a given event type.
+        Safe to call multiple times with the same handler.
+        """
+        async with self._lock:
+            subscribers = self._subscribers[event_type]
+            if any(s.handler == handler for s in subscribers):
+                return
+            sub = _Subscriber(event_type, handler, self.queue_size)
+            if self.mode == DISPATCH_QUEUED:
+                sub.task = asyncio.get_event_loop().create_task(sub.run())
+            subscribers.append(sub)
+            logger.debug("Subscribed handler %r to event %s", handler, event_type)
+
+    async def unsubscribe(self, event_type: str, handler: EventHandler) -> None:
+        """
+        Unregister a handler for a given event type.
+        Events still queued for it are discarded.
+        """
+        async with self._lock:
+            subscribers = self._subscribers.get(event_type)
+            if not subscribers:
+                return
+            for sub in [s for s in subscribers if s.handler == handler]:
+                subscribers.remove(sub)
+                self._stop_subscriber(sub)
+                logger.debug("Unsubscribed handler %r from event %s", handler, event_type)
+            if not subscribers:
+                self._subscribers.pop(event_type, None)
+
+    async def publish(
+        self,
+        event_type: str,
+        payload: Dict[str, Any],
+        fire_and_forget: bool = False,
+    ) -> None:
+        """
+        Publish an event to all subscribed handlers.
+
+        Queued mode: enqueue for every handler; waits while a handler queue is
+        full unless fire_and_forget is set (then the event is dropped for that
+        handler and counted in metrics). Inline mode: handlers are awaited
+        sequentially.
+        """
+        async with self._lock:
+            subscribers = list(self._subscribers.get(event_type, []))
+        self._published[event_type] += 1
+
+        if not subscribers:
+            logger.debug("No handlers for event %s", event_type)
+            return
+
+        for sub in subscribers:
+            if self.mode == DISPATCH_INLINE:
+                await sub.call(payload)
+            elif fire_and_forget:
+                try:
+                    sub.queue.put_nowait(payload)
+                except asyncio.QueueFull:
+                    sub.dropped += 1
+                    logger.warning(
+                        "EVENT_DROPPED_QUEUE_FULL: event=%s handler=%s",
+                        event_type,
+                        _handler_name(sub.handler),
+                    )
+            else:
+                await sub.queue.put(payload)
+
+    async def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued event has been handled. False on timeout.
+        """
+        async with self._lock:
+            queues = [s.queue for subs in self._subscribers.values() for s in subs]
+        if not queues:
+            return True
+        waiter = asyncio.ensure_future(asyncio.gather(*(q.join() for q in queues)))
+        done, _ = await asyncio.wait({waiter}, timeout=timeout)
+        if not done:
+            waiter.cancel()
+        return bool(done)
+
+    async def close(self, timeout: Optional[float] = 5.0) -> None:
+        """
+        Drain queues (up to timeout) and stop the handler workers.
+        """
+        drained = await self.join(timeout)
+        if not drained:
+            logger.warning("EVENT_QUEUES_NOT_DRAINED: %s", self.queue_depths())
+        async with self._lock:
+            for subs in self._subscribers.values():
+                for sub in subs:
+                    self._stop_subscriber(sub)
+
+    @staticmethod
+    def _stop_subscriber(sub: _Subscriber) -> None:
+        if sub.task is not None:
+            sub.task.cancel()
+            sub.task = None
+        pending = sub.queue.qsize()
+        if pending:
+            sub.dropped += pending
+            logger.warning(
+                "EVENTS_DISCARDED: event=%s handler=%s count=%s",
+                sub.event_type,
+                _handler_name(sub.handler),
+                pending,
+            )
+
+    # ---------------------------------------------------------
+    # metrics
+    # ---------------------------------------------------------
+    def queue_depths(self) -> Dict[str, int]:
+        return {
+            event_type: sum(s.queue.qsize() for s in subs)
+            for event_type, subs in self._subscribers.items()
+        }
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Per event type: published count, total queue depth and per-handler
+        queue depth / processed / failed / dropped / latency (ms).
+        """
+        event_types = sorted(set(self._subscribers) | set(self._published))
+        return {
+            "mode": self.mode,
+            "queue_size": self.queue_size,
+            "events": {
+                event_type: {
+                    "published": self._published.get(event_type, 0),
+                    "queue_depth": sum(s.queue.qsize() for s in self._subscribers.get(event_type, [])),
+                    "handlers": [s.metrics() for s in self._subscribers.get(event_type, [])],
+                }
+                for event_type in event_types
+            },
+        }
+
+
+_event_system: EventSystem | None = None
+
+
+def get_event_system() -> EventSystem:
+    """
+    Global accessor for the singleton EventSystem instance.
+
+    This keeps the event bus process-local and simple.
+    """
+    global _event_system
+    if _event_system is None:
+        _event_system = EventSystem()
+    return _event_system
@@ -1,7 +1,7 @@
 ﻿import logging
 from typing import Any, Dict
 
-from app.core.events import EventTypes, get_event_system
+from app.core.event_system import EventTypes, get_event_system
 from app.services.chain_executor_v2 import execute_chain
 
 logger = logging.getLogger(__name__)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.core.store_json import PathLike, store_version
+
+# Clients may keep responses but must revalidate them (cheap 304 when unchanged).
+CACHE_CONTROL = "no-cache"
+
+
+def store_validators(paths: Iterable[PathLike], *, salt: str = "") -> Tuple[str, Optional[float]]:
+    """
+    (ETag, Last-Modified epoch seconds) for a response built from the given stores.
+
+    salt distinguishes representations of the same stores (query string, code version).
+    Last-Modified is the newest store time (None when no store exists yet).
+    """
+    parts = [salt]
+    last_modified: Optional[float] = None
+    for path in paths:
+        version = store_version(path)
+        if version is None:
+            parts.append("-")
+            continue
+        token, modified = version
+        parts.append(token)
+        if last_modified is None or modified > last_modified:
+            last_modified = modified
+
+    digest = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"', last_modified
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/ prefixes are ignored (proxies may weaken strong tags).
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
+
+
+def _not_modified_since(header: str, last_modified: float) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since is None:
+        return False
+    # HTTP dates have second precision.
+    return int(last_modified) <= since.timestamp()
+
+
+def conditional_get(
+    request: Request,
+    response: Response,
+    paths: Iterable[PathLike],
+    *,
+    salt: str = "",
+) -> Optional[Response]:
+    """
+    Validators for a read endpoint built from JSON stores.
+
+    Sets ETag / Last-Modified / Cache-Control on response and returns a 304
+    response when the client copy is current; the route returns it as is and
+    skips building and serializing the body:
+
+        cached = conditional_get(request, response, [STORE_PATH])
+        if cached is not None:
+            return cached
+
+    The query string is part of the ETag (different filters -> different bodies).
+    """
+    etag, last_modified = store_validators(paths, salt=f"{salt}?{request.url.query}")
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110, 13.2.2).
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, etag)
+    elif if_modified_since is not None and last_modified is not None:
+        fresh = _not_modified_since(if_modified_since, last_modified)
+    else:
+        fresh = False
+
+    if fresh:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
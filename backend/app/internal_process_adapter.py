@@ -1,100 +1,254 @@
 ﻿from __future__ import annotations
 
+import asyncio
+import inspect
 import logging
 import os
-import threading
 import time
-from typing import Any, Dict, Optional
-from urllib.parse import quote
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
+# Generator: (process_instance_id, payload) -> result dict (sync or async).
+TaskGenerator = Callable[[str, Dict[str, Any]], Union[Dict[str, Any], Awaitable[Dict[str, Any]]]]
+GenerationItem = Tuple[str, Dict[str, Any]]
 
-def _background_generate_tasks(
-    base_url: str,
-    process_instance_id: str,
-    payload: Optional[Dict[str, Any]],
-) -> None:
-    """
-    Background worker that calls generate-tasks endpoint.
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 256
 
-    Runs in a separate thread to avoid blocking the main request
-    and to prevent self-call deadlocks on the same uvicorn worker.
-    """
-    instance_id = (process_instance_id or "").strip()
-    if not instance_id:
-        logger.debug("background_generate_tasks: empty process_instance_id, skipping")
-        return
+_generator: Optional[TaskGenerator] = None
+_pool: Optional["_TaskGenerationPool"] = None
+
+# Instances triggered inside task_generation_batch(), submitted as one job on exit.
+_BATCH: ContextVar[Optional["TaskGenerationBatch"]] = ContextVar("task_generation_batch", default=None)
 
+
+def _env_int(name: str, default: int) -> int:
     try:
-        import requests  # type: ignore[import]
-    except Exception:
-        logger.debug("background_generate_tasks: requests library is not available")
-        return
+        return max(1, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+def register_task_generator(generator: TaskGenerator) -> None:
+    """
+    Override the in-process generate-tasks implementation (tests, other stores).
+    """
+    global _generator
+    _generator = generator
+
 
-    url = f"{base_url.rstrip('/')}/api/internal/process-instances/{quote(instance_id, safe='')}/generate-tasks"
-    body: Dict[str, Any] = {
-        "source": "chain",
-        "payload": payload or {},
-    }
+async def _default_generator(process_instance_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Same code path as POST /api/internal/process-instances/{id}/generate-tasks,
+    called directly instead of over HTTP.
+    """
+    from app.routes_internal import generate_tasks_for_instance  # type: ignore[import]
 
-    # Short delay to allow the original request to finish.
-    time.sleep(0.2)
+    return await generate_tasks_for_instance(process_instance_id)
 
+
+async def _generate_one(process_instance_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    generator = _generator or _default_generator
+    started = time.perf_counter()
     try:
-        logger.info(
-            "PROCESS_TASK_GENERATION_BG_START: url=%s instance_id=%s",
-            url,
-            instance_id,
+        result = generator(process_instance_id, payload)
+        if inspect.isawaitable(result):
+            result = await result
+        out: Dict[str, Any] = {
+            "instance_id": process_instance_id,
+            "status": "ok",
+            "tasks_generated": (result or {}).get("tasks_generated"),
+        }
+    except Exception as exc:
+        # HTTPException(404) from the route: unknown instance.
+        status = "not_found" if getattr(exc, "status_code", None) == 404 else "error"
+        logger.warning(
+            "PROCESS_TASK_GENERATION_FAILED: instance_id=%s status=%s error=%s",
+            process_instance_id,
+            status,
+            getattr(exc, "detail", exc),
         )
-        response = requests.post(url, json=body, timeout=10.0)
-        if response.status_code >= 400:
-            logger.warning(
-                "PROCESS_TASK_GENERATION_BG_FAILED: status=%s body=%s",
-                response.status_code,
-                response.text,
+        out = {
+            "instance_id": process_instance_id,
+            "status": status,
+            "error": str(getattr(exc, "detail", exc)),
+        }
+    out["elapsed_ms"] = round((time.perf_counter() - started) * 1000.0, 3)
+    return out
+
+
+class _TaskGenerationPool:
+    """
+    Bounded pool of worker tasks on the event loop.
+
+    Queue items are batches (one per chain run or single trigger); a worker
+    runs a batch's instances in order and resolves the batch future with the
+    list of per-instance results.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        loop = asyncio.get_event_loop()
+        self.workers = [loop.create_task(self._worker()) for _ in range(workers)]
+        logger.info("PROCESS_TASK_GENERATION_POOL_STARTED: workers=%s queue=%s", workers, queue_size)
+
+    async def _worker(self) -> None:
+        while True:
+            items, future = await self.queue.get()
+            try:
+                results = [await _generate_one(instance_id, payload) for instance_id, payload in items]
+                if not future.done():
+                    future.set_result(results)
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+            finally:
+                self.queue.task_done()
+
+    async def stop(self) -> None:
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        # Batches still queued are not generated.
+        while not self.queue.empty():
+            _, future = self.queue.get_nowait()
+            future.cancel()
+        logger.info("PROCESS_TASK_GENERATION_POOL_STOPPED")
+
+    def submit(self, items: List[GenerationItem]) -> "asyncio.Future[List[Dict[str, Any]]]":
+        future: asyncio.Future = asyncio.get_event_loop().create_future()
+        try:
+            self.queue.put_nowait((items, future))
+        except asyncio.QueueFull:
+            logger.warning("PROCESS_TASK_GENERATION_QUEUE_FULL: instances=%s", len(items))
+            future.set_result(
+                [{"instance_id": instance_id, "status": "error", "error": "queue full"} for instance_id, _ in items]
             )
-            return
+        return future
 
-        logger.info(
-            "PROCESS_TASK_GENERATION_BG_OK: instance_id=%s status=%s",
-            instance_id,
-            response.status_code,
+
+def _get_pool() -> _TaskGenerationPool:
+    global _pool
+    if _pool is None:
+        _pool = _TaskGenerationPool(
+            workers=_env_int("TASK_GENERATION_WORKERS", DEFAULT_WORKERS),
+            queue_size=_env_int("TASK_GENERATION_QUEUE_SIZE", DEFAULT_QUEUE_SIZE),
         )
-    except Exception as exc:
-        logger.warning("PROCESS_TASK_GENERATION_BG_EXCEPTION: %s", exc)
+    return _pool
+
+
+async def stop_task_generation_pool() -> None:
+    """
+    Cancel pool workers (application shutdown); a later trigger starts a new pool.
+    """
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.stop()
+
+
+def _log_results(future: "asyncio.Future[List[Dict[str, Any]]]") -> None:
+    if future.cancelled():
+        return
+    if future.exception() is not None:
+        logger.warning("PROCESS_TASK_GENERATION_BATCH_FAILED: %s", future.exception())
+        return
+    results = future.result()
+    ok = sum(1 for r in results if r.get("status") == "ok")
+    logger.info("PROCESS_TASK_GENERATION_DONE: instances=%s ok=%s", len(results), ok)
+
+
+def generate_tasks_for_instances(items: List[GenerationItem]) -> "asyncio.Future[List[Dict[str, Any]]]":
+    """
+    Submit instances as one batch; the returned future resolves to per-instance
+    results [{"instance_id", "status": ok|not_found|error, ...}].
+    Must be called on the event loop.
+    """
+    future = _get_pool().submit(list(items))
+    future.add_done_callback(_log_results)
+    return future
+
+
+class TaskGenerationBatch:
+    """
+    Instances collected during one chain run; results are set after submit.
+    """
+
+    def __init__(self) -> None:
+        self.items: List[GenerationItem] = []
+        self.future: Optional[asyncio.Future] = None
+        self._seen: Set[str] = set()
+
+    def add(self, process_instance_id: str, payload: Dict[str, Any]) -> None:
+        # The same instance triggered twice in one run is generated once.
+        if process_instance_id in self._seen:
+            return
+        self._seen.add(process_instance_id)
+        self.items.append((process_instance_id, payload))
+
+    async def results(self) -> List[Dict[str, Any]]:
+        if self.future is None:
+            return []
+        return await self.future
+
+
+@contextmanager
+def task_generation_batch() -> Iterator[TaskGenerationBatch]:
+    """
+    Collect trigger_generate_tasks_from_chain calls and submit them to the pool
+    as one batch on exit; await batch.results() to get them back.
+    Nested blocks join the outermost one.
+    """
+    outer = _BATCH.get()
+    if outer is not None:
+        yield outer
+        return
+
+    batch = TaskGenerationBatch()
+    token = _BATCH.set(batch)
+    try:
+        yield batch
+    finally:
+        _BATCH.reset(token)
+        if batch.items:
+            batch.future = generate_tasks_for_instances(batch.items)
 
 
 def trigger_generate_tasks_from_chain(
     *,
     process_instance_id: str,
     payload: Optional[Dict[str, Any]] = None,
-) -> None:
+) -> Optional["asyncio.Future[List[Dict[str, Any]]]"]:
     """
-    Fire-and-forget bridge from chains to internal process generate-tasks endpoint.
+    Non-blocking bridge from chains to generate-tasks for a process instance.
 
     Behavior:
-      - Spawn a background thread that will call
-        POST /api/internal/process-instances/{id}/generate-tasks
-        against the current backend.
-      - Return immediately so chain execution is not blocked.
+      - Inside task_generation_batch(): add the instance to the batch (None is returned).
+      - Otherwise submit it to the in-process worker pool and return a future
+        with the results, so chain execution is not blocked.
+      - Without a running event loop (sync callers) generate inline.
     """
     instance_id = (process_instance_id or "").strip()
     if not instance_id:
         logger.debug("trigger_generate_tasks_from_chain: empty process_instance_id, skipping")
-        return
+        return None
 
-    base_url = os.getenv("ERP_INTERNAL_BASE_URL", "http://127.0.0.1:8000").rstrip("/")
+    safe_payload = dict(payload or {})
 
-    thread = threading.Thread(
-        target=_background_generate_tasks,
-        args=(base_url, instance_id, dict(payload or {})),
-        daemon=True,
-    )
-    thread.start()
+    batch = _BATCH.get()
+    if batch is not None:
+        batch.add(instance_id, safe_payload)
+        return None
 
-    logger.info(
-        "PROCESS_TASK_GENERATION_BG_SCHEDULED: instance_id=%s base_url=%s",
-        instance_id,
-        base_url,
-    )
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        result = asyncio.run(_generate_one(instance_id, safe_payload))
+        logger.info("PROCESS_TASK_GENERATION_INLINE: instance_id=%s status=%s", instance_id, result["status"])
+        return None
+
+    logger.info("PROCESS_TASK_GENERATION_SCHEDULED: instance_id=%s", instance_id)
+    return generate_tasks_for_instances([(instance_id, safe_payload)])
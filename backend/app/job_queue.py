@@ -0,0 +1,405 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.store_json import load_json_file, save_json_file
+from app.core.store_locks import store_lock
+
+logger = logging.getLogger(__name__)
+
+# This file lives in app/core/job_queue.py
+# BASE_DIR points to backend root (where JSON stores are placed).
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+DEFAULT_JOBS_PATH = BASE_DIR / "jobs_store.json"
+
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_WORKERS = 1
+# A job interrupted this many times (its process died mid-run) is failed, not re-run.
+DEFAULT_MAX_ATTEMPTS = 3
+# Finished jobs kept in the store (oldest are dropped first).
+MAX_KEPT_JOBS = 200
+# Progress is persisted at most this often (other workers / restarts read it).
+PROGRESS_PERSIST_SEC = 1.0
+
+FINAL_STATUSES = ("succeeded", "failed")
+
+# Handler: async (params, report) -> result; report(progress_dict) publishes progress.
+JobHandler = Callable[[Dict[str, Any], Callable[[Dict[str, Any]], None]], Awaitable[Any]]
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+def _owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owner_alive(owner: Optional[str]) -> bool:
+    """
+    True if owner ("host:pid") is a live process on this host.
+    Owners on other hosts are assumed alive.
+    """
+    if not owner or ":" not in owner:
+        return False
+    host, _, pid_s = owner.rpartition(":")
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(int(pid_s), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """
+    Bounded in-process job queue with persisted job records.
+
+    - submit() stores a "queued" job and returns it immediately
+    - N worker tasks execute jobs through handlers registered per kind
+    - job records live in jobs_store.json: status, progress, result, error
+    - subscribe() yields live status/progress events (used for SSE)
+    - resume() (leader only) picks up jobs left queued by a previous process and
+      re-queues jobs whose owner process died mid-run ("interrupted" is recorded first);
+      after JOBS_MAX_ATTEMPTS runs (persisted "attempts") such a job is failed instead
+
+    Status flow: queued -> running -> succeeded | failed
+    (interrupted -> queued on restart).
+
+    The store is locked and written from worker threads (asyncio.to_thread),
+    never on the event loop.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or os.getenv("JOBS_STORE_PATH") or DEFAULT_JOBS_PATH)
+        self._handlers: Dict[str, JobHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._live: Dict[str, Dict[str, Any]] = {}
+        self._persisted_at: Dict[str, float] = {}
+        self._persisting: Dict[str, asyncio.Task] = {}
+
+    # ---------------------------------------------------------
+    # store
+    # ---------------------------------------------------------
+    def _load_jobs(self) -> List[Dict[str, Any]]:
+        data = load_json_file(self.path, {"jobs": []})
+        if isinstance(data, dict) and isinstance(data.get("jobs"), list):
+            return data["jobs"]
+        return []
+
+    def _put_job(self, job: Dict[str, Any]) -> None:
+        # Blocking: runs in a worker thread (see _store_job).
+        with store_lock(self.path):
+            jobs = [j for j in self._load_jobs() if j.get("id") != job["id"]]
+            jobs.append(dict(job))
+            if len(jobs) > MAX_KEPT_JOBS:
+                finished = [j for j in jobs if j.get("status") in FINAL_STATUSES]
+                drop = {j["id"] for j in finished[: len(jobs) - MAX_KEPT_JOBS]}
+                jobs = [j for j in jobs if j.get("id") not in drop]
+            save_json_file(self.path, {"jobs": jobs})
+
+    async def _store_job(self, job: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._put_job, dict(job))
+        self._persisted_at[job["id"]] = time.monotonic()
+
+    def _claim(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Mark queued job as running by this process. None if it is gone or taken.
+        Blocking: runs in a worker thread.
+        """
+        with store_lock(self.path):
+            job = next((dict(j) for j in self._load_jobs() if j.get("id") == job_id), None)
+            if job is None or job.get("status") != "queued":
+                return None
+            job.update(status="running", owner=_owner_id(), started_at=_utc_now_iso())
+            job["attempts"] = int(job.get("attempts") or 0) + 1
+            self._put_job(job)
+        return job
+
+    def _recover(self) -> List[str]:
+        """
+        Ids of persisted jobs to re-enqueue; jobs whose owner died mid-run are
+        recorded as interrupted and set back to queued. Blocking: runs in a
+        worker thread.
+        """
+        ids: List[str] = []
+        max_attempts = _env_int("JOBS_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)
+        with store_lock(self.path):
+            for job in list(self._load_jobs()):
+                status = job.get("status")
+                if status == "running" and not _owner_alive(job.get("owner")):
+                    job = dict(job)
+                    job.update(status="interrupted", interrupted_at=_utc_now_iso())
+                    self._put_job(job)
+                    status = "interrupted"
+                if status not in ("queued", "interrupted"):
+                    continue
+                if status == "interrupted":
+                    job = dict(job)
+                    attempts = int(job.get("attempts") or 0)
+                    if attempts >= max_attempts:
+                        # Probably the job itself kills its worker: stop retrying.
+                        job.update(
+                            status="failed",
+                            owner=None,
+                            error=f"Interrupted {attempts} times, giving up",
+                            finished_at=_utc_now_iso(),
+                        )
+                        self._put_job(job)
+                        logger.warning("JOB_ABANDONED: id=%s attempts=%s", job["id"], attempts)
+                        continue
+                    # Runs commit all-or-nothing, so an interrupted run left no partial
+                    # state behind and can simply be executed again.
+                    job.update(status="queued", owner=None)
+                    self._put_job(job)
+                ids.append(job["id"])
+        return ids
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        live = self._live.get(job_id)
+        if live is not None:
+            return dict(live)
+        for job in self._load_jobs():
+            if job.get("id") == job_id:
+                return dict(job)
+        return None
+
+    def list_jobs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        jobs = [dict(self._live.get(j.get("id"), j)) for j in self._load_jobs()]
+        jobs.sort(key=lambda j: j.get("created_at") or "", reverse=True)
+        return jobs[:limit]
+
+    # ---------------------------------------------------------
+    # lifecycle
+    # ---------------------------------------------------------
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    def start(self, workers: Optional[int] = None) -> None:
+        """
+        Start worker tasks on the running loop. Safe to call more than once.
+        """
+        if self._workers:
+            return
+
+        self._queue = asyncio.Queue(maxsize=_env_int("JOBS_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+        count = workers or _env_int("JOBS_WORKERS", DEFAULT_WORKERS)
+        loop = asyncio.get_event_loop()
+        self._workers = [loop.create_task(self._worker(i)) for i in range(count)]
+        logger.info("JOB_QUEUE_STARTED: workers=%s path=%s", count, self.path)
+
+    def resume(self) -> None:
+        """
+        Re-enqueue persisted jobs that no live process is going to run
+        (in the background; the store scan runs off the loop).
+        """
+        self.start()
+        asyncio.get_event_loop().create_task(self._resume())
+
+    async def _resume(self) -> None:
+        try:
+            ids = await asyncio.to_thread(self._recover)
+        except Exception:
+            logger.exception("JOB_QUEUE_RESUME_FAILED")
+            return
+        resumed = 0
+        for job_id in ids:
+            try:
+                self._queue.put_nowait(job_id)  # type: ignore[union-attr]
+                resumed += 1
+            except asyncio.QueueFull:
+                logger.warning("JOB_QUEUE_RESUME_SKIPPED_FULL: id=%s", job_id)
+        if resumed:
+            logger.info("JOB_QUEUE_RESUMED: jobs=%s", resumed)
+
+    async def submit(self, kind: str, params: Dict[str, Any], job_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Persist a new job and enqueue it. Raises JobQueueFull if the queue is full.
+        Must be called on the event loop (workers are started lazily).
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        self.start()
+
+        job: Dict[str, Any] = {
+            "id": job_id or str(uuid.uuid4()),
+            "kind": kind,
+            "params": dict(params),
+            "status": "queued",
+            "created_at": _utc_now_iso(),
+            "started_at": None,
+            "finished_at": None,
+            "progress": None,
+            "result": None,
+            "error": None,
+            "owner": None,
+            "attempts": 0,
+        }
+        if self._queue.full():  # type: ignore[union-attr]
+            raise JobQueueFull(f"Job queue is full ({self._queue.maxsize})")  # type: ignore[union-attr]
+        await self._store_job(job)
+        if self._queue.full():  # type: ignore[union-attr]
+            # Filled up while the job was being stored.
+            job.update(status="failed", error="Job queue is full", finished_at=_utc_now_iso())
+            await self._store_job(job)
+            raise JobQueueFull(f"Job queue is full ({self._queue.maxsize})")  # type: ignore[union-attr]
+        self._queue.put_nowait(job["id"])  # type: ignore[union-attr]
+        logger.info("JOB_QUEUED: id=%s kind=%s", job["id"], kind)
+        return job
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            job_id = await self._queue.get()  # type: ignore[union-attr]
+            try:
+                await self._execute(job_id)
+            except Exception as exc:
+                logger.exception("JOB_WORKER_ERROR: worker=%s id=%s error=%s", n, job_id, exc)
+            finally:
+                self._queue.task_done()  # type: ignore[union-attr]
+
+    async def _execute(self, job_id: str) -> None:
+        job = await asyncio.to_thread(self._claim, job_id)
+        if job is None:
+            return
+
+        self._live[job_id] = job
+        self._publish(job_id, {"type": "status", "status": "running"})
+
+        def report(progress: Dict[str, Any]) -> None:
+            job["progress"] = dict(progress)
+            self._publish(job_id, {"type": "progress", "progress": job["progress"]})
+            pending = self._persisting.get(job_id)
+            if pending is not None and not pending.done():
+                return
+            if time.monotonic() - self._persisted_at.get(job_id, 0.0) >= PROGRESS_PERSIST_SEC:
+                self._persisting[job_id] = asyncio.ensure_future(self._store_job(job))
+
+        handler = self._handlers.get(job.get("kind"))
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job kind: {job.get('kind')}")
+            job["result"] = await handler(dict(job.get("params") or {}), report)
+            job["status"] = "succeeded"
+        except Exception as exc:
+            logger.exception("JOB_FAILED: id=%s error=%s", job_id, exc)
+            job["status"] = "failed"
+            job["error"] = str(exc)
+
+        job["finished_at"] = _utc_now_iso()
+        try:
+            # A progress write still in flight must not land after the final record.
+            pending = self._persisting.pop(job_id, None)
+            if pending is not None:
+                await asyncio.gather(pending, return_exceptions=True)
+            await self._store_job(job)
+        finally:
+            self._live.pop(job_id, None)
+            self._persisted_at.pop(job_id, None)
+            self._publish(job_id, {"type": "status", "status": job["status"], "error": job["error"]})
+        logger.info("JOB_FINISHED: id=%s status=%s", job_id, job["status"])
+
+    # ---------------------------------------------------------
+    # progress streaming
+    # ---------------------------------------------------------
+    def _publish(self, job_id: str, event: Dict[str, Any]) -> None:
+        for q in self._subscribers.get(job_id, []):
+            if q.full():
+                # Slow consumer: drop the oldest progress event, keep the newest.
+                try:
+                    q.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            q.put_nowait(event)
+
+    async def subscribe(self, job_id: str, poll_sec: float = 1.0):
+        """
+        Async iterator of job events until the job reaches a final status.
+
+        First event is a snapshot ({"type": "snapshot", "job": ...}). Jobs executed
+        by another process are followed by polling the store.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return
+        yield {"type": "snapshot", "job": job}
+        if job.get("status") in FINAL_STATUSES:
+            return
+
+        q: asyncio.Queue = asyncio.Queue(maxsize=100)
+        self._subscribers.setdefault(job_id, []).append(q)
+        try:
+            last_progress = job.get("progress")
+            while True:
+                try:
+                    event = await asyncio.wait_for(q.get(), timeout=poll_sec)
+                except asyncio.TimeoutError:
+                    if job_id in self._live:
+                        continue
+                    current = self.get(job_id)
+                    if current is None:
+                        return
+                    if current.get("progress") != last_progress:
+                        last_progress = current.get("progress")
+                        yield {"type": "progress", "progress": last_progress}
+                    if current.get("status") in FINAL_STATUSES:
+                        yield {"type": "status", "status": current["status"], "error": current.get("error")}
+                        return
+                    continue
+                yield event
+                if event.get("type") == "status" and event.get("status") in FINAL_STATUSES:
+                    return
+        finally:
+            subs = self._subscribers.get(job_id, [])
+            if q in subs:
+                subs.remove(q)
+            if not subs:
+                self._subscribers.pop(job_id, None)
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue()
+    return _job_queue
+
+
+def start_job_queue() -> None:
+    """
+    Start workers (every API worker executes the jobs it accepted).
+    """
+    get_job_queue().start()
+
+
+def resume_jobs() -> None:
+    """
+    Resume persisted queued / interrupted jobs (leader only).
+    """
+    get_job_queue().resume()
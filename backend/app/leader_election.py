@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.store_json import load_json_file, save_json_file
+from app.core.store_locks import store_lock
+
+logger = logging.getLogger(__name__)
+
+# This file lives in app/core/leader_election.py
+# BASE_DIR points to backend root (where JSON stores are placed).
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+DEFAULT_LEASE_PATH = BASE_DIR / "leader_lease.json"
+DEFAULT_LEASE_TTL_SEC = 15.0
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(1.0, float(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+class LeaderElection:
+    """
+    Lease-based leader election between API worker processes on one host.
+
+    The lease lives in a small JSON file (env LEADER_LEASE_PATH) guarded by the
+    store lock: {"owner", "acquired_at", "renewed_at", "expires_at"}.
+    Every heartbeat (TTL / 3) the leader renews the lease and followers try to
+    take it over; a lease that was not renewed within the TTL (env
+    LEADER_LEASE_TTL_SEC, default 15) is free. A leader that finds the lease
+    taken by someone else (e.g. it was paused longer than the TTL) steps down.
+
+    on_elected / on_demoted callbacks run on the event loop thread; the lease
+    file is locked and written from a worker thread so a slow or contended
+    lock never stalls the loop.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttl_sec: Optional[float] = None,
+    ):
+        self.path = Path(path or os.getenv("LEADER_LEASE_PATH") or DEFAULT_LEASE_PATH)
+        self.ttl_sec = ttl_sec or _env_float("LEADER_LEASE_TTL_SEC", DEFAULT_LEASE_TTL_SEC)
+        self.heartbeat_sec = self.ttl_sec / 3.0
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._on_elected: List[Callable[[], None]] = []
+        self._on_demoted: List[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def on_elected(self, callback: Callable[[], None]) -> None:
+        self._on_elected.append(callback)
+
+    def on_demoted(self, callback: Callable[[], None]) -> None:
+        self._on_demoted.append(callback)
+
+    def lease(self) -> Dict[str, Any]:
+        data = load_json_file(self.path, {})
+        return data if isinstance(data, dict) else {}
+
+    def _try_acquire(self) -> bool:
+        now = time.time()
+        with store_lock(self.path):
+            lease = self.lease()
+            holder = lease.get("owner")
+            expired = float(lease.get("expires_at") or 0) <= now
+            if holder and holder != self.owner and not expired:
+                return False
+            save_json_file(
+                self.path,
+                {
+                    "owner": self.owner,
+                    "acquired_at": lease.get("acquired_at") if holder == self.owner else now,
+                    "renewed_at": now,
+                    "expires_at": now + self.ttl_sec,
+                },
+            )
+        return True
+
+    def _acquire(self) -> bool:
+        try:
+            return self._try_acquire()
+        except Exception as exc:
+            # Cannot prove we still hold the lease: step down.
+            logger.warning("LEADER_LEASE_ERROR: %s", exc)
+            return False
+
+    def holds_lease(self) -> bool:
+        """
+        Fencing check: True only if this process is the current, unexpired lease
+        owner right now.
+
+        Work done for the leader re-checks this just before committing, so a
+        leader that was paused past the TTL cannot write after a takeover.
+        Lock-free: lease writes are atomic file replaces, so a read never sees
+        a partial lease.
+        """
+        if not self.is_leader:
+            return False
+        try:
+            lease = self.lease()
+        except Exception as exc:
+            logger.warning("LEADER_LEASE_ERROR: %s", exc)
+            return False
+        return lease.get("owner") == self.owner and float(lease.get("expires_at") or 0) > time.time()
+
+    def _set_leader(self, leader: bool) -> None:
+        if leader == self.is_leader:
+            return
+        self.is_leader = leader
+        if leader:
+            logger.info("LEADER_ELECTED: owner=%s", self.owner)
+        else:
+            logger.warning("LEADER_DEMOTED: owner=%s", self.owner)
+        for callback in self._on_elected if leader else self._on_demoted:
+            try:
+                callback()
+            except Exception:
+                logger.exception("LEADER_CALLBACK_FAILED")
+
+    async def tick(self) -> bool:
+        """
+        One heartbeat: renew or try to take over the lease. Returns leadership.
+        """
+        leader = await asyncio.to_thread(self._acquire)
+        self._set_leader(leader)
+        return leader
+
+    def start(self) -> None:
+        """
+        Run the first election round and keep heartbeating in the background.
+        """
+        if self._task is not None:
+            return
+
+        async def _worker() -> None:
+            while True:
+                await self.tick()
+                await asyncio.sleep(self.heartbeat_sec)
+
+        loop = asyncio.get_event_loop()
+        self._task = loop.create_task(_worker())
+
+    async def stop(self) -> None:
+        """
+        Stop heartbeating; a leader releases the lease so a follower takes over
+        on its next heartbeat instead of waiting for the TTL.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        if not self.is_leader:
+            return
+        try:
+            await asyncio.to_thread(self._release)
+        except Exception as exc:
+            logger.warning("LEADER_LEASE_RELEASE_FAILED: %s", exc)
+        self._set_leader(False)
+
+    def _release(self) -> None:
+        with store_lock(self.path):
+            if self.lease().get("owner") == self.owner:
+                save_json_file(self.path, {"owner": None, "released_at": time.time(), "expires_at": 0})
+
+
+_election: Optional[LeaderElection] = None
+
+
+def get_leader_election() -> LeaderElection:
+    global _election
+    if _election is None:
+        _election = LeaderElection()
+    return _election
+
+
+def is_leader() -> bool:
+    return get_leader_election().is_leader
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import base64
+import bisect
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.core.task_repository import TASK_SORT_COLUMNS, TaskRepository, task_client_id
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+class ListQueryError(ValueError):
+    """
+    Invalid list query parameter (routes answer 400).
+    """
+
+
+# ===========================================================
+# PARAMS
+# ===========================================================
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    """
+    "id,title,status" -> ["id", "title", "status"]; empty -> None (all fields).
+    """
+    if not value:
+        return None
+    fields = [f.strip() for f in value.split(",") if f.strip()]
+    return fields or None
+
+
+def parse_limit(limit: Optional[int]) -> int:
+    if limit is None:
+        return DEFAULT_LIMIT
+    if limit < 1:
+        raise ListQueryError("limit must be >= 1")
+    return min(int(limit), MAX_LIMIT)
+
+
+def project(item: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    if not fields:
+        return item
+    return {f: item.get(f) for f in fields}
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: Optional[str]) -> Dict[str, Any]:
+    """
+    Decode an opaque cursor; it must have been issued for the same sort.
+
+    Shape: "p" store position (int), plus for sorted pages either "k" (sort key
+    [missing flag, value]) and "id", or "v" (sort value or None).
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw.decode("utf-8"))
+    except Exception:
+        raise ListQueryError("Invalid cursor")
+    if not isinstance(payload, dict) or payload.get("s") != (sort or None):
+        raise ListQueryError("Cursor does not match sort")
+
+    def _is_int(value: Any) -> bool:
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    key = payload.get("k")
+    if (
+        not _is_int(payload.get("p"))
+        or (key is not None and not (isinstance(key, list) and len(key) == 2 and _is_int(key[0]) and isinstance(key[1], str)))
+        or not isinstance(payload.get("id", ""), str)
+        or not isinstance(payload.get("v", ""), (str, type(None)))
+    ):
+        raise ListQueryError("Invalid cursor")
+    return payload
+
+
+# ===========================================================
+# FILTERS
+# ===========================================================
+def item_client(item: Dict[str, Any]) -> Optional[str]:
+    cid = item.get("client_code")
+    if cid is None:
+        return task_client_id(item)
+    return str(cid)
+
+
+def item_deadline(item: Dict[str, Any]) -> Optional[str]:
+    value = item.get("deadline") or item.get("due_date")
+    return str(value) if value else None
+
+
+def make_filter(
+    *,
+    client: Optional[str] = None,
+    status: Optional[str] = None,
+    period: Optional[str] = None,
+    deadline_from: Optional[str] = None,
+    deadline_before: Optional[str] = None,
+) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """
+    Predicate for the common filters (None when no filter is set).
+    Deadlines compare as ISO strings: from inclusive, before exclusive.
+    """
+    if client is None and status is None and period is None and deadline_from is None and deadline_before is None:
+        return None
+
+    def _match(item: Dict[str, Any]) -> bool:
+        if client is not None and item_client(item) != str(client):
+            return False
+        if status is not None and str(item.get("status") or "") != status:
+            return False
+        if period is not None and str(item.get("period") or "") != period:
+            return False
+        if deadline_from is not None or deadline_before is not None:
+            dl = item_deadline(item)
+            if dl is None:
+                return False
+            if deadline_from is not None and dl < deadline_from:
+                return False
+            if deadline_before is not None and dl >= deadline_before:
+                return False
+        return True
+
+    return _match
+
+
+# ===========================================================
+# PAGING
+# ===========================================================
+def _sort_key(item: Dict[str, Any], field: str) -> Tuple[int, str]:
+    # Missing values go last; everything compares as text (ISO dates sort correctly).
+    value = item.get(field)
+    return (1, "") if value is None or value == "" else (0, str(value))
+
+
+def paginate(
+    items: Sequence[Dict[str, Any]],
+    *,
+    positions: Optional[Sequence[int]] = None,
+    match: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Filter, sort and cut one page of in-memory items.
+
+    positions: ascending positions of the candidate items (from an index);
+    None for all items. match is still applied to every candidate.
+    sort: field name, "-field" for descending, None for store order.
+    Cursors are keyset positions (sort value + id, or store position), so pages
+    stay consistent when items are appended between requests.
+
+    In store order the walk starts at the cursor and stops once the page is
+    full. Sorted pages sort all matching candidates.
+
+    Without limit and cursor all matching items are returned (one page).
+
+    Returns {"items": [...], "next_cursor": str | None}.
+    """
+    size: Optional[int] = None if limit is None and cursor is None else parse_limit(limit)
+    after = decode_cursor(cursor, sort) if cursor else None
+
+    candidates: Sequence[int] = range(len(items)) if positions is None else positions
+
+    def _matches(item: Any) -> bool:
+        return isinstance(item, dict) and (match is None or match(item))
+
+    if not sort:
+        start = 0
+        if after is not None:
+            start = bisect.bisect_right(candidates, after["p"])
+        page: List[Tuple[int, Dict[str, Any]]] = []
+        for i in range(start, len(candidates)):
+            item = items[candidates[i]]
+            if not _matches(item):
+                continue
+            page.append((candidates[i], item))
+            if size is not None and len(page) > size:
+                break
+        next_cursor = None
+        if size is not None and len(page) > size:
+            page = page[:size]
+            next_cursor = encode_cursor({"s": None, "p": page[-1][0]})
+        return {"items": [project(item, fields) for _, item in page], "next_cursor": next_cursor}
+
+    rows = [(pos, item) for pos in candidates for item in (items[pos],) if _matches(item)]
+    desc = sort.startswith("-")
+    field = sort.lstrip("-")
+
+    def _key(row: Tuple[int, Dict[str, Any]]) -> Tuple[Tuple[int, str], str, int]:
+        return (_sort_key(row[1], field), str(row[1].get("id") or ""), row[0])
+
+    rows.sort(key=_key, reverse=desc)
+    keys = [_key(row) for row in rows]
+
+    start = 0
+    if after is not None:
+        mark = (tuple(after.get("k") or (1, "")), str(after.get("id") or ""), after["p"])
+        if desc:
+            # keys are descending: first index with key < mark
+            lo, hi = 0, len(keys)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if keys[mid] < mark:
+                    hi = mid
+                else:
+                    lo = mid + 1
+            start = lo
+        else:
+            start = bisect.bisect_right(keys, mark)
+
+    page = rows[start:] if size is None else rows[start:start + size + 1]
+    next_cursor = None
+    if size is not None and len(page) > size:
+        page = page[:size]
+        k, item_id, pos = _key(page[-1])
+        next_cursor = encode_cursor({"s": sort, "k": list(k), "id": item_id, "p": pos})
+    return {"items": [project(item, fields) for _, item in page], "next_cursor": next_cursor}
+
+
+def paginate_tasks(
+    repo: TaskRepository,
+    *,
+    client: Optional[str] = None,
+    status: Optional[str] = None,
+    deadline_from: Optional[str] = None,
+    deadline_before: Optional[str] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Task pages: store order goes through TaskRepository.page_tasks and sorts on
+    TASK_SORT_COLUMNS through TaskRepository.page_tasks_sorted (indexes / SQLite
+    keyset); other sort keys sort the filtered tasks in memory.
+    """
+    field = (sort or "").lstrip("-")
+    if (sort and field not in TASK_SORT_COLUMNS) or (limit is None and cursor is None):
+        tasks = repo.list_tasks(
+            client_id=client,
+            status=status,
+            deadline_from=deadline_from,
+            deadline_before=deadline_before,
+        )
+        return paginate(tasks, sort=sort, limit=limit, cursor=cursor, fields=fields)
+
+    size = parse_limit(limit)
+    after = decode_cursor(cursor, sort) if cursor else None
+    if sort:
+        tasks, position = repo.page_tasks_sorted(
+            field,
+            descending=sort.startswith("-"),
+            client_id=client,
+            status=status,
+            deadline_from=deadline_from,
+            deadline_before=deadline_before,
+            after=(after.get("v"), after["p"]) if after is not None else None,
+            limit=size,
+        )
+        return {
+            "items": [project(t, fields) for t in tasks],
+            "next_cursor": encode_cursor({"s": sort, "v": position[0], "p": position[1]}) if position else None,
+        }
+
+    tasks, last = repo.page_tasks(
+        client_id=client,
+        status=status,
+        deadline_from=deadline_from,
+        deadline_before=deadline_before,
+        after=after["p"] if after is not None else None,
+        limit=size,
+    )
+    return {
+        "items": [project(t, fields) for t in tasks],
+        "next_cursor": encode_cursor({"s": None, "p": last}) if last is not None else None,
+    }
+
+
+def list_response(page: Dict[str, Any], paged: bool) -> Any:
+    """
+    Paged requests (limit / cursor given) get {"items", "next_cursor"};
+    others keep the plain list response of the endpoint.
+    """
+    return page if paged else page["items"]
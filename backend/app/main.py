@@ -19,8 +19,12 @@ from app.routes_internal_client_profiles_store_v3 import router as client_profil
 # === PROCESS INSTANCES V2 ===
 from app.routes_process_instances_v2 import router as process_instances_v2_router
 
+# === DAY DASHBOARD ===
+from app.routes_internal_dashboard import router as dashboard_router
+
 # === OTHER ROUTERS ===
 from app.routes_internal_process_chains_dev import router as dev_chains_router
+from app.routes_process_chains_reglement import router as reglement_chains_router
 from app.routes_control_events_api import router as control_events_router
 from app.routes_onboarding_api import router as onboarding_router
 
@@ -28,7 +32,12 @@ from app.routes_onboarding_api import router as onboarding_router
 from app.routes.risk_api import router as risk_router
 from app.routes.coverage_api import router as coverage_router
 
+# === LIFECYCLE ===
+from app.startup_events import register_shutdown_events, register_startup_events
+
 app = FastAPI(title="ERPv2 API")
+register_startup_events(app)
+register_shutdown_events(app)
 
 app.include_router(control_events_store_router)
 app.include_router(control_events_store_stub_router)
@@ -54,11 +63,13 @@ app.include_router(reglement_defs_router)
 app.include_router(client_profiles_store_v3_router)
 app.include_router(client_profiles_router)
 app.include_router(process_instances_v2_router)
+app.include_router(dashboard_router)
 
 # --- system ---
 app.include_router(control_events_router)
 app.include_router(onboarding_router)
 app.include_router(dev_chains_router)
+app.include_router(reglement_chains_router)
 
 # --- analytics ---
 app.include_router(risk_router)
@@ -1,9 +1,12 @@
-﻿import json
+﻿import copy
 import threading
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.store_json import load_json_file, save_json_file
+from app.core.store_locks import store_lock
 
 
 _LOCK = threading.Lock()
@@ -20,19 +23,21 @@ def _get_store_path() -> Path:
 
 def _ensure_store_file(path: Path) -> None:
     if not path.exists():
-        path.write_text("[]", encoding="utf-8")
+        save_json_file(path, [])
+
 
+def _load_instances(path: Path, for_update: bool = False) -> List[Dict[str, Any]]:
+    """
+    Load instances through the shared store cache.
 
-def _load_instances(path: Path) -> List[Dict[str, Any]]:
+    The returned list is shared; for_update=True returns a private deep copy.
+    """
     _ensure_store_file(path)
-    text = path.read_text(encoding="utf-8").strip()
-    if not text:
-        return []
     try:
-        data = json.loads(text)
-    except json.JSONDecodeError:
+        data = load_json_file(path, [], copy_result=for_update, strict=True)
+    except ValueError:
         backup_path = path.with_suffix(".bak")
-        backup_path.write_text(text, encoding="utf-8")
+        backup_path.write_bytes(path.read_bytes())
         data = []
     if isinstance(data, list):
         return data
@@ -40,21 +45,77 @@ def _load_instances(path: Path) -> List[Dict[str, Any]]:
 
 
 def _save_instances(path: Path, instances: List[Dict[str, Any]]) -> None:
-    tmp = path.with_suffix(".tmp")
-    tmp.write_text(json.dumps(instances, ensure_ascii=False, indent=2), encoding="utf-8")
-    tmp.replace(path)
+    save_json_file(path, instances)
 
 
 def _make_key(client_id: str, profile_code: str, period: str) -> str:
     return f"{client_id}::{profile_code}::{period}"
 
 
+# Secondary indexes over the cached instances list (positions in that list):
+#   by_id:            id -> position
+#   by_key:           key -> position
+#   by_client:        client_id -> [positions]
+#   by_client_period: (client_id, period) -> [positions]
+#   by_client_code:   client_code (client_id when empty) -> [positions]
+# "source" is the list the indexes were built from; the store cache hands out a new
+# list object only when the file changed, so indexes are rebuilt only then.
+_INDEXES: Dict[str, Any] = {"source": None}
+
+
+def _norm(value: Any) -> str:
+    return str(value or "").strip()
+
+
+def _index_instance(indexes: Dict[str, Any], pos: int, inst: Dict[str, Any]) -> None:
+    indexes["by_id"].setdefault(inst.get("id"), pos)
+    indexes["by_key"].setdefault(inst.get("key"), pos)
+    client = _norm(inst.get("client_id"))
+    indexes["by_client"].setdefault(client, []).append(pos)
+    indexes["by_client_period"].setdefault((client, _norm(inst.get("period"))), []).append(pos)
+    indexes["by_client_code"].setdefault(_norm(inst.get("client_code") or inst.get("client_id")), []).append(pos)
+
+
+def _get_indexes(path: Path) -> Dict[str, Any]:
+    """
+    Return indexes for the current store content. Must be called under _LOCK.
+    """
+    instances = _load_instances(path)
+    if _INDEXES["source"] is not instances:
+        _INDEXES.clear()
+        _INDEXES.update(
+            source=instances, by_id={}, by_key={}, by_client={}, by_client_period={}, by_client_code={}
+        )
+        for pos, inst in enumerate(instances):
+            if isinstance(inst, dict):
+                _index_instance(_INDEXES, pos, inst)
+    return _INDEXES
+
+
+def _commit_instances(
+    path: Path,
+    instances: List[Dict[str, Any]],
+    indexes: Dict[str, Any],
+    appended: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Save instances and carry indexes over to the saved list.
+
+    Only in-place replacements (same id/key/client/period) and a single append are
+    supported, so existing positions stay valid.
+    """
+    _save_instances(path, instances)
+    if appended is not None:
+        _index_instance(indexes, len(instances) - 1, appended)
+    indexes["source"] = instances
+
+
 def get_all_instances() -> List[Dict[str, Any]]:
     """
     Return all process instances from the JSON store.
     """
     path = _get_store_path()
-    with _LOCK:
+    with store_lock(path, shared=True), _LOCK:
         return _load_instances(path)
 
 
@@ -63,11 +124,11 @@ def find_instance_by_id(instance_id: str) -> Optional[Dict[str, Any]]:
     Find a process instance by its id.
     """
     path = _get_store_path()
-    with _LOCK:
-        instances = _load_instances(path)
-        for inst in instances:
-            if inst.get("id") == instance_id:
-                return inst
+    with store_lock(path, shared=True), _LOCK:
+        indexes = _get_indexes(path)
+        pos = indexes["by_id"].get(instance_id)
+        if pos is not None:
+            return copy.deepcopy(indexes["source"][pos])
     return None
 
 
@@ -81,11 +142,11 @@ def find_instance_for_event(
     """
     key = _make_key(client_id, profile_code, period)
     path = _get_store_path()
-    with _LOCK:
-        instances = _load_instances(path)
-        for inst in instances:
-            if inst.get("key") == key:
-                return inst
+    with store_lock(path, shared=True), _LOCK:
+        indexes = _get_indexes(path)
+        pos = indexes["by_key"].get(key)
+        if pos is not None:
+            return copy.deepcopy(indexes["source"][pos])
     return None
 
 
@@ -99,26 +160,29 @@ def list_instances_for_client(
     If period is provided (exact match), only instances with this period are returned.
     """
     path = _get_store_path()
-    with _LOCK:
-        instances = _load_instances(path)
-
     client_id_str = str(client_id).strip()
 
-    client_filtered: List[Dict[str, Any]] = [
-        inst
-        for inst in instances
-        if str(inst.get("client_id") or "").strip() == client_id_str
-    ]
+    with store_lock(path, shared=True), _LOCK:
+        indexes = _get_indexes(path)
+        instances = indexes["source"]
+        if period is None:
+            positions = indexes["by_client"].get(client_id_str, [])
+        else:
+            positions = indexes["by_client_period"].get((client_id_str, str(period).strip()), [])
+        return [instances[pos] for pos in positions]
 
-    if period is None:
-        return client_filtered
 
-    period_str = str(period).strip()
-    return [
-        inst
-        for inst in client_filtered
-        if str(inst.get("period") or "").strip() == period_str
-    ]
+def instance_positions_for_client_code(client_code: str) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    Return (instances list, ascending positions of the client's instances in it)
+    for read-only listings; the client is client_code, or client_id when empty.
+
+    The list is the shared store snapshot: do not modify it or its instances.
+    """
+    path = _get_store_path()
+    with store_lock(path, shared=True), _LOCK:
+        indexes = _get_indexes(path)
+        return indexes["source"], list(indexes["by_client_code"].get(_norm(client_code), []))
 
 
 def upsert_instance_from_event(event: Dict[str, Any]) -> Dict[str, Any]:
@@ -143,17 +207,14 @@ def upsert_instance_from_event(event: Dict[str, Any]) -> Dict[str, Any]:
     path = _get_store_path()
     now_iso = datetime.utcnow().isoformat() + "Z"
 
-    with _LOCK:
-        instances = _load_instances(path)
+    with store_lock(path), _LOCK:
+        indexes = _get_indexes(path)
+        instances = list(indexes["source"])
+        pos = indexes["by_key"].get(key)
+        appended: Optional[Dict[str, Any]] = None
 
-        instance: Optional[Dict[str, Any]] = None
-        for item in instances:
-            if item.get("key") == key:
-                instance = item
-                break
-
-        if instance is None:
-            instance = {
+        if pos is None:
+            instance: Dict[str, Any] = {
                 "id": str(uuid.uuid4()),
                 "key": key,
                 "client_id": client_id,
@@ -168,6 +229,11 @@ def upsert_instance_from_event(event: Dict[str, Any]) -> Dict[str, Any]:
                 "updated_at": now_iso,
             }
             instances.append(instance)
+            appended = instance
+        else:
+            # Copy-on-write: the cached instance is shared with readers.
+            instance = copy.deepcopy(instances[pos])
+            instances[pos] = instance
 
         if event_id and event_id not in instance["events"]:
             instance["events"].append(event_id)
@@ -177,7 +243,7 @@ def upsert_instance_from_event(event: Dict[str, Any]) -> Dict[str, Any]:
 
         instance["updated_at"] = now_iso
 
-        _save_instances(path, instances)
+        _commit_instances(path, instances, indexes, appended)
 
     return instance
 
@@ -189,37 +255,39 @@ def _save_back_instance(instance: Dict[str, Any]) -> None:
     path = _get_store_path()
     now = datetime.utcnow().isoformat() + "Z"
 
-    with _LOCK:
-        items = _load_instances(path)
-        for idx, it in enumerate(items):
-            if it.get("id") == instance.get("id"):
-                instance["updated_at"] = now
-                items[idx] = instance
-                break
-        _save_instances(path, items)
+    with store_lock(path), _LOCK:
+        indexes = _get_indexes(path)
+        items = list(indexes["source"])
+        pos = indexes["by_id"].get(instance.get("id"))
+        if pos is not None:
+            instance["updated_at"] = now
+            items[pos] = instance
+        _commit_instances(path, items, indexes)
 
 
 def add_step(instance_id: str, title: str) -> Dict[str, Any]:
     """
     Add a new pending step to the process instance.
     """
-    inst = find_instance_by_id(instance_id)
-    if inst is None:
-        raise ValueError(f"Process instance not found: {instance_id}")
-
-    if "steps" not in inst or not isinstance(inst["steps"], list):
-        inst["steps"] = []
-
-    step = {
-        "id": str(uuid.uuid4()),
-        "title": title,
-        "status": "pending",
-        "created_at": datetime.utcnow().isoformat() + "Z",
-        "completed_at": None,
-    }
-
-    inst["steps"].append(step)
-    _save_back_instance(inst)
+    # Exclusive across read-modify-write: other workers must not interleave.
+    with store_lock(_get_store_path()):
+        inst = find_instance_by_id(instance_id)
+        if inst is None:
+            raise ValueError(f"Process instance not found: {instance_id}")
+
+        if "steps" not in inst or not isinstance(inst["steps"], list):
+            inst["steps"] = []
+
+        step = {
+            "id": str(uuid.uuid4()),
+            "title": title,
+            "status": "pending",
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "completed_at": None,
+        }
+
+        inst["steps"].append(step)
+        _save_back_instance(inst)
 
     return step
 
@@ -228,25 +296,27 @@ def complete_step(instance_id: str, step_id: str) -> Dict[str, Any]:
     """
     Mark selected step as completed and, if all steps are done, set instance.status = "completed".
     """
-    inst = find_instance_by_id(instance_id)
-    if inst is None:
-        raise ValueError(f"Process instance not found: {instance_id}")
+    with store_lock(_get_store_path()):
+        inst = find_instance_by_id(instance_id)
+        if inst is None:
+            raise ValueError(f"Process instance not found: {instance_id}")
+
+        steps = inst.get("steps") or []
+        target = None
+        for st in steps:
+            if st.get("id") == step_id:
+                target = st
+                break
 
-    steps = inst.get("steps") or []
-    target = None
-    for st in steps:
-        if st.get("id") == step_id:
-            target = st
-            break
+        if target is None:
+            raise ValueError(f"Step not found: {step_id}")
 
-    if target is None:
-        raise ValueError(f"Step not found: {step_id}")
+        target["status"] = "completed"
+        target["completed_at"] = datetime.utcnow().isoformat() + "Z"
 
-    target["status"] = "completed"
-    target["completed_at"] = datetime.utcnow().isoformat() + "Z"
+        if steps and all(st.get("status") == "completed" for st in steps):
+            inst["status"] = "completed"
 
-    if steps and all(st.get("status") == "completed" for st in steps):
-        inst["status"] = "completed"
+        _save_back_instance(inst)
 
-    _save_back_instance(inst)
     return target
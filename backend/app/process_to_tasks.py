@@ -3,10 +3,10 @@ import logging
 from datetime import datetime
 from typing import List, Dict, Any
 
-from app.core.store_json import load_json_store, save_json_store
+from app.core.store_json import load_json_store
+from app.core.task_repository import get_task_repository
 
 INSTANCES_PATH = "process_instances_store.json"
-TASKS_PATH = "tasks_store.json"
 
 
 def load_instances() -> Dict[str, Any]:
@@ -17,17 +17,6 @@ def load_instances() -> Dict[str, Any]:
         return {"instances": []}
 
 
-def load_tasks() -> Dict[str, Any]:
-    try:
-        return load_json_store(TASKS_PATH)
-    except Exception:
-        return {"tasks": []}
-
-
-def save_tasks(data: Dict[str, Any]):
-    save_json_store(TASKS_PATH, data)
-
-
 def generate_tasks_from_process(client_code: str, year: int, month: int) -> Dict[str, Any]:
     instances = load_instances().get("instances", [])
     period_key = f"{year:04d}-{month:02d}"
@@ -41,10 +30,7 @@ def generate_tasks_from_process(client_code: str, year: int, month: int) -> Dict
         return {"created": 0, "period": period_key, "client": client_code}
 
     steps: List[Dict[str, Any]] = matched[0].get("steps", [])
-    tasks_store = load_tasks()
-    tasks = tasks_store.get("tasks", [])
-
-    created_count = 0
+    tasks: List[Dict[str, Any]] = []
 
     for step in steps:
         title = step.get("title", "Untitled step")
@@ -64,10 +50,9 @@ def generate_tasks_from_process(client_code: str, year: int, month: int) -> Dict
         }
 
         tasks.append(new_task)
-        created_count += 1
 
-    tasks_store["tasks"] = tasks
-    save_tasks(tasks_store)
+    # Task store backend (JSON file or SQLite) is selected by the repository.
+    created_count = len(get_task_repository().add_tasks_if_absent(tasks))
 
     return {
         "client": client_code,
@@ -1,7 +1,8 @@
 ﻿from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from .chain_registry import register_chain
 from .control_event_adapter import create_control_event_from_chain
@@ -47,6 +48,7 @@ def _maybe_trigger_tasks_for_instance(
     Step B1:
       - If context contains process_instance_id, call generate-tasks for this instance.
       - If not, do nothing (only log).
+    Generation runs in the in-process worker pool; its result is logged for the chain.
     """
     instance_id = _extract_instance_id(context)
     if not instance_id:
@@ -63,10 +65,26 @@ def _maybe_trigger_tasks_for_instance(
         "profile_code": profile_code,
     }
 
-    trigger_generate_tasks_from_chain(
+    future = trigger_generate_tasks_from_chain(
         process_instance_id=instance_id,
         payload=payload,
     )
+    if future is None:
+        # Batched (ChainExecutor.run_chains reports results) or generated inline.
+        return
+
+    def _report(done: "asyncio.Future[List[Dict[str, Any]]]") -> None:
+        if done.cancelled() or done.exception() is not None:
+            return
+        for result in done.result():
+            logger.info(
+                "Reglament chain %s: generate-tasks instance_id=%s status=%s",
+                chain_id,
+                result.get("instance_id"),
+                result.get("status"),
+            )
+
+    future.add_done_callback(_report)
 
 
 async def _chain_ip_usn_dr_monthly(
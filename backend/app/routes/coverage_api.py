@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Query
 from typing import Any, Dict, List
 
-from app.routes_internal_tasks import list_tasks_internal
+from app.core.task_repository import get_task_repository
 
 router = APIRouter(prefix="/api/coverage", tags=["coverage"])
 
@@ -25,7 +25,8 @@ def _normalize_client_id(t: Dict[str, Any]) -> str | None:
 @router.get("/summary")
 def coverage_summary(period: str = Query("30d"), client_id: str | None = Query(None)):
     try:
-        raw = list_tasks_internal()
+        # Narrow by client via repository index; exact client_id check stays below.
+        raw = get_task_repository().list_tasks(client_id=client_id or None)
         tasks: List[Dict[str, Any]] = []
         if isinstance(raw, list):
             for x in raw:
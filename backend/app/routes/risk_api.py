@@ -5,7 +5,7 @@ from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Query
 
-from app.routes_internal_tasks import list_tasks_internal
+from app.core.task_repository import get_task_repository
 
 router = APIRouter(prefix="/api/risk", tags=["risk"])
 
@@ -115,7 +115,8 @@ def _calc_simple_risk(tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
 @router.get("/summary")
 def risk_summary(client_id: str | None = Query(None)):
     try:
-        raw = list_tasks_internal()
+        # Narrow by client via repository index; exact client_id check stays below.
+        raw = get_task_repository().list_tasks(client_id=client_id or None)
         tasks: List[Dict[str, Any]] = []
         if isinstance(raw, list):
             for x in raw:
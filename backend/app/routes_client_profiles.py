@@ -4,7 +4,9 @@ import logging
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from app.core.http_cache import conditional_get
 
 logger = logging.getLogger(__name__)
 
@@ -72,7 +74,10 @@ def _make_profile(payload: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 @router.get("/client-profiles")
-def list_client_profiles() -> List[Dict[str, Any]]:
+def list_client_profiles(request: Request, response: Response) -> Any:
+    cached = conditional_get(request, response, [STORE_PATH])
+    if cached is not None:
+        return cached
     raw = _load_json_safe(STORE_PATH, [])
     return _normalize_store(raw)
 
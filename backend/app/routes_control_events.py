@@ -1,10 +1,13 @@
-﻿import json
-from datetime import datetime
+﻿from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List
 
 from fastapi import APIRouter, HTTPException, Query
 
+from app.core.control_event_index import get_event_index
+from app.core.store_json import load_json_file, save_json_file
+from app.core.store_locks import store_lock
+
 CONTROL_EVENTS_STORE_NAME = "control_events_store.json"
 CLIENT_PROFILES_STORE_NAME = "client_profiles_store.json"
 
@@ -19,23 +22,11 @@ router = APIRouter(
 
 
 def _load_json(path: Path, default: Any) -> Any:
-    if not path.exists():
-        return default
-    try:
-        raw = path.read_text(encoding="utf-8-sig")
-    except Exception:
-        raw = path.read_text(encoding="utf-8")
-    try:
-        return json.loads(raw)
-    except Exception:
-        return default
+    return load_json_file(path, default)
 
 
 def _save_json(path: Path, data: Any) -> None:
-    path.write_text(
-        json.dumps(data, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    save_json_file(path, data)
 
 
 def _load_events_store() -> Dict[str, Any]:
@@ -115,52 +106,48 @@ def generate_events_for_client(
     if not profile:
         raise HTTPException(status_code=404, detail="Unknown client")
 
-    store = _load_events_store()
-    events = store.get("events", [])
-    period = f"{year:04d}-{month:02d}"
+    with store_lock(EVENTS_PATH):
+        store = dict(_load_events_store())
+        period = f"{year:04d}-{month:02d}"
+
+        if get_event_index(store.get("events")).has_client_period(client_code, period):
+            return {"created": 0, "period": period, "client": client_code}
+
+        events = list(store.get("events", []))
+
+        now_iso = datetime.utcnow().isoformat() + "Z"
+        base_types: List[str] = []
+
+        profile_type = profile.get("profile_type")
+        has_salary = bool(profile.get("has_salary"))
+        has_tourist_tax = bool(profile.get("has_tourist_tax"))
+
+        base_types.extend(["bank_statement", "document_request"])
+
+        if profile_type == "usn_dr":
+            base_types.append("usn_advance")
+
+        if has_salary:
+            base_types.extend(["salary", "ndfl", "insurance"])
+
+        if has_tourist_tax:
+            base_types.append("tourist_tax")
+
+        created = 0
+        for ev_type in base_types:
+            ev = {
+                "id": f"evt-{ev_type}-{client_code}-{period}",
+                "client_code": client_code,
+                "period": period,
+                "type": ev_type,
+                "label": ev_type.replace("_", " ").title(),
+                "status": "new",
+                "created_at": now_iso,
+            }
+            events.append(ev)
+            created += 1
 
-    existing = [
-        e
-        for e in events
-        if (e.get("client_code") or e.get("client_id")) == client_code
-        and e.get("period") == period
-    ]
-    if existing:
-        return {"created": 0, "period": period, "client": client_code}
-
-    now_iso = datetime.utcnow().isoformat() + "Z"
-    base_types: List[str] = []
-
-    profile_type = profile.get("profile_type")
-    has_salary = bool(profile.get("has_salary"))
-    has_tourist_tax = bool(profile.get("has_tourist_tax"))
-
-    base_types.extend(["bank_statement", "document_request"])
-
-    if profile_type == "usn_dr":
-        base_types.append("usn_advance")
-
-    if has_salary:
-        base_types.extend(["salary", "ndfl", "insurance"])
-
-    if has_tourist_tax:
-        base_types.append("tourist_tax")
-
-    created = 0
-    for ev_type in base_types:
-        ev = {
-            "id": f"evt-{ev_type}-{client_code}-{period}",
-            "client_code": client_code,
-            "period": period,
-            "type": ev_type,
-            "label": ev_type.replace("_", " ").title(),
-            "status": "new",
-            "created_at": now_iso,
-        }
-        events.append(ev)
-        created += 1
-
-    store["events"] = events
-    _save_events_store(store)
+        store["events"] = events
+        _save_events_store(store)
 
     return {"created": created, "period": period, "client": client_code}
@@ -6,12 +6,13 @@ from typing import Any, Dict, List
 
 from fastapi import APIRouter
 
+from app.core.control_event_store import list_all_events
+
 router = APIRouter(prefix="/api/internal", tags=["internal-aliases-v2"])
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 
 PROCESS_INSTANCES_STORE = BASE_DIR / "process_instances_store.json"
-CONTROL_EVENTS_STORE = BASE_DIR / "control_events_store.json"
 
 
 def _read_json_file(path: Path, default: Any) -> Any:
@@ -50,5 +51,6 @@ def list_process_instances_v2() -> List[Dict[str, Any]]:
 @router.get("/control-events-store-v2", summary="Control events store v2 (alias)")
 @router.get("/control-events-store-v2/", summary="Control events store v2 (alias, slash)")
 def get_control_events_store() -> Any:
-    # Return raw payload to preserve structure expected by UI
-    return _read_json_file(CONTROL_EVENTS_STORE, default=[])
+    # Through the store: includes journaled events not yet compacted into the file.
+    # The UI accepts a plain list as well as {"events": [...]}.
+    return list_all_events()
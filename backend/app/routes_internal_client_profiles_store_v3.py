@@ -1,11 +1,14 @@
 from __future__ import annotations
 
-import json
 import os
 from datetime import datetime
 from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, Body, HTTPException
+from fastapi import APIRouter, Body, HTTPException, Request, Response
+
+from app.core.http_cache import conditional_get
+from app.core.store_json import load_json_file, save_json_file
+from app.core.store_locks import store_lock
 
 router = APIRouter(prefix="/api/internal/client-profiles", tags=["internal_client_profiles"])
 
@@ -23,28 +26,19 @@ def _ensure_dir() -> None:
 
 def _load_store() -> Dict[str, Dict[str, Any]]:
     _ensure_dir()
-    if not os.path.exists(STORE_FILE):
-        return {}
-    try:
-        with open(STORE_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if isinstance(data, dict):
-            out: Dict[str, Dict[str, Any]] = {}
-            for k, v in data.items():
-                if isinstance(k, str) and isinstance(v, dict):
-                    out[k] = v
-            return out
-    except Exception:
-        return {}
+    data = load_json_file(STORE_FILE, {})
+    if isinstance(data, dict):
+        out: Dict[str, Dict[str, Any]] = {}
+        for k, v in data.items():
+            if isinstance(k, str) and isinstance(v, dict):
+                out[k] = v
+        return out
     return {}
 
 
 def _save_store(store: Dict[str, Dict[str, Any]]) -> None:
     _ensure_dir()
-    tmp = STORE_FILE + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(store, f, ensure_ascii=False, indent=2, sort_keys=True)
-    os.replace(tmp, STORE_FILE)
+    save_json_file(STORE_FILE, store, sort_keys=True)
 
 
 def _normalize_code(code: str) -> str:
@@ -106,12 +100,15 @@ def _merge_profile(base: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any
 
 
 @router.get("/{client_code}")
-def get_client_profile(client_code: str):
+def get_client_profile(client_code: str, request: Request, response: Response):
     code = _normalize_code(client_code)
     if not code:
         raise HTTPException(status_code=400, detail="client_code is required")
+    cached = conditional_get(request, response, [STORE_FILE], salt=code)
+    if cached is not None:
+        return cached
     store = _load_store()
-    prof = store.get(code) or _default_profile(code)
+    prof = dict(store.get(code) or _default_profile(code))
 
     # Ensure required identity fields
     prof["client_code"] = code
@@ -129,22 +126,23 @@ def put_client_profile(client_code: str, body: Dict[str, Any] = Body(default={})
     if not code:
         raise HTTPException(status_code=400, detail="client_code is required")
 
-    store = _load_store()
-    cur = store.get(code) or _default_profile(code)
-
     # If body provides a different client_code, ignore it and use path param
     body = dict(body or {})
     body.pop("client_code", None)
     body.pop("id", None)
     body.pop("code", None)
 
-    nxt = _merge_profile(cur, body)
-    nxt["client_code"] = code
-    nxt["id"] = code
-    nxt["code"] = code
-    if not nxt.get("label"):
-        nxt["label"] = code
+    with store_lock(STORE_FILE):
+        store = _load_store()
+        cur = store.get(code) or _default_profile(code)
+
+        nxt = _merge_profile(cur, body)
+        nxt["client_code"] = code
+        nxt["id"] = code
+        nxt["code"] = code
+        if not nxt.get("label"):
+            nxt["label"] = code
 
-    store[code] = nxt
-    _save_store(store)
+        store[code] = nxt
+        _save_store(store)
     return nxt
@@ -4,10 +4,14 @@ import json
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from datetime import datetime
 
+from app.core.control_event_index import get_event_index
+from app.core.control_event_store import get_events_snapshot
+from app.core.list_query import ListQueryError, list_response, make_filter, paginate, parse_fields
+
 router = APIRouter(prefix="/api/internal/control-events", tags=["internal-control-events"])
 
 # We assume control_events_store.json is located in the project root (next to app/)
@@ -90,9 +94,40 @@ def _find_event_by_id(events: List[Dict[str, Any]], event_id: str) -> Optional[D
 
 
 @router.get("/", summary="List all control events (internal view)")
-def list_control_events() -> List[Dict[str, Any]]:
-  events, _, _ = _load_events_store()
-  return events
+def list_control_events(
+  client: Optional[str] = Query(None, description="client_code / client_id"),
+  status: Optional[str] = Query(None),
+  period: Optional[str] = Query(None),
+  deadline_from: Optional[str] = Query(None),
+  deadline_before: Optional[str] = Query(None),
+  sort: Optional[str] = Query(None),
+  limit: Optional[int] = Query(None, ge=1),
+  cursor: Optional[str] = Query(None),
+  fields: Optional[str] = Query(None),
+) -> Any:
+  # Cached store view (no re-parse per request); a client filter narrows the
+  # walk to that client's events through the control-event index.
+  events = get_events_snapshot()
+  positions = get_event_index(events).positions(client, period) if client is not None else None
+  try:
+    page = paginate(
+      events,
+      positions=positions,
+      match=make_filter(
+        client=client,
+        status=status,
+        period=period,
+        deadline_from=deadline_from,
+        deadline_before=deadline_before,
+      ),
+      sort=sort,
+      limit=limit,
+      cursor=cursor,
+      fields=parse_fields(fields),
+    )
+  except ListQueryError as exc:
+    raise HTTPException(status_code=400, detail=str(exc))
+  return list_response(page, limit is not None or cursor is not None)
 
 
 @router.get("/{event_id}", summary="Get single control event by id")
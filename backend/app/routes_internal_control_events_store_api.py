@@ -1,6 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 from typing import Any, Dict, List
 
+from app.core.http_cache import conditional_get
+
 router = APIRouter(prefix="/api/internal", tags=["internal"])
 
 
@@ -18,5 +20,9 @@ def _payload() -> Dict[str, Any]:
 @router.get("/control-events-store/")
 @router.get("/control-events-store-v2")
 @router.get("/control-events-store-v2/")
-def get_control_events_store() -> Dict[str, Any]:
+def get_control_events_store(request: Request, response: Response) -> Any:
+    # Constant payload: the ETag only depends on the payload revision.
+    cached = conditional_get(request, response, [], salt="stub-1")
+    if cached is not None:
+        return cached
     return _payload()
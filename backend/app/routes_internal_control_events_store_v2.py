@@ -7,6 +7,8 @@ from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter
 
+from app.core.control_event_store import list_all_events
+
 router = APIRouter(
   prefix="/api/internal/control-events-store-v2",
   tags=["internal-control-events-store-v2"],
@@ -80,10 +82,14 @@ def _collect_event_like_dicts(data: Any) -> List[Dict[str, Any]]:
 
 def _load_events() -> List[Dict[str, Any]]:
   """
-  Prefer strict real format:
-      { "events": [ {...}, {...} ] }
-  Fallback: recursive scan for event-like dicts.
+  Prefer the control event store (list or { "events": [...] }, plus the journal).
+  Fallback: recursive scan for event-like dicts in the store file.
   """
+  events = [e for e in list_all_events() if isinstance(e, dict)]
+  if events:
+    logger.info("CONTROL_EVENTS_V2: store events -> %d events", len(events))
+    return events
+
   store_path = _find_store_file("control_events_store.json")
   data = _load_json(store_path)
   if data is None:
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.core.process_instances_store import get_all_instances
+from app.core.task_repository import get_task_repository, task_client_id
+
+router = APIRouter(prefix="/api/internal/dashboard", tags=["internal-dashboard"])
+
+# Items returned per block (the rest is only counted).
+OVERDUE_LIMIT = 8
+TODAY_LIMIT = 10
+UPCOMING_LIMIT = 10
+PROCESS_ATTENTION_LIMIT = 10
+
+# Task fields the day dashboard displays.
+TASK_FIELDS = ("id", "title", "status", "priority", "deadline", "client_code", "client_label")
+
+_DONE_STATUSES = {"done"}
+_PROCESS_DONE_STATUSES = {"done", "completed", "closed"}
+
+
+def _parse_day(value: Optional[str]) -> date:
+    if not value:
+        return date.today()
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date, expected YYYY-MM-DD")
+
+
+def _is_legacy_urgent(task: Dict[str, Any]) -> bool:
+    """
+    Urgent notes kept in the task list (shown in the manual block, not in queues):
+    high priority without deadline, or title starting with "!".
+    """
+    priority = str(task.get("priority") or "").lower()
+    title = str(task.get("title") or "").strip()
+    return (priority in ("urgent", "high", "p1") and not task.get("deadline")) or title.startswith("!")
+
+
+def _is_done(task: Dict[str, Any]) -> bool:
+    return str(task.get("status") or "").lower() in _DONE_STATUSES
+
+
+def _day_of(task: Dict[str, Any]) -> str:
+    return str(task.get("deadline") or "")[:10]
+
+
+def _project(task: Dict[str, Any]) -> Dict[str, Any]:
+    item = {k: task.get(k) for k in TASK_FIELDS}
+    if item["client_code"] is None:
+        item["client_code"] = task_client_id(task)
+    if item["client_label"] is None:
+        item["client_label"] = item["client_code"]
+    return item
+
+
+def _block(tasks: Iterable[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+    ordered = sorted(tasks, key=lambda t: str(t.get("deadline") or ""))
+    return {"count": len(ordered), "items": [_project(t) for t in ordered[:limit]]}
+
+
+def _month_grid(day: date) -> List[date]:
+    """
+    42 days of the calendar page containing day (weeks start on Monday).
+    """
+    first = day.replace(day=1)
+    start = first - timedelta(days=first.weekday())
+    return [start + timedelta(days=i) for i in range(42)]
+
+
+def _process_summary(day: date, client_code: Optional[str]) -> Dict[str, Any]:
+    instances = [
+        inst
+        for inst in get_all_instances()
+        if isinstance(inst, dict)
+        and (client_code is None or (inst.get("client_code") or inst.get("client_id")) == client_code)
+    ]
+
+    by_status: Dict[str, int] = {}
+    attention: List[Dict[str, Any]] = []
+    for inst in instances:
+        status = str(inst.get("status") or "unknown")
+        by_status[status] = by_status.get(status, 0) + 1
+        due = str(inst.get("deadline") or inst.get("due_date") or "")[:10]
+        if due and due < day.isoformat() and status.lower() not in _PROCESS_DONE_STATUSES:
+            attention.append(inst)
+
+    attention.sort(key=lambda i: str(i.get("deadline") or i.get("due_date") or ""))
+    return {
+        "total": len(instances),
+        "planned": sum(v for k, v in by_status.items() if k.lower() == "planned"),
+        "by_status": by_status,
+        "attention": {
+            "count": len(attention),
+            "items": [
+                {
+                    "id": i.get("id"),
+                    "client_code": i.get("client_code") or i.get("client_id"),
+                    "period": i.get("period"),
+                    "status": i.get("status"),
+                    "deadline": i.get("deadline") or i.get("due_date"),
+                }
+                for i in attention[:PROCESS_ATTENTION_LIMIT]
+            ],
+        },
+    }
+
+
+@router.get("/day")
+def get_day_dashboard(
+    day_param: Optional[str] = Query(None, alias="date", description="YYYY-MM-DD, default today"),
+    client_code: Optional[str] = Query(None),
+) -> Dict[str, Any]:
+    """
+    Everything DayDashboardPage shows for one day, computed on the server.
+
+    Blocks return only the items they display plus counts for the rest:
+      - overdue: deadline before date, not done (first 8)
+      - today: deadline on date (first 10)
+      - upcoming: deadline after date or no deadline, not done (first 10;
+        tasks without deadline come first)
+      - calendar: task counts per day of the month page containing date
+      - processes: totals by status and overdue (attention) instances
+    Tasks are selected through the repository deadline / client indexes, so
+    cost follows the selected ranges rather than the whole task history.
+    """
+    day = _parse_day(day_param)
+    next_day = day + timedelta(days=1)
+    repo = get_task_repository()
+
+    def _visible(tasks: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [t for t in tasks if isinstance(t, dict) and not _is_legacy_urgent(t)]
+
+    overdue = [
+        t
+        for t in _visible(
+            repo.list_tasks(client_id=client_code, deadline_before=day.isoformat())
+        )
+        if not _is_done(t)
+    ]
+    today = _visible(
+        repo.list_tasks(client_id=client_code, deadline_from=day.isoformat(), deadline_before=next_day.isoformat())
+    )
+    upcoming = [
+        t
+        for t in _visible(
+            repo.list_undated_tasks(client_id=client_code)
+            + repo.list_tasks(client_id=client_code, deadline_from=next_day.isoformat())
+        )
+        if not _is_done(t)
+    ]
+
+    grid = _month_grid(day)
+    grid_end = grid[-1] + timedelta(days=1)
+    days: Dict[str, int] = {}
+    for t in _visible(
+        repo.list_tasks(client_id=client_code, deadline_from=grid[0].isoformat(), deadline_before=grid_end.isoformat())
+    ):
+        key = _day_of(t)
+        days[key] = days.get(key, 0) + 1
+
+    return {
+        "date": day.isoformat(),
+        "client_code": client_code,
+        "kpi": {
+            "overdue": len(overdue),
+            "today": len(today),
+            "upcoming": len(upcoming),
+        },
+        "overdue": _block(overdue, OVERDUE_LIMIT),
+        "today": _block(today, TODAY_LIMIT),
+        "upcoming": _block(upcoming, UPCOMING_LIMIT),
+        "calendar": {
+            "month": f"{day.year:04d}-{day.month:02d}",
+            "from": grid[0].isoformat(),
+            "to": grid[-1].isoformat(),
+            "days": days,
+        },
+        "processes": _process_summary(day, client_code),
+    }
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
 from starlette.responses import FileResponse
 from typing import List, Optional
 
+from app.core.list_query import ListQueryError, paginate, parse_fields
 from app.services.documents_store import DocumentsStore
 
 router = APIRouter(prefix="/api/internal/documents", tags=["internal-documents"])
@@ -12,9 +13,26 @@ store = DocumentsStore()
 
 
 @router.get("")
-def list_documents(client: Optional[str] = None):
+def list_documents(
+    client: Optional[str] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
     items = store.list(client_code=client)
-    return {"items": items}
+    try:
+        # Newest first by default; keyset on created_at keeps pages stable across uploads.
+        page = paginate(
+            items,
+            sort=sort or "-created_at",
+            limit=limit,
+            cursor=cursor,
+            fields=parse_fields(fields),
+        )
+    except ListQueryError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return page
 
 
 @router.post("/upload")
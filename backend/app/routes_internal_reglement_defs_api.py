@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-import json
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from app.core.http_cache import conditional_get
+from app.core.store_json import load_json_file, save_json_file
 
 router = APIRouter(prefix="/api/internal/reglement", tags=["internal-reglement"])
 
@@ -14,33 +16,27 @@ STORE_PATH = BASE_DIR / "reglement_defs_store.json"
 
 
 def _load_store() -> Dict[str, Any]:
-    if not STORE_PATH.exists():
-        return {"defs": [], "updated_at": None}
-
-    try:
-        raw = STORE_PATH.read_text(encoding="utf-8")
-        data = json.loads(raw)
+    data = load_json_file(STORE_PATH, None)
 
-        if isinstance(data, list):
-            return {"defs": data, "updated_at": None}
+    if isinstance(data, list):
+        return {"defs": data, "updated_at": None}
 
-        if isinstance(data, dict) and isinstance(data.get("defs"), list):
-            return data
+    if isinstance(data, dict) and isinstance(data.get("defs"), list):
+        return data
 
-        return {"defs": [], "updated_at": None}
-    except Exception:
-        return {"defs": [], "updated_at": None}
+    return {"defs": [], "updated_at": None}
 
 
 def _save_store(payload: Dict[str, Any]) -> None:
     safe = {"defs": payload.get("defs", []), "updated_at": datetime.utcnow().isoformat()}
-    tmp = STORE_PATH.with_suffix(".tmp")
-    tmp.write_text(json.dumps(safe, ensure_ascii=True, indent=2), encoding="utf-8")
-    tmp.replace(STORE_PATH)
+    save_json_file(STORE_PATH, safe, ensure_ascii=True)
 
 
 @router.get("/definitions")
-def get_definitions() -> Dict[str, Any]:
+def get_definitions(request: Request, response: Response) -> Any:
+    cached = conditional_get(request, response, [STORE_PATH])
+    if cached is not None:
+        return cached
     return _load_store()
 
 
@@ -4,16 +4,19 @@ import json
 from dataclasses import asdict, dataclass
 from datetime import datetime, date
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 
+from app.core.http_cache import conditional_get
+from app.core.list_query import ListQueryError, list_response, paginate_tasks, parse_fields
+from app.core.task_repository import get_task_repository
+
 router = APIRouter(prefix="/api/internal/tasks", tags=["internal-tasks"])
 
 # Base dir = backend project root (ERPv2_backend_connect)
 BASE_DIR = Path(__file__).resolve().parents[1]
-TASKS_STORE_PATH = BASE_DIR / "tasks_store.json"
 
 
 class TaskUpdate(BaseModel):
@@ -28,43 +31,6 @@ def _utc_now_z() -> str:
     return datetime.utcnow().isoformat() + "Z"
 
 
-def _load_tasks_store() -> Tuple[List[Dict[str, Any]], Dict[str, Any], str]:
-    if not TASKS_STORE_PATH.exists():
-        TASKS_STORE_PATH.write_text(json.dumps({"items": []}, ensure_ascii=False, indent=2), encoding="utf-8")
-
-    raw = TASKS_STORE_PATH.read_text(encoding="utf-8")
-    try:
-        data = json.loads(raw) if raw.strip() else {"items": []}
-    except Exception:
-        # If corrupted, do not crash the app: start fresh.
-        data = {"items": []}
-
-    if isinstance(data, list):
-        return data, {"items": data}, "items"
-
-    if isinstance(data, dict):
-        if "items" in data and isinstance(data["items"], list):
-            return data["items"], data, "items"
-        if "tasks" in data and isinstance(data["tasks"], list):
-            return data["tasks"], data, "tasks"
-
-    # Unknown shape -> normalize
-    container = {"items": []}
-    return container["items"], container, "items"
-
-
-def _save_tasks_store(container: Dict[str, Any], key: str, tasks: List[Dict[str, Any]]) -> None:
-    container[key] = tasks
-    TASKS_STORE_PATH.write_text(json.dumps(container, ensure_ascii=False, indent=2), encoding="utf-8")
-
-
-def _find_task(tasks: List[Dict[str, Any]], task_id: str) -> Optional[Dict[str, Any]]:
-    for t in tasks:
-        if str(t.get("id")) == task_id:
-            return t
-    return None
-
-
 def _discover_client_ids() -> List[str]:
     # Try to discover from any client profiles store file (names vary across versions).
     candidates = [
@@ -90,7 +56,7 @@ def _discover_client_ids() -> List[str]:
     return ["ip_usn_dr", "ooo_osno_3_zp1025", "ooo_usn_dr_tour_zp520"]
 
 
-def _seed_demo_tasks_if_empty(tasks: List[Dict[str, Any]], container: Dict[str, Any], key: str) -> List[Dict[str, Any]]:
+def _seed_demo_tasks_if_empty(tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     if tasks:
         return tasks
 
@@ -128,22 +94,56 @@ def _seed_demo_tasks_if_empty(tasks: List[Dict[str, Any]], container: Dict[str,
             }
         )
 
-    _save_tasks_store(container, key, seeded)
+    get_task_repository().save_tasks(seeded)
     return seeded
 
 
 @router.get("", summary="List tasks (internal)")
 @router.get("/", summary="List tasks (internal)")
-def list_tasks_internal() -> List[Dict[str, Any]]:
-    tasks, container, key = _load_tasks_store()
-    tasks = _seed_demo_tasks_if_empty(tasks, container, key)
-    return tasks
+def list_tasks_internal(
+    request: Request,
+    response: Response,
+    client: Optional[str] = Query(None, description="Client id / code"),
+    status: Optional[str] = Query(None),
+    deadline_from: Optional[str] = Query(None, description="Inclusive, ISO date"),
+    deadline_before: Optional[str] = Query(None, description="Exclusive, ISO date"),
+    sort: Optional[str] = Query(None, description="Field, '-field' for descending; default store order"),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+) -> Any:
+    """
+    Without limit / cursor the full (filtered) list is returned as before;
+    with them the response is {"items": [...], "next_cursor": ...}.
+
+    Answers 304 to If-None-Match / If-Modified-Since while the store is unchanged.
+    """
+    repo = get_task_repository()
+    if repo.count() == 0:
+        _seed_demo_tasks_if_empty([])
+    cached = conditional_get(request, response, repo.version_paths())
+    if cached is not None:
+        return cached
+    try:
+        page = paginate_tasks(
+            repo,
+            client=client,
+            status=status,
+            deadline_from=deadline_from,
+            deadline_before=deadline_before,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+            fields=parse_fields(fields),
+        )
+    except ListQueryError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return list_response(page, limit is not None or cursor is not None)
 
 
 @router.get("/{task_id}", summary="Get task by id")
 def get_task_internal(task_id: str) -> Dict[str, Any]:
-    tasks, _, _ = _load_tasks_store()
-    t = _find_task(tasks, task_id)
+    t = get_task_repository().get_task(task_id)
     if not t:
         raise HTTPException(status_code=404, detail="Task not found")
     return t
@@ -151,24 +151,23 @@ def get_task_internal(task_id: str) -> Dict[str, Any]:
 
 @router.post("/{task_id}", summary="Upsert task fields")
 def upsert_task_internal(task_id: str, payload: TaskUpdate) -> Dict[str, Any]:
-    tasks, container, key = _load_tasks_store()
-    tasks = _seed_demo_tasks_if_empty(tasks, container, key)
+    repo = get_task_repository()
+    if repo.count() == 0:
+        _seed_demo_tasks_if_empty([])
 
-    t = _find_task(tasks, task_id)
     now = _utc_now_z()
-
-    if not t:
-        t = {"id": task_id, "status": "open", "created_at": now, "updated_at": now}
-        tasks.append(t)
-
     patch = payload.model_dump(exclude_unset=True)
-    for k, v in patch.items():
-        if v is not None:
-            t[k] = v
 
-    t["updated_at"] = now
-    _save_tasks_store(container, key, tasks)
-    return t
+    def _apply(t: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if not t:
+            t = {"id": task_id, "status": "open", "created_at": now, "updated_at": now}
+        for k, v in patch.items():
+            if v is not None:
+                t[k] = v
+        t["updated_at"] = now
+        return t
+
+    return repo.update_task(task_id, _apply)  # type: ignore[return-value]
 
 
 @router.put("/{task_id}/status", summary="Update task status (alias)")
@@ -4,15 +4,25 @@ import json
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
-from app.services.chain_executor_v2 import run_reglament_for_period
+from app.core.job_queue import JobQueueFull, get_job_queue
+from app.core.store_json import load_json_file, save_json_file
+from app.core.store_locks import store_lock
+from app.services.chain_executor_v2 import (
+    ProgressCallback,
+    run_reglament_for_period,
+    run_reglament_for_range,
+)
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 RUNS_PATH = BASE_DIR / "chain_runs_store.json"
 
+MAX_RANGE_MONTHS = 120
+
 router = APIRouter(
     prefix="/api/internal/process-chains/reglement",
     tags=["internal.process_chains_reglement"],
@@ -27,18 +37,7 @@ def _load_runs_store() -> Dict[str, Any]:
       - {"runs": [ ... ]}
       - [ ... ]  (will be wrapped into {"runs": [...]})
     """
-    if not RUNS_PATH.exists():
-        return {"runs": []}
-
-    try:
-        raw = RUNS_PATH.read_text(encoding="utf-8-sig")
-    except Exception:
-        raw = RUNS_PATH.read_text(encoding="utf-8")
-
-    try:
-        data = json.loads(raw)
-    except Exception:
-        return {"runs": []}
+    data = load_json_file(RUNS_PATH, {"runs": []})
 
     if isinstance(data, list):
         return {"runs": data}
@@ -49,10 +48,16 @@ def _load_runs_store() -> Dict[str, Any]:
 
 
 def _save_runs_store(store: Dict[str, Any]) -> None:
-    RUNS_PATH.write_text(
-        json.dumps(store, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    save_json_file(RUNS_PATH, store)
+
+
+def _append_run(run_record: Dict[str, Any]) -> None:
+    with store_lock(RUNS_PATH):
+        store = dict(_load_runs_store())
+        runs = list(store.get("runs", []))
+        runs.append(run_record)
+        store["runs"] = runs
+        _save_runs_store(store)
 
 
 def _validate_period(year: int, month: int) -> None:
@@ -62,19 +67,42 @@ def _validate_period(year: int, month: int) -> None:
         raise HTTPException(status_code=422, detail="Invalid month")
 
 
-@router.post("/run")
-async def run_reglement(
-    year: int = Query(..., ge=2000, le=2100),
-    month: int = Query(..., ge=1, le=12),
-) -> Dict[str, Any]:
+def _parse_period(value: str) -> Tuple[int, int]:
     """
-    Run full monthly reglament for all clients for given year/month.
-
-    This is the main entry point for production reglament runs.
-    It is safe to call multiple times: engine should be idempotent.
+    Parse "YYYY-MM" period.
     """
+    try:
+        year_s, month_s = str(value).strip().split("-", 1)
+        year, month = int(year_s), int(month_s)
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"Invalid period: {value} (expected YYYY-MM)")
     _validate_period(year, month)
+    return year, month
+
+
+def _period_range(start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
+    if start > end:
+        raise HTTPException(status_code=422, detail="from must not be after to")
+    periods: List[Tuple[int, int]] = []
+    year, month = start
+    while (year, month) <= end:
+        periods.append((year, month))
+        if len(periods) > MAX_RANGE_MONTHS:
+            raise HTTPException(status_code=422, detail=f"Range is limited to {MAX_RANGE_MONTHS} months")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return periods
 
+
+async def _execute_period_run(
+    year: int,
+    month: int,
+    concurrency: Optional[int],
+    progress: Optional[ProgressCallback] = None,
+    job_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Run reglament for one period and append the run record to chain_runs_store.json.
+    """
     started_at = datetime.utcnow().isoformat() + "Z"
 
     status: str = "ok"
@@ -82,7 +110,9 @@ async def run_reglement(
     result: Any = None
 
     try:
-        result = await run_reglament_for_period(year=year, month=month)
+        result = await run_reglament_for_period(
+            year=year, month=month, concurrency=concurrency, progress=progress
+        )
     except Exception as exc:
         # We intentionally do not raise 500 to keep API stable for UI.
         status = "error"
@@ -90,9 +120,6 @@ async def run_reglement(
 
     finished_at = datetime.utcnow().isoformat() + "Z"
 
-    store = _load_runs_store()
-    runs = store.get("runs", [])
-
     run_record: Dict[str, Any] = {
         "id": str(uuid.uuid4()),
         "mode": "reglement",
@@ -101,16 +128,208 @@ async def run_reglement(
         "status": status,
         "error": error_message,
         "engine": "chain_executor_v2",
+        "job_id": job_id,
         "started_at": started_at,
         "finished_at": finished_at,
         "result": result,
     }
+    _append_run(run_record)
+    return run_record
 
-    runs.append(run_record)
-    store["runs"] = runs
-    _save_runs_store(store)
 
-    return {
+async def _execute_range_run(
+    periods: List[Tuple[int, int]],
+    from_period: str,
+    to_period: str,
+    client_codes: Optional[List[str]],
+    concurrency: Optional[int],
+    progress: Optional[ProgressCallback] = None,
+    job_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Run reglament for a client x month matrix and append the run record.
+    """
+    started_at = datetime.utcnow().isoformat() + "Z"
+
+    status: str = "ok"
+    error_message: str | None = None
+    result: Any = None
+
+    try:
+        result = await run_reglament_for_range(periods, client_codes, concurrency, progress)
+    except Exception as exc:
+        # Same contract as /run: report the error instead of raising 500.
+        status = "error"
+        error_message = str(exc)
+
+    finished_at = datetime.utcnow().isoformat() + "Z"
+
+    run_record: Dict[str, Any] = {
+        "id": str(uuid.uuid4()),
+        "mode": "reglement_range",
+        "from": from_period,
+        "to": to_period,
+        "clients": client_codes,
         "status": status,
+        "error": error_message,
+        "engine": "chain_executor_v2",
+        "job_id": job_id,
+        "started_at": started_at,
+        "finished_at": finished_at,
+        "result": result,
+    }
+    _append_run(run_record)
+    return run_record
+
+
+async def _reglament_job(params: Dict[str, Any], report: ProgressCallback) -> Dict[str, Any]:
+    """
+    Job queue handler (kind "reglement"): params are the /run or /run-range query.
+    """
+    job_id = params.get("job_id")
+    if params.get("mode") == "range":
+        periods = [(int(y), int(m)) for y, m in params["periods"]]
+        run = await _execute_range_run(
+            periods,
+            params["from"],
+            params["to"],
+            params.get("clients"),
+            params.get("concurrency"),
+            report,
+            job_id,
+        )
+    else:
+        run = await _execute_period_run(
+            int(params["year"]), int(params["month"]), params.get("concurrency"), report, job_id
+        )
+    if run["status"] != "ok":
+        raise RuntimeError(run["error"] or "reglament run failed")
+    return {"run_id": run["id"], "status": run["status"], "result": run["result"]}
+
+
+get_job_queue().register("reglement", _reglament_job)
+
+
+async def _submit_job(params: Dict[str, Any]) -> Dict[str, Any]:
+    job_id = str(uuid.uuid4())
+    params = dict(params, job_id=job_id)
+    try:
+        job = await get_job_queue().submit("reglement", params, job_id=job_id)
+    except JobQueueFull as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    return {
+        "status": "queued",
+        "job_id": job["id"],
+        "job": job,
+    }
+
+
+@router.post("/run")
+async def run_reglement(
+    year: int = Query(..., ge=2000, le=2100),
+    month: int = Query(..., ge=1, le=12),
+    concurrency: Optional[int] = Query(None, ge=1, le=64),
+    wait: bool = Query(False, description="Run inside the request (legacy synchronous mode)"),
+) -> Dict[str, Any]:
+    """
+    Run full monthly reglament for all clients for given year/month.
+
+    By default the run is queued as a background job and the job id is returned
+    immediately: poll GET /jobs/{job_id} or stream GET /jobs/{job_id}/events.
+    wait=true keeps the old behaviour and returns the run record.
+
+    concurrency: per-client worker limit (default env REGLEMENT_CONCURRENCY or 4).
+    Per-client timings are kept in the run record (result.clients).
+
+    This is the main entry point for production reglament runs.
+    It is safe to call multiple times: engine should be idempotent.
+    """
+    _validate_period(year, month)
+
+    if not wait:
+        return await _submit_job({"mode": "period", "year": year, "month": month, "concurrency": concurrency})
+
+    run_record = await _execute_period_run(year, month, concurrency)
+    return {
+        "status": run_record["status"],
         "run": run_record,
     }
+
+
+@router.post("/run-range")
+async def run_reglement_range(
+    from_period: str = Query(..., alias="from", description="First period, YYYY-MM"),
+    to_period: str = Query(..., alias="to", description="Last period (inclusive), YYYY-MM"),
+    clients: Optional[str] = Query(None, description="Comma-separated client codes (default: all)"),
+    concurrency: Optional[int] = Query(None, ge=1, le=64),
+    wait: bool = Query(False, description="Run inside the request instead of a background job"),
+) -> Dict[str, Any]:
+    """
+    Run reglament for a client x month matrix in one process and one commit.
+
+    Replaces the scripted per-cell HTTP loop (dev_chain_matrix_run.ps1): stores and
+    templates are loaded once for the whole range. The result keeps the matrix
+    report shape: {"summary": ..., "results": [{client, year, month, ok, ...}]}.
+    Queued as a background job unless wait=true (see /run).
+    """
+    periods = _period_range(_parse_period(from_period), _parse_period(to_period))
+    client_codes: Optional[List[str]] = None
+    if clients:
+        client_codes = list(dict.fromkeys(c.strip() for c in clients.split(",") if c.strip())) or None
+
+    if not wait:
+        return await _submit_job({
+            "mode": "range",
+            "periods": [list(p) for p in periods],
+            "from": from_period,
+            "to": to_period,
+            "clients": client_codes,
+            "concurrency": concurrency,
+        })
+
+    run_record = await _execute_range_run(periods, from_period, to_period, client_codes, concurrency)
+    return {
+        "status": run_record["status"],
+        "run": run_record,
+    }
+
+
+@router.get("/jobs")
+def list_reglament_jobs(limit: int = Query(50, ge=1, le=200)) -> List[Dict[str, Any]]:
+    """
+    Recent reglament jobs, newest first.
+    """
+    return [j for j in get_job_queue().list_jobs(limit) if j.get("kind") == "reglement"]
+
+
+@router.get("/jobs/{job_id}")
+def get_reglament_job(job_id: str) -> Dict[str, Any]:
+    """
+    Job status: queued | running | succeeded | failed (+ progress, result, error).
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_reglament_job(job_id: str) -> StreamingResponse:
+    """
+    Server-Sent Events stream of job status and per-client progress.
+
+    Events: snapshot (full job), progress ({stage, done, total, client, period}),
+    status (final status closes the stream).
+    """
+    if get_job_queue().get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def _events() -> AsyncIterator[str]:
+        async for event in get_job_queue().subscribe(job_id):
+            yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,7 +1,7 @@
 ﻿from fastapi import APIRouter, HTTPException
 from typing import Dict, Any, List
 
-from app.core.events import EventTypes, get_event_system
+from app.core.event_system import EventTypes, get_event_system
 from app.core.store_json import load_json_store
 from app.core.scheduler_reglament import REGLEMENT_CHAINS
 
@@ -1,8 +1,13 @@
-import json
+from collections.abc import Sequence
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+
+from app.core.http_cache import conditional_get
+from app.core.list_query import ListQueryError, list_response, make_filter, paginate, parse_fields
+from app.core.process_instances_store import instance_positions_for_client_code
+from app.core.store_json import load_json_file, save_json_file
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 INSTANCES_PATH = BASE_DIR / "process_instances_store.json"
@@ -15,16 +20,7 @@ router = APIRouter(
 
 
 def _load_json(path: Path, default: Any) -> Any:
-    if not path.exists():
-        return default
-    try:
-        raw = path.read_text(encoding="utf-8-sig")
-    except Exception:
-        raw = path.read_text(encoding="utf-8")
-    try:
-        return json.loads(raw)
-    except Exception:
-        return default
+    return load_json_file(path, default)
 
 
 def _load_instances_raw() -> Any:
@@ -97,7 +93,7 @@ def _ensure_demo_profiles() -> None:
     ]
 
     try:
-        PROFILES_PATH.write_text(json.dumps(demo, ensure_ascii=False, indent=2), encoding="utf-8")
+        save_json_file(PROFILES_PATH, demo)
     except Exception:
         return
 
@@ -143,14 +139,14 @@ def _ensure_instances_seeded() -> None:
                 "source": "seed",
             })
     try:
-        INSTANCES_PATH.parent.mkdir(parents=True, exist_ok=True)
-        INSTANCES_PATH.write_text(json.dumps(seeded, ensure_ascii=False, indent=2), encoding="utf-8")
+        save_json_file(INSTANCES_PATH, seeded)
     except Exception:
         return
 
-def _normalize_instances() -> List[Dict[str, Any]]:
+def _normalize_instance(key: Optional[str], value: Any, profiles_map: Dict[str, str]) -> Optional[Dict[str, Any]]:
     """
-    Normalize raw instances into flat list with derived fields.
+    Normalize one raw instance (None if it is not a dict) into a flat dict with
+    derived fields.
 
     Output fields:
       - instance_key
@@ -163,65 +159,69 @@ def _normalize_instances() -> List[Dict[str, Any]]:
       - steps_count
       - ...all original fields
     """
-    raw = _load_instances_raw()
-    profiles_map = _load_profiles_map()
+    if not isinstance(value, dict):
+        return None
+
+    inst = dict(value)
+
+    client_code = inst.get("client_code") or inst.get("client_id")
+    year = inst.get("year")
+    month = inst.get("month")
+    period = inst.get("period")
+
+    if period and (not year or not month):
+        # try to parse YYYY-MM
+        parts = str(period).split("-")
+        if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
+            year = int(parts[0])
+            month = int(parts[1])
+    if (year is not None) and (month is not None) and not period:
+        period = f"{int(year):04d}-{int(month):02d}"
+
+    status = inst.get("status") or "unknown"
+    steps = inst.get("steps") or []
+    if isinstance(steps, dict):
+        steps_count = len(steps.get("items", []))
+    elif isinstance(steps, list):
+        steps_count = len(steps)
+    else:
+        steps_count = 0
 
-    items: List[Dict[str, Any]] = []
+    instance_key = key or inst.get("key") or (
+        f"{client_code}::{period}" if client_code and period else None
+    )
 
-    if isinstance(raw, dict):
-        iterable = raw.items()
-    elif isinstance(raw, list):
-        iterable = [(None, it) for it in raw]
-    else:
-        iterable = []
+    client_label = profiles_map.get(client_code or "", client_code)
 
-    for key, value in iterable:
-        if not isinstance(value, dict):
-            continue
+    inst["instance_key"] = instance_key
+    inst["client_code"] = client_code
+    inst["client_label"] = client_label
+    inst["year"] = year
+    inst["month"] = month
+    inst["period"] = period
+    inst["status"] = status
+    inst["steps_count"] = steps_count
 
-        inst = dict(value)
-
-        client_code = inst.get("client_code") or inst.get("client_id")
-        year = inst.get("year")
-        month = inst.get("month")
-        period = inst.get("period")
-
-        if period and (not year or not month):
-            # try to parse YYYY-MM
-            parts = str(period).split("-")
-            if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
-                year = int(parts[0])
-                month = int(parts[1])
-        if (year is not None) and (month is not None) and not period:
-            period = f"{int(year):04d}-{int(month):02d}"
-
-        status = inst.get("status") or "unknown"
-        steps = inst.get("steps") or []
-        if isinstance(steps, dict):
-            steps_count = len(steps.get("items", []))
-        elif isinstance(steps, list):
-            steps_count = len(steps)
-        else:
-            steps_count = 0
+    return inst
 
-        instance_key = key or inst.get("key") or (
-            f"{client_code}::{period}" if client_code and period else None
-        )
 
-        client_label = profiles_map.get(client_code or "", client_code)
+class _NormalizedInstances(Sequence):
+    """
+    Raw instances store (dict or list shape) normalized on access, so a page
+    in store order only normalizes the instances it walks over.
+    """
 
-        inst["instance_key"] = instance_key
-        inst["client_code"] = client_code
-        inst["client_label"] = client_label
-        inst["year"] = year
-        inst["month"] = month
-        inst["period"] = period
-        inst["status"] = status
-        inst["steps_count"] = steps_count
+    def __init__(self, raw: Any, profiles_map: Dict[str, str]):
+        self._keyed = isinstance(raw, dict)
+        self._entries: Any = list(raw.items()) if self._keyed else (raw if isinstance(raw, list) else [])
+        self._profiles_map = profiles_map
 
-        items.append(inst)
+    def __len__(self) -> int:
+        return len(self._entries)
 
-    return items
+    def __getitem__(self, pos: Any) -> Any:
+        key, value = self._entries[pos] if self._keyed else (None, self._entries[pos])
+        return _normalize_instance(key, value, self._profiles_map)
 
 
 @router.post("/dev/seed")
@@ -251,35 +251,69 @@ def dev_seed() -> Dict[str, Any]:
 
 @router.get("/")
 def list_instances(
+    request: Request,
+    response: Response,
     client_code: Optional[str] = Query(None),
     year: Optional[int] = Query(None, ge=2000, le=2100),
     month: Optional[int] = Query(None, ge=1, le=12),
     period: Optional[str] = Query(None),
-) -> List[Dict[str, Any]]:
+    status: Optional[str] = Query(None),
+    deadline_from: Optional[str] = Query(None),
+    deadline_before: Optional[str] = Query(None),
+    sort: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+) -> Any:
     """
     Unified list of process instances for coverage / internal tools.
 
     Filters are optional; if omitted, all instances are returned.
+    With limit / cursor the response is {"items": [...], "next_cursor": ...}.
+    Answers 304 while instances and profiles stores are unchanged.
     """
 
     _ensure_demo_profiles()
     _ensure_instances_seeded()
-    items = _normalize_instances()
-    result: List[Dict[str, Any]] = []
+    cached = conditional_get(request, response, [INSTANCES_PATH, PROFILES_PATH])
+    if cached is not None:
+        return cached
+    raw = _load_instances_raw()
+    items = _NormalizedInstances(raw, _load_profiles_map())
 
-    for inst in items:
-        if client_code and inst.get("client_code") != client_code:
-            continue
+    # Store order pages stop at the page size; a client filter walks only that
+    # client's instances (process instances store index over the same file).
+    positions: Optional[List[int]] = None
+    if client_code and isinstance(raw, list):
+        source, client_positions = instance_positions_for_client_code(client_code)
+        if source is raw:
+            positions = client_positions
+
+    common = make_filter(status=status, deadline_from=deadline_from, deadline_before=deadline_before)
 
+    def _match(inst: Dict[str, Any]) -> bool:
+        if client_code and inst.get("client_code") != client_code:
+            return False
         if period:
             if inst.get("period") != period:
-                continue
+                return False
         else:
             if year is not None and inst.get("year") != year:
-                continue
+                return False
             if month is not None and inst.get("month") != month:
-                continue
-
-        result.append(inst)
+                return False
+        return common is None or common(inst)
 
-    return result
+    try:
+        page = paginate(
+            items,
+            positions=positions,
+            match=_match,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+            fields=parse_fields(fields),
+        )
+    except ListQueryError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return list_response(page, limit is not None or cursor is not None)
@@ -28,6 +28,8 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 from fastapi import APIRouter
 from pydantic import BaseModel, Field
 
+from app.core.store_locks import store_lock
+
 
 router = APIRouter(prefix="/api/internal/process-intents", tags=["internal-process-intents"])
 
@@ -147,7 +149,7 @@ def realize_intent(body: IntentIn) -> IntentOut:
     process_key = f"{body.clientId}::{body.taskKey}"
     path = _store_path()
 
-    with _LOCK:
+    with store_lock(path), _LOCK:
         raw = _read_json(path)
         mode, container, shape = _normalize_store(raw)
 
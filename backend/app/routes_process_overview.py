@@ -4,6 +4,8 @@ import json
 
 from fastapi import APIRouter, Query
 
+from app.core.control_event_store import list_all_events
+
 router = APIRouter()
 
 
@@ -29,8 +31,8 @@ def load_instances() -> List[Dict[str, Any]]:
 
 
 def load_control_events() -> List[Dict[str, Any]]:
-    data = load_json_store("control_events_store.json")
-    return data if isinstance(data, list) else []
+    # Through the store: includes journaled events not yet compacted into the file.
+    return list_all_events()
 
 
 def make_period(year: Optional[int], month: Optional[int]) -> Optional[str]:
@@ -1,42 +1,52 @@
-import json
 import uuid
 from datetime import datetime
-from pathlib import Path
-from typing import Dict, Any, List
-from fastapi import APIRouter, HTTPException
+from typing import Dict, Any, List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
-router = APIRouter(prefix="/api", tags=["tasks"])
-
-STORE = Path(__file__).resolve().parent.parent.parent / "tasks_store.json"
+from app.core.http_cache import conditional_get
+from app.core.list_query import ListQueryError, list_response, paginate_tasks, parse_fields
+from app.core.task_repository import get_task_repository
 
-def load_store():
-    if not STORE.exists():
-        return {"tasks": []}
-    try:
-        raw = STORE.read_text(encoding="utf-8")
-        data = json.loads(raw)
-        if isinstance(data, list):
-            return {"tasks": data}
-        if isinstance(data, dict) and isinstance(data.get("tasks"), list):
-            return data
-        return {"tasks": []}
-    except:
-        return {"tasks": []}
-
-def save_store(store):
-    STORE.write_text(json.dumps(store, ensure_ascii=False, indent=2), encoding="utf-8")
+router = APIRouter(prefix="/api", tags=["tasks"])
 
 @router.get("/tasks")
-def list_tasks():
-    return load_store().get("tasks", [])
+def list_tasks(
+    request: Request,
+    response: Response,
+    client: Optional[str] = None,
+    status: Optional[str] = None,
+    deadline_from: Optional[str] = None,
+    deadline_before: Optional[str] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    repo = get_task_repository()
+    cached = conditional_get(request, response, repo.version_paths())
+    if cached is not None:
+        return cached
+    try:
+        page = paginate_tasks(
+            repo,
+            client=client,
+            status=status,
+            deadline_from=deadline_from,
+            deadline_before=deadline_before,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+            fields=parse_fields(fields),
+        )
+    except ListQueryError as exc:
+        raise HTTPException(400, str(exc))
+    return list_response(page, limit is not None or cursor is not None)
 
 @router.post("/tasks")
 def create_task(payload: Dict[str, Any]):
     title = payload.get("title")
     if not title:
         raise HTTPException(400,"Missing title")
-    store = load_store()
-    tasks = store["tasks"]
 
     now = datetime.utcnow().isoformat()+"Z"
     t = {
@@ -52,8 +62,7 @@ def create_task(payload: Dict[str, Any]):
         "updated_at": now
     }
 
-    tasks.append(t)
-    save_store(store)
+    get_task_repository().save_task(t)
     return t
 
 @router.post("/tasks/{task_id}/status")
@@ -62,30 +71,30 @@ def update_status(task_id: str, payload: Dict[str,Any]):
     if not status:
         raise HTTPException(400, "Missing status")
 
-    store = load_store()
-    tasks = store["tasks"]
-
-    for t in tasks:
-        if t["id"] == task_id:
+    def _apply(t):
+        if t:
             t["status"] = status
             t["updated_at"] = datetime.utcnow().isoformat()+"Z"
-            save_store(store)
-            return t
+        return t
+
+    t = get_task_repository().update_task(task_id, _apply)
+    if t:
+        return t
 
     raise HTTPException(404,"Task not found")
 
 @router.patch("/tasks/{task_id}")
 def patch_task(task_id: str, payload: Dict[str,Any]):
-    store = load_store()
-    tasks = store["tasks"]
-
-    for t in tasks:
-        if t["id"] == task_id:
+    def _apply(t):
+        if t:
             for k,v in payload.items():
                 if k!="id":
                     t[k]=v
             t["updated_at"] = datetime.utcnow().isoformat()+"Z"
-            save_store(store)
-            return t
+        return t
+
+    t = get_task_repository().update_task(task_id, _apply)
+    if t:
+        return t
 
     raise HTTPException(404,"Task not found")
\ No newline at end of file
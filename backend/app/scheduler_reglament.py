@@ -1,13 +1,25 @@
 ﻿import asyncio
 import datetime
+import heapq
+import itertools
 import logging
-from typing import Optional
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
-from app.services.chain_executor_v2 import run_reglament_for_period
+from app.core.cron import CronExpr
+from app.core.leader_election import get_leader_election
+from app.core.store_json import load_json_file, save_json_file
+from app.core.store_locks import store_lock
+from app.services.chain_executor_v2 import RunFencedError, run_reglament_for_period, run_reglament_for_range
 
 logger = logging.getLogger(__name__)
 
-# Registry of reglament chains for UI / dev API
+# This file lives in app/core/scheduler_reglament.py
+BASE_DIR = Path(__file__).resolve().parents[2]
+STATE_PATH = BASE_DIR / "scheduler_state.json"
+
+# Registry of reglament chains for UI / dev API.
+# Optional "clients": [...] limits a chain to these client codes (per-profile schedules).
 REGLEMENT_CHAINS = {
     "monthly_reglament": {
         "code": "monthly_reglament",
@@ -16,39 +28,260 @@ REGLEMENT_CHAINS = {
     }
 }
 
+# Missed fires executed at startup per schedule (latest ones are kept).
+MAX_CATCH_UP_FIRES = 12
+# Upper bound of one sleep: the loop re-checks the wall clock at least this often.
+MAX_SLEEP_SEC = 3600.0
+
+# Action of a schedule: called with the scheduled fire time.
+ScheduleAction = Callable[[datetime.datetime], Awaitable[Any]]
+
 _scheduler_task: Optional[asyncio.Task] = None
 
+_SCHEDULES: Dict[str, Dict[str, Any]] = {}
+# Timer heap: (fire_at, seq, code, version); stale entries are skipped by version.
+_HEAP: List[Tuple[datetime.datetime, int, str, int]] = []
+_SEQ = itertools.count()
+_WAKE: Optional[asyncio.Event] = None
+
+
+# ===========================================================
+# STATE (last fired per schedule)
+# ===========================================================
+def _load_state() -> Dict[str, Any]:
+    data = load_json_file(STATE_PATH, {"schedules": {}})
+    if isinstance(data, dict) and isinstance(data.get("schedules"), dict):
+        return data["schedules"]
+    return {}
+
+
+def _mark_fired(code: str, fire_at: datetime.datetime, status: str, error: Optional[str] = None) -> None:
+    with store_lock(STATE_PATH):
+        schedules = dict(_load_state())
+        schedules[code] = {
+            "last_fired": fire_at.isoformat(),
+            "last_status": status,
+            "last_error": error,
+            "finished_at": datetime.datetime.now().isoformat(),
+        }
+        save_json_file(STATE_PATH, {"schedules": schedules})
+
+
+def _last_fired(code: str) -> Optional[datetime.datetime]:
+    value = (_load_state().get(code) or {}).get("last_fired")
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+# ===========================================================
+# SCHEDULES
+# ===========================================================
+def _previous_period(fire_at: datetime.datetime) -> Tuple[int, int]:
+    if fire_at.month == 1:
+        return fire_at.year - 1, 12
+    return fire_at.year, fire_at.month - 1
+
+
+def _reglament_action(chain: Dict[str, Any]) -> ScheduleAction:
+    """
+    Action of a REGLEMENT_CHAINS entry: run reglament for the month before the fire time.
+
+    The run commits only while this process still holds the leader lease.
+    """
+    async def _run(fire_at: datetime.datetime) -> Any:
+        year, month = _previous_period(fire_at)
+        clients = chain.get("clients")
+        fence = get_leader_election().holds_lease
+        logger.info("Scheduler triggering %s for %04d-%02d", chain.get("code"), year, month)
+        if clients:
+            return await run_reglament_for_range([(year, month)], list(clients), fence=fence)
+        return await run_reglament_for_period(year=year, month=month, fence=fence)
+
+    return _run
+
+
+def _push(code: str, fire_at: datetime.datetime) -> None:
+    schedule = _SCHEDULES[code]
+    heapq.heappush(_HEAP, (fire_at, next(_SEQ), code, schedule["version"]))
+    schedule["next_fire"] = fire_at
+    if _WAKE is not None:
+        _WAKE.set()
+
+
+def add_schedule(code: str, expr: str, action: ScheduleAction) -> datetime.datetime:
+    """
+    Register (or replace) a schedule and return its next fire time.
+
+    Works before and after the scheduler is started; all schedules share one
+    timer heap, so adding more does not add polling loops.
+    """
+    cron = CronExpr(expr)
+    previous = _SCHEDULES.get(code)
+    _SCHEDULES[code] = {
+        "code": code,
+        "cron": cron,
+        "action": action,
+        "version": (previous["version"] + 1) if previous else 0,
+        "lock": previous["lock"] if previous else asyncio.Lock(),
+        "next_fire": None,
+    }
+    next_fire = cron.next_after(datetime.datetime.now())
+    _push(code, next_fire)
+    return next_fire
+
 
+def remove_schedule(code: str) -> bool:
+    # Heap entries of a removed schedule are dropped when they come up.
+    return _SCHEDULES.pop(code, None) is not None
+
+
+def list_schedules() -> List[Dict[str, Any]]:
+    state = _load_state()
+    return [
+        {
+            "code": code,
+            "schedule": s["cron"].expr,
+            "next_fire": s["next_fire"].isoformat() if s["next_fire"] else None,
+            "last_fired": (state.get(code) or {}).get("last_fired"),
+            "last_status": (state.get(code) or {}).get("last_status"),
+        }
+        for code, s in sorted(_SCHEDULES.items())
+    ]
+
+
+async def _fire(code: str, fire_at: datetime.datetime) -> None:
+    schedule = _SCHEDULES.get(code)
+    if schedule is None:
+        return
+    # One run per schedule at a time; a fire that comes due meanwhile waits.
+    async with schedule["lock"]:
+        last = _last_fired(code)
+        if last is not None and last >= fire_at:
+            return
+        if not get_leader_election().is_leader:
+            logger.warning("SCHEDULER_FIRE_SKIPPED_NOT_LEADER: code=%s fire_at=%s", code, fire_at)
+            return
+        try:
+            await schedule["action"](fire_at)
+        except RunFencedError as exc:
+            # Not marked fired: the current leader catches this fire up.
+            logger.warning("SCHEDULER_FIRE_FENCED: code=%s fire_at=%s error=%s", code, fire_at, exc)
+            return
+        except Exception as exc:
+            logger.exception("Error in reglament scheduler (%s @ %s): %s", code, fire_at, exc)
+            _mark_fired(code, fire_at, "error", str(exc))
+            return
+        _mark_fired(code, fire_at, "ok")
+
+
+async def _catch_up() -> None:
+    """
+    Run fires missed while the app was down (since the persisted last_fired).
+
+    A schedule without state has never run here: only its baseline is recorded,
+    history is not backfilled.
+    """
+    now = datetime.datetime.now()
+    for code, schedule in list(_SCHEDULES.items()):
+        last = _last_fired(code)
+        if last is None:
+            _mark_fired(code, now, "baseline")
+            continue
+        missed = schedule["cron"].fires_between(last, now, limit=MAX_CATCH_UP_FIRES)
+        if missed:
+            logger.info("Scheduler catch-up %s: %s missed fire(s)", code, len(missed))
+        for fire_at in missed:
+            await _fire(code, fire_at)
+
+
+# ===========================================================
+# LOOP
+# ===========================================================
 def start_reglament_scheduler() -> None:
     """
-    Lightweight scheduler:
-    - runs background loop
-    - every 60 seconds checks current datetime
-    - on first day of month at 09:00 triggers reglament for previous month
+    Cron scheduler for REGLEMENT_CHAINS (and schedules added via add_schedule):
+    - parses "schedule" cron expressions and keeps next fire times in a timer heap
+    - sleeps until the earliest fire (woken early when schedules change)
+    - persists last fired time per schedule in scheduler_state.json
+    - on startup runs fires missed while the app was down
+    Monthly reglament runs for the month before the fire time.
     """
-    global _scheduler_task
+    global _scheduler_task, _WAKE
 
     if _scheduler_task is not None:
         logger.info("Reglament scheduler already running")
         return
 
+    _WAKE = asyncio.Event()
+    for code, chain in REGLEMENT_CHAINS.items():
+        if code not in _SCHEDULES and chain.get("schedule"):
+            add_schedule(code, chain["schedule"], _reglament_action(chain))
+    # Restart after stop_reglament_scheduler(): re-arm existing schedules.
+    now = datetime.datetime.now()
+    for code, schedule in _SCHEDULES.items():
+        if schedule["next_fire"] is None:
+            _push(code, schedule["cron"].next_after(now))
+
     async def _worker() -> None:
-        logger.info("Reglament scheduler started")
+        logger.info("Reglament scheduler started: %s", list_schedules())
+        try:
+            await _catch_up()
+        except Exception as exc:
+            logger.exception("Error in reglament scheduler catch-up: %s", exc)
+
         while True:
-            now = datetime.datetime.now()
             try:
-                year = now.year
-                month = now.month - 1
-                if month == 0:
-                    month = 12
-                    year -= 1
-
-                if now.day == 1 and now.hour == 9 and now.minute == 0:
-                    logger.info("Scheduler triggering reglament for %04d-%02d", year, month)
-                    await run_reglament_for_period(year=year, month=month)
+                if not _HEAP:
+                    _WAKE.clear()
+                    await _WAKE.wait()
+                    continue
+
+                fire_at, _, code, version = _HEAP[0]
+                schedule = _SCHEDULES.get(code)
+                if schedule is None or schedule["version"] != version:
+                    heapq.heappop(_HEAP)
+                    continue
+
+                delay = (fire_at - datetime.datetime.now()).total_seconds()
+                if delay > 0:
+                    _WAKE.clear()
+                    # asyncio.wait (not wait_for): a wake-up racing with task
+                    # cancellation must not swallow the cancellation.
+                    waiter = asyncio.ensure_future(_WAKE.wait())
+                    try:
+                        await asyncio.wait({waiter}, timeout=min(delay, MAX_SLEEP_SEC))
+                    finally:
+                        waiter.cancel()
+                    continue
+
+                heapq.heappop(_HEAP)
+                _push(code, schedule["cron"].next_after(fire_at))
+                asyncio.get_event_loop().create_task(_fire(code, fire_at))
             except Exception as exc:
                 logger.exception("Error in reglament scheduler: %s", exc)
-            await asyncio.sleep(60)
+                await asyncio.sleep(1)
 
     loop = asyncio.get_event_loop()
     _scheduler_task = loop.create_task(_worker())
+
+
+def stop_reglament_scheduler() -> None:
+    """
+    Stop the scheduler loop (e.g. when this worker loses leadership).
+    Registered schedules are kept; fires already started run to completion.
+    """
+    global _scheduler_task
+
+    if _scheduler_task is None:
+        return
+    _scheduler_task.cancel()
+    _scheduler_task = None
+    _HEAP.clear()
+    for schedule in _SCHEDULES.values():
+        schedule["version"] += 1
+        schedule["next_fire"] = None
+    logger.info("Reglament scheduler stopped")
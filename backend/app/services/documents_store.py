@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import json
 import os
 import uuid
 from datetime import datetime, timezone
@@ -9,6 +8,9 @@ from typing import Any, Dict, List, Optional
 
 from fastapi import UploadFile
 
+from app.core.store_json import load_json_file, save_json_file
+from app.core.store_locks import store_lock
+
 DEFAULT_ROOT = Path(__file__).resolve().parents[2] / "storage" / "documents"
 INDEX_NAME = "index.json"
 
@@ -26,19 +28,13 @@ class DocumentsStore:
             self._write_index({"items": []})
 
     def _read_index(self) -> Dict[str, Any]:
-        try:
-            raw = self.index_path.read_text(encoding="utf-8")
-            data = json.loads(raw) if raw.strip() else {"items": []}
-            if not isinstance(data, dict) or "items" not in data or not isinstance(data["items"], list):
-                return {"items": []}
-            return data
-        except Exception:
+        data = load_json_file(self.index_path, {"items": []})
+        if not isinstance(data, dict) or "items" not in data or not isinstance(data["items"], list):
             return {"items": []}
+        return data
 
     def _write_index(self, data: Dict[str, Any]) -> None:
-        tmp = self.index_path.with_suffix(".tmp")
-        tmp.write_text(json.dumps(data, ensure_ascii=True, indent=2), encoding="utf-8")
-        tmp.replace(self.index_path)
+        save_json_file(self.index_path, data, ensure_ascii=True)
 
     def list(self, client_code: Optional[str] = None) -> List[Dict[str, Any]]:
         data = self._read_index()
@@ -46,8 +42,7 @@ class DocumentsStore:
         if client_code:
             cc = client_code.strip()
             items = [x for x in items if (x.get("client_code") or "") == cc]
-        items.sort(key=lambda x: (x.get("created_at") or ""), reverse=True)
-        return items
+        return sorted(items, key=lambda x: (x.get("created_at") or ""), reverse=True)
 
     def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
         data = self._read_index()
@@ -100,8 +95,9 @@ class DocumentsStore:
             "created_at": _utc_now_iso(),
         }
 
-        data = self._read_index()
-        data.setdefault("items", []).append(item)
-        self._write_index(data)
+        with store_lock(self.index_path):
+            data = dict(self._read_index())
+            data["items"] = list(data.get("items", [])) + [item]
+            self._write_index(data)
 
         return item
@@ -3,25 +3,116 @@
 import logging
 from fastapi import FastAPI
 
-from app.core.events import get_event_system
-from app.core.scheduler_reglament import start_reglament_scheduler
+from app.core.control_event_store import (
+    compact_journal,
+    start_journal_compactor,
+    stop_journal_compactor,
+)
+from app.core.dolibarr_http import close_dolibarr_client, start_dolibarr_client
+from app.core.dolibarr_mirror import start_dolibarr_mirror, stop_dolibarr_mirror
+from app.core.event_system import get_event_system
+from app.core.internal_process_adapter import stop_task_generation_pool
+from app.core.job_queue import resume_jobs, start_job_queue
+from app.core.leader_election import get_leader_election
+from app.core.scheduler_reglament import start_reglament_scheduler, stop_reglament_scheduler
+from app.core.store_json import flush_pending_writes
 
 logger = logging.getLogger(__name__)
 
 
+def _start_leader_tasks() -> None:
+    """
+    Background work that must run in exactly one worker process:
+    scheduler, journal compactor, job sweeper (resume of persisted jobs),
+    Dolibarr mirror sync.
+    """
+    try:
+        start_reglament_scheduler()
+        logger.info("REGLEMENT_SCHEDULER_START_REQUESTED")
+    except Exception:
+        logger.exception("REGLEMENT_SCHEDULER_START_FAILED")
+    try:
+        start_journal_compactor()
+    except Exception:
+        logger.exception("CONTROL_EVENT_JOURNAL_COMPACTOR_START_FAILED")
+    try:
+        resume_jobs()
+    except Exception:
+        logger.exception("JOB_QUEUE_RESUME_FAILED")
+    try:
+        start_dolibarr_mirror()
+    except Exception:
+        logger.exception("DOLIBARR_MIRROR_START_FAILED")
+
+
+def _stop_leader_tasks() -> None:
+    try:
+        stop_reglament_scheduler()
+    except Exception:
+        logger.exception("REGLEMENT_SCHEDULER_STOP_FAILED")
+    try:
+        stop_journal_compactor()
+    except Exception:
+        logger.exception("CONTROL_EVENT_JOURNAL_COMPACTOR_STOP_FAILED")
+    try:
+        stop_dolibarr_mirror()
+    except Exception:
+        logger.exception("DOLIBARR_MIRROR_STOP_FAILED")
+
+
 def register_startup_events(app: FastAPI) -> None:
     @app.on_event("startup")
     async def on_startup() -> None:
         _ = get_event_system()
         logger.info("APP_STARTUP_EVENTS_REGISTERED")
         try:
-            start_reglament_scheduler()
-            logger.info("REGLEMENT_SCHEDULER_START_REQUESTED")
+            start_job_queue()
+        except Exception:
+            logger.exception("JOB_QUEUE_START_FAILED")
+        try:
+            start_dolibarr_client()
         except Exception:
-            logger.exception("REGLEMENT_SCHEDULER_START_FAILED")
+            logger.exception("DOLIBARR_HTTP_CLIENT_START_FAILED")
+
+        # Only the elected leader runs scheduler / compactor / sweepers;
+        # other workers serve HTTP only.
+        election = get_leader_election()
+        election.on_elected(_start_leader_tasks)
+        election.on_demoted(_stop_leader_tasks)
+        try:
+            election.start()
+        except Exception:
+            logger.exception("LEADER_ELECTION_START_FAILED")
 
 
 def register_shutdown_events(app: FastAPI) -> None:
     @app.on_event("shutdown")
     async def on_shutdown() -> None:
         logger.info("APP_SHUTDOWN_EVENTS_TRIGGERED")
+        election = get_leader_election()
+        if election.is_leader:
+            try:
+                compact_journal()
+            except Exception:
+                logger.exception("CONTROL_EVENT_JOURNAL_COMPACT_ON_SHUTDOWN_FAILED")
+        try:
+            await election.stop()
+        except Exception:
+            logger.exception("LEADER_ELECTION_STOP_FAILED")
+        try:
+            await get_event_system().close()
+        except Exception:
+            logger.exception("EVENT_SYSTEM_CLOSE_FAILED")
+        try:
+            await stop_task_generation_pool()
+        except Exception:
+            logger.exception("PROCESS_TASK_GENERATION_POOL_STOP_FAILED")
+        try:
+            await close_dolibarr_client()
+        except Exception:
+            logger.exception("DOLIBARR_HTTP_CLIENT_CLOSE_FAILED")
+        try:
+            flushed = flush_pending_writes()
+            logger.info("JSON_STORE_PENDING_WRITES_FLUSHED: stores=%s", flushed)
+        except Exception:
+            logger.exception("JSON_STORE_FLUSH_ON_SHUTDOWN_FAILED")
@@ -1,7 +1,12 @@
+import asyncio
+import os
+import time
+from typing import Optional, Tuple
+
 from fastapi import APIRouter
 from pydantic import BaseModel
-import os
-import httpx
+
+from app.core.dolibarr_http import get_dolibarr_client
 
 router = APIRouter()
 
@@ -13,28 +18,79 @@ class Stats(BaseModel):
     total_tasks_today: int
 
 
-async def _safe_count(url: str) -> int:
+# Page size of the id-only walk (servers without pagination_data).
+COUNT_PAGE_SIZE = int(os.getenv("STATS_COUNT_PAGE_SIZE", "500"))
+# Collected stats are served from memory for this long.
+STATS_CACHE_TTL_SEC = float(os.getenv("STATS_CACHE_TTL_SEC", "30"))
+
+_cache: Optional[Tuple[float, Stats]] = None
+_cache_lock: Optional[asyncio.Lock] = None
+
+
+async def _safe_count(base: str, resource: str, key: str) -> Tuple[int, bool]:
     """
-    Helper: call Dolibarr endpoint and return number of items.
-    Any error => 0, no exceptions are propagated.
+    Helper: exact number of records of a Dolibarr resource -> (count, ok).
+    Any error => (0, False), no exceptions are propagated.
+
+    Asks for pagination_data first (one call, total from the pagination block);
+    older Dolibarr versions ignore it, then ids are counted page by page with a
+    properties=id projection (no full records are transferred).
     """
+    client = get_dolibarr_client()
+    url = f"{base}/{resource}"
     try:
-        async with httpx.AsyncClient(timeout=5.0, verify=False) as client:
-            response = await client.get(url)
+        response = await client.get(
+            url,
+            params={"DOLAPIKEY": key, "limit": 1, "pagination_data": "true", "properties": "id"},
+            timeout=5.0,
+        )
+        if response.status_code == 404:
+            # Dolibarr answers 404 when the list is empty.
+            return 0, True
         response.raise_for_status()
         data = response.json()
-        if isinstance(data, list):
-            return len(data)
-        if isinstance(data, dict):
-            items = data.get("items")
-            if isinstance(items, list):
-                return len(items)
+        if isinstance(data, dict) and isinstance(data.get("pagination"), dict):
+            total = data["pagination"].get("total")
+            if total is not None:
+                return int(total), True
+
+        count = 0
+        page = 0
+        while True:
+            response = await client.get(
+                url,
+                params={
+                    "DOLAPIKEY": key,
+                    "limit": COUNT_PAGE_SIZE,
+                    "page": page,
+                    "sortfield": "t.rowid",
+                    "sortorder": "ASC",
+                    "properties": "id",
+                },
+                timeout=5.0,
+            )
+            if response.status_code == 404:
+                return count, True
+            response.raise_for_status()
+            data = response.json()
+            items = data if isinstance(data, list) else (data.get("items") if isinstance(data, dict) else None)
+            if not isinstance(items, list):
+                return count, True
+            count += len(items)
+            if len(items) < COUNT_PAGE_SIZE:
+                return count, True
+            page += 1
     except Exception:
-        return 0
-    return 0
+        return 0, False
 
 
 async def _collect_stats() -> Stats:
+    """
+    Four counts fetched concurrently; results are cached for STATS_CACHE_TTL_SEC
+    (failed collections are not cached).
+    """
+    global _cache, _cache_lock
+
     base = os.getenv("DOLI_API_URL") or "http://host.docker.internal:8282/api/index.php"
     key = os.getenv("DOLI_API_KEY")
 
@@ -46,26 +102,35 @@ async def _collect_stats() -> Stats:
             total_tasks_today=0,
         )
 
-    base = base.rstrip("/")
-    key_param = f"?DOLAPIKEY={key}&limit=1000"
-
-    clients_url = f"{base}/thirdparties{key_param}"
-    products_url = f"{base}/products{key_param}"
-    invoices_url = f"{base}/invoices{key_param}"
-    # Simple approximation for tasks count: Dolibarr agenda events.
-    tasks_url = f"{base}/agendaevents{key_param}"
-
-    total_clients = await _safe_count(clients_url)
-    total_products = await _safe_count(products_url)
-    total_invoices = await _safe_count(invoices_url)
-    total_tasks_today = await _safe_count(tasks_url)
-
-    return Stats(
-        total_clients=total_clients,
-        total_products=total_products,
-        total_invoices=total_invoices,
-        total_tasks_today=total_tasks_today,
-    )
+    if _cache is not None and _cache[0] > time.monotonic():
+        return _cache[1]
+
+    if _cache_lock is None:
+        _cache_lock = asyncio.Lock()
+    async with _cache_lock:
+        # Concurrent requests wait for one collection instead of starting their own.
+        if _cache is not None and _cache[0] > time.monotonic():
+            return _cache[1]
+
+        base = base.rstrip("/")
+        # Simple approximation for tasks count: Dolibarr agenda events.
+        results = await asyncio.gather(
+            _safe_count(base, "thirdparties", key),
+            _safe_count(base, "products", key),
+            _safe_count(base, "invoices", key),
+            _safe_count(base, "agendaevents", key),
+        )
+        (clients, _), (products, _), (invoices, _), (tasks, _) = results
+
+        stats = Stats(
+            total_clients=clients,
+            total_products=products,
+            total_invoices=invoices,
+            total_tasks_today=tasks,
+        )
+        if all(ok for _, ok in results):
+            _cache = (time.monotonic() + STATS_CACHE_TTL_SEC, stats)
+        return stats
 
 
 @router.get("/stats", response_model=Stats)
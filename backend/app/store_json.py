@@ -1,13 +1,44 @@
-﻿import json
+﻿import copy
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Any, Dict, TypeVar
+from typing import Any, Dict, Iterator, Optional, Tuple, TypeVar, Union
 
 T = TypeVar("T")
 
+logger = logging.getLogger(__name__)
+
 # This file lives in app/core/store_json.py
 # BASE_DIR points to ERPv2_backend_connect root (where JSON stores are placed).
 BASE_DIR = Path(__file__).resolve().parents[2]
 
+PathLike = Union[str, Path]
+
+# Parsed documents keyed by absolute file path.
+# Each entry keeps the stat signature (mtime_ns, size, inode) the document was parsed from.
+_CACHE: Dict[str, Tuple[Tuple[int, int, int], Any]] = {}
+_CACHE_LOCK = threading.Lock()
+
+# Pending (not yet written) documents: key -> (data, dump options).
+# _TX holds writes of the current store_transaction() scope (visible only inside it),
+# _PENDING holds write-behind saves waiting for the coalescing window (visible to all).
+_DumpOptions = Tuple[bool, Optional[int], bool]
+_TX: ContextVar[Optional[Dict[str, Tuple[Any, _DumpOptions]]]] = ContextVar("store_json_tx", default=None)
+_PENDING: Dict[str, Tuple[Any, _DumpOptions]] = {}
+_PENDING_LOCK = threading.Lock()
+_FLUSH_TIMER: Optional[threading.Timer] = None
+# Serializes disk writes (tmp files are named <store>.tmp).
+_WRITE_LOCK = threading.Lock()
+# Delay before retrying a failed write-behind flush.
+_FLUSH_RETRY_SEC = 1.0
+# Per-store save sequence and time of this process (versions of deferred documents).
+_SAVES: Dict[str, Tuple[int, float]] = {}
+
 
 def get_store_path(name: str) -> Path:
     """
@@ -17,25 +48,318 @@ def get_store_path(name: str) -> Path:
     return BASE_DIR / name
 
 
-def load_json_store(name: str, default: T) -> T:
+def _cache_key(path: PathLike) -> str:
+    return os.path.abspath(str(path))
+
+
+def _stat_signature(path: PathLike) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def load_json_file(
+    path: PathLike,
+    default: T,
+    *,
+    copy_result: bool = False,
+    strict: bool = False,
+) -> T:
     """
-    Load JSON store by name. If file is missing or invalid, return default.
+    Load JSON document from path through the shared in-memory store cache.
+
+    The parsed document is kept in memory and re-validated with a single stat()
+    (mtime + size + inode); the file is re-parsed only when it actually changed.
+
+    The returned document is shared between callers and must be treated as read-only.
+    Pass copy_result=True when the caller is going to mutate it before saving.
+
+    Missing or empty file -> default.
+    Invalid JSON -> default, or json.JSONDecodeError / UnicodeDecodeError if strict=True.
     """
-    path = get_store_path(name)
-    if not path.exists():
+    key = _cache_key(path)
+
+    pending = _get_pending(key)
+    if pending is not None:
+        data = pending[0]
+        return copy.deepcopy(data) if copy_result else data
+
+    signature = _stat_signature(key)
+    if signature is None:
         return default
+
+    with _CACHE_LOCK:
+        cached = _CACHE.get(key)
+    if cached is not None and cached[0] == signature:
+        data = cached[1]
+        return copy.deepcopy(data) if copy_result else data
+
     try:
-        with path.open("r", encoding="utf-8") as f:
-            return json.load(f)  # type: ignore[return-value]
-    except Exception:
-        # If file is broken, do not crash API, just return default.
+        with open(key, "rb") as f:
+            raw = f.read()
+        if not raw.strip():
+            return default
+        data = json.loads(raw)
+    except (ValueError, OSError) as exc:
+        if strict and isinstance(exc, ValueError):
+            raise
+        logger.warning("JSON_STORE_LOAD_FAILED: path=%s error=%s", key, exc)
         return default
 
+    with _CACHE_LOCK:
+        _CACHE[key] = (signature, data)
+
+    return copy.deepcopy(data) if copy_result else data  # type: ignore[return-value]
+
+
+def save_json_file(
+    path: PathLike,
+    data: Any,
+    *,
+    ensure_ascii: bool = False,
+    indent: Optional[int] = 2,
+    sort_keys: bool = False,
+) -> None:
+    """
+    Save JSON document atomically (tmp + os.replace) and refresh the cache entry.
+
+    Inside store_transaction() the write is deferred to the end of the scope.
+    With env JSON_STORE_WRITE_BEHIND_MS > 0 the write is deferred for that window,
+    so repeated saves of the same store are coalesced into one disk write.
+    Deferred documents are visible to load_json_file immediately.
+
+    Ownership of data passes to the cache: callers must not mutate it after saving.
+    """
+    key = _cache_key(path)
+    options: _DumpOptions = (ensure_ascii, indent, sort_keys)
+
+    with _PENDING_LOCK:
+        seq = _SAVES.get(key, (0, 0.0))[0]
+        _SAVES[key] = (seq + 1, time.time())
+
+    tx = _TX.get()
+    if tx is not None:
+        tx[key] = (data, options)
+        return
+
+    window_sec = _write_behind_window_sec()
+    if window_sec > 0:
+        _schedule_write_behind(key, data, options, window_sec)
+        return
+
+    with _WRITE_LOCK:
+        with _PENDING_LOCK:
+            _PENDING.pop(key, None)
+        _write_files({key: (data, options)})
+
+
+def _get_pending(key: str) -> Optional[Tuple[Any, _DumpOptions]]:
+    tx = _TX.get()
+    if tx is not None and key in tx:
+        return tx[key]
+    with _PENDING_LOCK:
+        return _PENDING.get(key)
+
+
+def _write_behind_window_sec() -> float:
+    try:
+        return max(0.0, float(os.getenv("JSON_STORE_WRITE_BEHIND_MS", "0")) / 1000.0)
+    except ValueError:
+        return 0.0
+
+
+def _schedule_write_behind(key: str, data: Any, options: _DumpOptions, window_sec: float) -> None:
+    with _PENDING_LOCK:
+        _PENDING[key] = (data, options)
+        _arm_flush_timer(window_sec)
+
+
+def _arm_flush_timer(window_sec: float) -> None:
+    """
+    Start the coalescing timer unless one is pending. Caller holds _PENDING_LOCK.
+    """
+    global _FLUSH_TIMER
+
+    if _FLUSH_TIMER is None:
+        _FLUSH_TIMER = threading.Timer(window_sec, flush_pending_writes)
+        _FLUSH_TIMER.daemon = True
+        _FLUSH_TIMER.start()
+
+
+def _write_files(docs: Dict[str, Tuple[Any, _DumpOptions]]) -> None:
+    """
+    Group commit: serialize every document into its tmp file first, then os.replace all.
+
+    If serialization of any document fails, no store file is touched.
+    """
+    written = []
+    try:
+        for key, (data, (ensure_ascii, indent, sort_keys)) in docs.items():
+            os.makedirs(os.path.dirname(key), exist_ok=True)
+            tmp_path = key + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=ensure_ascii, indent=indent, sort_keys=sort_keys)
+            written.append((key, tmp_path))
+    except Exception:
+        for key, tmp_path in written:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        for key in docs:
+            invalidate_json_cache(key)
+        raise
+
+    for key, tmp_path in written:
+        try:
+            os.replace(tmp_path, key)
+        except Exception:
+            invalidate_json_cache(key)
+            raise
+
+        signature = _stat_signature(key)
+        with _CACHE_LOCK:
+            if signature is None:
+                _CACHE.pop(key, None)
+            else:
+                _CACHE[key] = (signature, docs[key][0])
+
+
+def flush_pending_writes() -> int:
+    """
+    Write all write-behind documents now. Returns number of stores written.
+
+    Called by the coalescing timer and on application shutdown.
+    Documents stay visible as pending until they are on disk; a failed flush keeps
+    them pending and re-arms the timer for the next attempt.
+    """
+    global _FLUSH_TIMER
+
+    with _WRITE_LOCK:
+        with _PENDING_LOCK:
+            docs = dict(_PENDING)
+            if _FLUSH_TIMER is not None:
+                _FLUSH_TIMER.cancel()
+                _FLUSH_TIMER = None
+
+        if not docs:
+            return 0
+
+        try:
+            _write_files(docs)
+        except Exception as exc:
+            logger.warning("JSON_STORE_FLUSH_FAILED: stores=%s error=%s", len(docs), exc)
+            with _PENDING_LOCK:
+                _arm_flush_timer(max(_write_behind_window_sec(), _FLUSH_RETRY_SEC))
+            return 0
+
+        with _PENDING_LOCK:
+            for key, entry in docs.items():
+                # A newer save may have replaced the entry while writing: keep it.
+                if _PENDING.get(key) is entry:
+                    _PENDING.pop(key, None)
+
+    return len(docs)
+
+
+def flush_pending_write(path: PathLike) -> bool:
+    """
+    Write the write-behind document of one store now (True if there was one).
+
+    Called by store_lock before an exclusive lock is released, so other processes
+    never read a store that this process has already changed under the lock.
+    Raises if the write fails (the document stays pending).
+    """
+    key = _cache_key(path)
+    with _WRITE_LOCK:
+        with _PENDING_LOCK:
+            entry = _PENDING.get(key)
+        if entry is None:
+            return False
+        _write_files({key: entry})
+        with _PENDING_LOCK:
+            if _PENDING.get(key) is entry:
+                _PENDING.pop(key, None)
+    return True
+
+
+@contextmanager
+def store_transaction() -> Iterator[None]:
+    """
+    Defer all save_json_file calls inside the scope and commit them at the end.
+
+    - Repeated saves of the same store are coalesced: only the last document is written.
+    - Saved documents are visible to load_json_file inside the scope only.
+    - On exception nothing is written (all-or-nothing).
+    - Nested scopes join the outermost one.
+    """
+    if _TX.get() is not None:
+        yield
+        return
+
+    docs: Dict[str, Tuple[Any, _DumpOptions]] = {}
+    token = _TX.set(docs)
+    try:
+        yield
+    except BaseException:
+        _TX.reset(token)
+        if docs:
+            logger.warning("JSON_STORE_TRANSACTION_ROLLED_BACK: stores=%s", len(docs))
+        raise
+
+    _TX.reset(token)
+    if docs:
+        with _WRITE_LOCK:
+            with _PENDING_LOCK:
+                for key in docs:
+                    _PENDING.pop(key, None)
+            _write_files(docs)
+
+
+def store_version(path: PathLike) -> Optional[Tuple[str, float]]:
+    """
+    Version of the store document: (token, last_modified epoch seconds), None if missing.
+
+    The token changes whenever the document changes. On disk it is the stat signature
+    the cache already validates with; a deferred (not yet written) document adds the
+    save sequence of this process. Used for HTTP validators (see app.core.http_cache).
+    """
+    key = _cache_key(path)
+    signature = _stat_signature(key)
+    disk = "-" if signature is None else "%x.%x.%x" % signature
+
+    if _get_pending(key) is not None:
+        with _PENDING_LOCK:
+            seq, saved_at = _SAVES.get(key, (0, time.time()))
+        return f"{disk}+{seq}", saved_at
+
+    if signature is None:
+        return None
+    return disk, signature[0] / 1e9
+
+
+def invalidate_json_cache(path: Optional[PathLike] = None) -> None:
+    """
+    Drop cached document for path (or the whole cache if path is None).
+    """
+    with _CACHE_LOCK:
+        if path is None:
+            _CACHE.clear()
+        else:
+            _CACHE.pop(_cache_key(path), None)
+
+
+def load_json_store(name: str, default: T) -> T:
+    """
+    Load JSON store by name. If file is missing or invalid, return default.
+    """
+    return load_json_file(get_store_path(name), default)
+
 
 def save_json_store(name: str, data: Any) -> None:
     """
     Save JSON store by name. Creates file if needed.
     """
-    path = get_store_path(name)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    save_json_file(get_store_path(name), data)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Union
+
+from app.core.store_json import flush_pending_write
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: fall back to in-process locking only.
+    fcntl = None  # type: ignore[assignment]
+
+PathLike = Union[str, Path]
+
+# Locks held by the current thread: lock path -> {"fd", "shared"}.
+_LOCAL = threading.local()
+
+# Used when fcntl is unavailable (single process only).
+_FALLBACK_LOCKS: Dict[str, threading.RLock] = {}
+_FALLBACK_GUARD = threading.Lock()
+
+
+def _lock_path(path: PathLike) -> str:
+    return os.path.abspath(str(path)) + ".lock"
+
+
+def _held() -> Dict[str, Dict[str, object]]:
+    held = getattr(_LOCAL, "held", None)
+    if held is None:
+        held = {}
+        _LOCAL.held = held
+    return held
+
+
+@contextmanager
+def store_lock(path: PathLike, *, shared: bool = False) -> Iterator[None]:
+    """
+    Cross-process advisory lock for a store file (fcntl.flock on "<store>.lock").
+
+    - shared=True: readers, many holders at once
+    - shared=False: writers, exclusive; hold it across the whole load -> modify -> save
+
+    Reentrant within a thread: nested locks on the same store join the outer one.
+    Take the exclusive lock first if the scope may write (shared -> exclusive
+    upgrade raises RuntimeError).
+
+    Lock order: acquire store locks before any module-level threading lock,
+    otherwise a thread blocked in flock() can hold the threading lock forever.
+    Without fcntl (Windows) this degrades to a per-store in-process RLock.
+
+    Releasing an exclusive lock first writes a write-behind document of the store
+    (store_json), so the next holder in any process reads what was saved here.
+    """
+    key = _lock_path(path)
+
+    if fcntl is None:
+        with _FALLBACK_GUARD:
+            rlock = _FALLBACK_LOCKS.setdefault(key, threading.RLock())
+        with rlock:
+            yield
+            if not shared:
+                flush_pending_write(path)
+        return
+
+    held = _held()
+    entry = held.get(key)
+
+    if entry is not None:
+        if not shared and entry["shared"]:
+            # flock upgrades are not atomic: two shared holders upgrading deadlock.
+            raise RuntimeError(f"STORE_LOCK_UPGRADE_NOT_SUPPORTED: {key}")
+        yield
+        return
+
+    os.makedirs(os.path.dirname(key) or ".", exist_ok=True)
+    fd = os.open(key, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        held[key] = {"fd": fd, "shared": shared}
+        try:
+            yield
+            if not shared:
+                flush_pending_write(path)
+        finally:
+            held.pop(key, None)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def store_locks(*paths: PathLike, shared: bool = False) -> Iterator[None]:
+    """
+    Lock several stores at once. Locks are taken in sorted path order so that
+    concurrent multi-store writers cannot deadlock each other.
+    """
+    ordered: List[str] = sorted({os.path.abspath(str(p)) for p in paths})
+    with ExitStack() as stack:
+        for p in ordered:
+            stack.enter_context(store_lock(p, shared=shared))
+        yield
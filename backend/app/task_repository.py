@@ -0,0 +1,833 @@
+from __future__ import annotations
+
+import bisect
+import heapq
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.store_json import load_json_file, save_json_file
+from app.core.store_locks import store_lock
+
+logger = logging.getLogger(__name__)
+
+# This file lives in app/core/task_repository.py
+# BASE_DIR points to backend root (where tasks_store.json and data/app.db are placed).
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+DEFAULT_JSON_PATH = BASE_DIR / "tasks_store.json"
+DEFAULT_SQLITE_PATH = BASE_DIR / "data" / "app.db"
+
+# update_task callback: private copy of the task (None if missing) -> task to save,
+# or None to leave the store unchanged.
+TaskUpdater = Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]
+
+# Task documents keep their original JSON shape; indexed columns are derived from them.
+_TABLE = "task_store"
+
+# Indexed columns sorted pages can use (see TaskRepository.page_tasks_sorted).
+TASK_SORT_COLUMNS = ("client_id", "status", "deadline")
+
+# (sort value or None, store position) of the last task of a sorted page.
+SortPosition = Tuple[Optional[str], int]
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {_TABLE} (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    client_id TEXT,
+    status TEXT,
+    deadline TEXT,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_{_TABLE}_client_id ON {_TABLE}(client_id);
+CREATE INDEX IF NOT EXISTS ix_{_TABLE}_status ON {_TABLE}(status);
+CREATE INDEX IF NOT EXISTS ix_{_TABLE}_deadline ON {_TABLE}(deadline);
+CREATE TABLE IF NOT EXISTS {_TABLE}_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def task_client_id(task: Dict[str, Any]) -> Optional[str]:
+    """
+    Client key of a task. Tasks evolved over time, so several fields are tolerated:
+    client_id, clientId, client.id, client_code.
+    """
+    cid = task.get("client_id")
+    if cid is None:
+        cid = task.get("clientId")
+    if cid is None:
+        c = task.get("client")
+        if isinstance(c, dict):
+            cid = c.get("id") or c.get("client_id") or c.get("clientId")
+    if cid is None:
+        cid = task.get("client_code")
+    return str(cid) if cid is not None else None
+
+
+def _task_deadline(task: Dict[str, Any]) -> Optional[str]:
+    dl = task.get("deadline")
+    return str(dl) if dl is not None else None
+
+
+def _task_sort_value(task: Dict[str, Any], column: str) -> Optional[str]:
+    # Same values as the SQLite columns; empty values count as missing.
+    if column == "client_id":
+        value = task_client_id(task)
+    elif column == "deadline":
+        value = _task_deadline(task)
+    else:
+        raw = task.get(column)
+        value = str(raw) if raw is not None else None
+    return value or None
+
+
+def _task_matches(
+    task: Dict[str, Any],
+    client_id: Optional[str],
+    status: Optional[str],
+    deadline_from: Optional[str],
+    deadline_before: Optional[str],
+) -> bool:
+    if client_id is not None and task_client_id(task) != str(client_id):
+        return False
+    if status is not None and task.get("status") != status:
+        return False
+    if deadline_from is not None or deadline_before is not None:
+        dl = _task_deadline(task)
+        if dl is None:
+            return False
+        if deadline_from is not None and dl < deadline_from:
+            return False
+        if deadline_before is not None and dl >= deadline_before:
+            return False
+    return True
+
+
+class TaskRepository:
+    """
+    Storage-agnostic access to task documents (plain dicts in the tasks_store.json shape).
+
+    Filters:
+      - client_id: see task_client_id()
+      - status: exact match
+      - deadline_from (inclusive) / deadline_before (exclusive): ISO string comparison
+    """
+
+    backend = "base"
+
+    def list_tasks(
+        self,
+        *,
+        client_id: Optional[str] = None,
+        status: Optional[str] = None,
+        deadline_from: Optional[str] = None,
+        deadline_before: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def page_tasks(
+        self,
+        *,
+        client_id: Optional[str] = None,
+        status: Optional[str] = None,
+        deadline_from: Optional[str] = None,
+        deadline_before: Optional[str] = None,
+        after: Optional[int] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        One page in store order: tasks after store position `after` (exclusive).
+
+        Returns (tasks, position of the last returned task or None when there
+        are no more tasks); pass that position as `after` for the next page.
+        """
+        raise NotImplementedError
+
+    def list_undated_tasks(self, *, client_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Tasks without a deadline (missing or empty), in store order.
+        """
+        return [t for t in self.list_tasks(client_id=client_id) if isinstance(t, dict) and not _task_deadline(t)]
+
+    def page_tasks_sorted(
+        self,
+        sort_by: str,
+        *,
+        descending: bool = False,
+        client_id: Optional[str] = None,
+        status: Optional[str] = None,
+        deadline_from: Optional[str] = None,
+        deadline_before: Optional[str] = None,
+        after: Optional[SortPosition] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Dict[str, Any]], Optional[SortPosition]]:
+        """
+        One page ordered by an indexed column (TASK_SORT_COLUMNS), ties in store
+        order. Tasks without a value come last (first when descending).
+
+        Returns (tasks, position of the last returned task or None when there
+        are no more tasks); pass that position as `after` for the next page.
+        """
+        raise NotImplementedError
+
+    def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a private copy of the task (safe to mutate) or None.
+        """
+        raise NotImplementedError
+
+    def save_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Insert or replace task by id. Returns saved task.
+        """
+        self.save_tasks([task])
+        return task
+
+    def save_tasks(self, tasks: Iterable[Dict[str, Any]]) -> None:
+        """
+        Insert or replace many tasks by id in one write.
+        """
+        raise NotImplementedError
+
+    def update_task(self, task_id: str, update: TaskUpdater) -> Optional[Dict[str, Any]]:
+        """
+        Atomic read-modify-write of one task: update gets the current task (None if
+        missing) and returns the task to save. No other writer can change the task
+        in between. Returns the saved task, or None if update returned None.
+        """
+        raise NotImplementedError
+
+    def add_tasks_if_absent(self, tasks: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insert tasks whose id is not in the store yet. Returns inserted tasks.
+        """
+        raise NotImplementedError
+
+    def count(self) -> int:
+        return len(self.list_tasks())
+
+    def lock_paths(self) -> List[Path]:
+        """
+        Store files a multi-store writer must lock (see app.core.store_locks).
+        """
+        return []
+
+    def version_paths(self) -> List[Path]:
+        """
+        Files whose stat changes on every write (HTTP validators, see app.core.http_cache).
+        """
+        return self.lock_paths()
+
+
+class JsonTaskRepository(TaskRepository):
+    """
+    Tasks kept in tasks_store.json ({"tasks": [...]}, {"items": [...]} or a plain list).
+    """
+
+    backend = "json"
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or DEFAULT_JSON_PATH)
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Any]] = None
+
+    def _load(self) -> Tuple[List[Dict[str, Any]], Dict[str, Any], str]:
+        data = load_json_file(self.path, {"tasks": []})
+
+        if isinstance(data, list):
+            return data, {"tasks": data}, "tasks"
+
+        if isinstance(data, dict):
+            if "items" in data and isinstance(data["items"], list):
+                return data["items"], data, "items"
+            if "tasks" in data and isinstance(data["tasks"], list):
+                return data["tasks"], data, "tasks"
+
+        # Unknown shape -> normalize
+        container: Dict[str, Any] = {"tasks": []}
+        return container["tasks"], container, "tasks"
+
+    def _save(self, container: Dict[str, Any], key: str, tasks: List[Dict[str, Any]]) -> None:
+        out = dict(container)
+        out[key] = tasks
+        save_json_file(self.path, out)
+
+    def _get_index(self, tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Positions by client, by status, sorted by deadline and without deadline.
+
+        Rebuilt when the loaded list changes (the JSON cache hands out the same
+        list object until the file changes).
+        """
+        index = self._index
+        if index is not None and index["source"] is tasks:
+            return index
+
+        by_client: Dict[str, List[int]] = {}
+        by_status: Dict[Any, List[int]] = {}
+        deadlines: List[Tuple[str, int]] = []
+        undated: List[int] = []
+        for pos, t in enumerate(tasks):
+            if not isinstance(t, dict):
+                continue
+            by_client.setdefault(task_client_id(t) or "", []).append(pos)
+            by_status.setdefault(t.get("status"), []).append(pos)
+            dl = _task_deadline(t)
+            if dl is not None:
+                deadlines.append((dl, pos))
+            if not dl:
+                undated.append(pos)
+        deadlines.sort()
+
+        index = {
+            "source": tasks,
+            "by_client": by_client,
+            "by_status": by_status,
+            "deadline_keys": [d for d, _ in deadlines],
+            "deadline_pos": [p for _, p in deadlines],
+            "undated": undated,
+        }
+        self._index = index
+        return index
+
+    def list_tasks(
+        self,
+        *,
+        client_id: Optional[str] = None,
+        status: Optional[str] = None,
+        deadline_from: Optional[str] = None,
+        deadline_before: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        tasks, _, _ = self._load()
+        if client_id is None and status is None and deadline_from is None and deadline_before is None:
+            return tasks
+
+        positions = self._candidates(tasks, client_id, status, deadline_from, deadline_before)
+        return [
+            tasks[pos]
+            for pos in positions
+            if _task_matches(tasks[pos], client_id, status, deadline_from, deadline_before)
+        ]
+
+    def _candidates(
+        self,
+        tasks: List[Dict[str, Any]],
+        client_id: Optional[str],
+        status: Optional[str],
+        deadline_from: Optional[str],
+        deadline_before: Optional[str],
+    ) -> List[int]:
+        """
+        Sorted positions narrowed with the most selective index (all filters
+        still have to be checked).
+        """
+        if client_id is None and status is None and deadline_from is None and deadline_before is None:
+            return list(range(len(tasks)))
+
+        index = self._get_index(tasks)
+        candidates: List[List[int]] = []
+        if client_id is not None:
+            candidates.append(index["by_client"].get(str(client_id), []))
+        if status is not None:
+            candidates.append(index["by_status"].get(status, []))
+        if deadline_from is not None or deadline_before is not None:
+            keys = index["deadline_keys"]
+            lo = bisect.bisect_left(keys, deadline_from) if deadline_from is not None else 0
+            hi = bisect.bisect_left(keys, deadline_before) if deadline_before is not None else len(keys)
+            candidates.append(sorted(index["deadline_pos"][lo:hi]))
+        return min(candidates, key=len)
+
+    def page_tasks(
+        self,
+        *,
+        client_id: Optional[str] = None,
+        status: Optional[str] = None,
+        deadline_from: Optional[str] = None,
+        deadline_before: Optional[str] = None,
+        after: Optional[int] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        tasks, _, _ = self._load()
+        if client_id is None and status is None and deadline_from is None and deadline_before is None:
+            start = 0 if after is None else after + 1
+            positions: Iterable[int] = range(start, len(tasks))
+        else:
+            candidates = self._candidates(tasks, client_id, status, deadline_from, deadline_before)
+            start = 0 if after is None else bisect.bisect_right(candidates, after)
+            positions = candidates[start:]
+
+        page: List[Dict[str, Any]] = []
+        last: Optional[int] = None
+        for pos in positions:
+            t = tasks[pos]
+            if not isinstance(t, dict) or not _task_matches(t, client_id, status, deadline_from, deadline_before):
+                continue
+            if len(page) == limit:
+                return page, last
+            page.append(t)
+            last = pos
+        return page, None
+
+    def list_undated_tasks(self, *, client_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        tasks, _, _ = self._load()
+        return [
+            tasks[pos]
+            for pos in self._get_index(tasks)["undated"]
+            if _task_matches(tasks[pos], client_id, None, None, None)
+        ]
+
+    def page_tasks_sorted(
+        self,
+        sort_by: str,
+        *,
+        descending: bool = False,
+        client_id: Optional[str] = None,
+        status: Optional[str] = None,
+        deadline_from: Optional[str] = None,
+        deadline_before: Optional[str] = None,
+        after: Optional[SortPosition] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Dict[str, Any]], Optional[SortPosition]]:
+        if sort_by not in TASK_SORT_COLUMNS:
+            raise ValueError(f"Unsupported sort column: {sort_by}")
+        tasks, _, _ = self._load()
+
+        # (missing, value, position): ascending puts missing values last.
+        mark = (after[0] is None, after[0] or "", after[1]) if after is not None else None
+        keys: List[Tuple[bool, str, int]] = []
+        for pos in self._candidates(tasks, client_id, status, deadline_from, deadline_before):
+            t = tasks[pos]
+            if not isinstance(t, dict) or not _task_matches(t, client_id, status, deadline_from, deadline_before):
+                continue
+            value = _task_sort_value(t, sort_by)
+            key = (value is None, value or "", pos)
+            if mark is None or (key < mark if descending else key > mark):
+                keys.append(key)
+
+        # The whole store is in memory anyway; only the page is sorted.
+        pick = heapq.nlargest if descending else heapq.nsmallest
+        selected = pick(limit + 1, keys)
+        page = [tasks[pos] for _, _, pos in selected[:limit]]
+        if len(selected) <= limit:
+            return page, None
+        missing, value, pos = selected[limit - 1]
+        return page, (None if missing else value, pos)
+
+    def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        tasks, _, _ = self._load()
+        for t in tasks:
+            if isinstance(t, dict) and str(t.get("id")) == str(task_id):
+                return dict(t)
+        return None
+
+    def save_tasks(self, tasks: Iterable[Dict[str, Any]]) -> None:
+        incoming = list(tasks)
+        if not incoming:
+            return
+        with store_lock(self.path), self._lock:
+            current, container, key = self._load()
+            out = list(current)
+            positions = {str(t.get("id")): idx for idx, t in enumerate(out) if isinstance(t, dict)}
+            for task in incoming:
+                tid = str(task.get("id"))
+                idx = positions.get(tid)
+                if idx is None:
+                    positions[tid] = len(out)
+                    out.append(task)
+                else:
+                    out[idx] = task
+            self._save(container, key, out)
+
+    def update_task(self, task_id: str, update: TaskUpdater) -> Optional[Dict[str, Any]]:
+        with store_lock(self.path), self._lock:
+            current, container, key = self._load()
+            idx = next(
+                (i for i, t in enumerate(current) if isinstance(t, dict) and str(t.get("id")) == str(task_id)),
+                None,
+            )
+            task = update(dict(current[idx]) if idx is not None else None)
+            if task is None:
+                return None
+            out = list(current)
+            if idx is None:
+                out.append(task)
+            else:
+                out[idx] = task
+            self._save(container, key, out)
+        return task
+
+    def add_tasks_if_absent(self, tasks: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with store_lock(self.path), self._lock:
+            current, container, key = self._load()
+            existing_ids = {t.get("id") for t in current if isinstance(t, dict)}
+            added: List[Dict[str, Any]] = []
+            for task in tasks:
+                if task.get("id") in existing_ids:
+                    continue
+                existing_ids.add(task.get("id"))
+                added.append(task)
+            if added:
+                self._save(container, key, list(current) + added)
+        return added
+
+    def count(self) -> int:
+        tasks, _, _ = self._load()
+        return len(tasks)
+
+    def lock_paths(self) -> List[Path]:
+        return [self.path]
+
+
+class SqliteTaskRepository(TaskRepository):
+    """
+    Tasks kept in SQLite (WAL mode) with indexes on client_id, status and deadline.
+
+    The full task dict is stored as JSON in the doc column, so API responses keep
+    the tasks_store.json shape. Order of insertion is preserved via seq.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = str(db_path or DEFAULT_SQLITE_PATH)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            # isolation_level=None: autocommit, transactions are opened explicitly.
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row_values(task: Dict[str, Any]) -> Tuple[str, Optional[str], Optional[str], Optional[str], str]:
+        status = task.get("status")
+        return (
+            str(task.get("id")),
+            task_client_id(task),
+            str(status) if status is not None else None,
+            _task_deadline(task),
+            json.dumps(task, ensure_ascii=False),
+        )
+
+    def list_tasks(
+        self,
+        *,
+        client_id: Optional[str] = None,
+        status: Optional[str] = None,
+        deadline_from: Optional[str] = None,
+        deadline_before: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        where, params = self._where(client_id, status, deadline_from, deadline_before)
+
+        sql = f"SELECT doc FROM {_TABLE}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY seq"
+
+        rows = self._connect().execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    @staticmethod
+    def _where(
+        client_id: Optional[str],
+        status: Optional[str],
+        deadline_from: Optional[str],
+        deadline_before: Optional[str],
+    ) -> Tuple[List[str], List[Any]]:
+        where: List[str] = []
+        params: List[Any] = []
+        if client_id is not None:
+            where.append("client_id = ?")
+            params.append(str(client_id))
+        if status is not None:
+            where.append("status = ?")
+            params.append(status)
+        if deadline_from is not None:
+            where.append("deadline >= ?")
+            params.append(deadline_from)
+        if deadline_before is not None:
+            where.append("deadline < ?")
+            params.append(deadline_before)
+        return where, params
+
+    def page_tasks(
+        self,
+        *,
+        client_id: Optional[str] = None,
+        status: Optional[str] = None,
+        deadline_from: Optional[str] = None,
+        deadline_before: Optional[str] = None,
+        after: Optional[int] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        # Keyset on seq: cost follows the page size, not the table size.
+        where, params = self._where(client_id, status, deadline_from, deadline_before)
+        if after is not None:
+            where.append("seq > ?")
+            params.append(int(after))
+
+        sql = f"SELECT seq, doc FROM {_TABLE}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY seq LIMIT ?"
+        params.append(limit + 1)
+
+        rows = self._connect().execute(sql, params).fetchall()
+        page = [json.loads(row[1]) for row in rows[:limit]]
+        last = rows[limit - 1][0] if len(rows) > limit else None
+        return page, last
+
+    def list_undated_tasks(self, *, client_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        where, params = self._where(client_id, None, None, None)
+        where.append("(deadline IS NULL OR deadline = '')")
+        sql = f"SELECT doc FROM {_TABLE} WHERE " + " AND ".join(where) + " ORDER BY seq"
+        rows = self._connect().execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def page_tasks_sorted(
+        self,
+        sort_by: str,
+        *,
+        descending: bool = False,
+        client_id: Optional[str] = None,
+        status: Optional[str] = None,
+        deadline_from: Optional[str] = None,
+        deadline_before: Optional[str] = None,
+        after: Optional[SortPosition] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Dict[str, Any]], Optional[SortPosition]]:
+        if sort_by not in TASK_SORT_COLUMNS:
+            raise ValueError(f"Unsupported sort column: {sort_by}")
+        col = sort_by
+        order = " DESC" if descending else ""
+        op = "<" if descending else ">"
+
+        # Keyset on (col, seq): the column index stores seq (the rowid) with every
+        # entry, so tasks with a value are read in index order and the scan stops
+        # at the page size. Tasks without a value (usually few) are a second query.
+        parts = [
+            (True, f"{col} > ''", f"{col}{order}, seq{order}"),
+            (False, f"({col} IS NULL OR {col} = '')", f"seq{order}"),
+        ]
+        if descending:
+            parts.reverse()
+
+        rows: List[Any] = []
+        reached = after is None
+        for has_value, condition, order_by in parts:
+            where, params = self._where(client_id, status, deadline_from, deadline_before)
+            where.append(condition)
+            if not reached:
+                if (after[0] is not None) != has_value:
+                    continue
+                reached = True
+                if has_value:
+                    where.append(f"({col}, seq) {op} (?, ?)")
+                    params += [after[0], int(after[1])]
+                else:
+                    where.append(f"seq {op} ?")
+                    params.append(int(after[1]))
+
+            sql = f"SELECT seq, {col}, doc FROM {_TABLE} WHERE " + " AND ".join(where)
+            sql += f" ORDER BY {order_by} LIMIT ?"
+            params.append(limit + 1 - len(rows))
+            rows += self._connect().execute(sql, params).fetchall()
+            if len(rows) > limit:
+                break
+
+        page = [json.loads(row[2]) for row in rows[:limit]]
+        if len(rows) <= limit:
+            return page, None
+        seq, value, _ = rows[limit - 1]
+        return page, (value or None, seq)
+
+    def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            f"SELECT doc FROM {_TABLE} WHERE id = ?", (str(task_id),)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_tasks(self, tasks: Iterable[Dict[str, Any]]) -> None:
+        rows = [self._row_values(t) for t in tasks]
+        if not rows:
+            return
+        conn = self._connect()
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    f"""
+                    INSERT INTO {_TABLE} (id, client_id, status, deadline, doc)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        client_id = excluded.client_id,
+                        status = excluded.status,
+                        deadline = excluded.deadline,
+                        doc = excluded.doc
+                    """,
+                    rows,
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def update_task(self, task_id: str, update: TaskUpdater) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        with self._write_lock:
+            # BEGIN IMMEDIATE takes the write lock before the read: no lost updates.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(f"SELECT doc FROM {_TABLE} WHERE id = ?", (str(task_id),)).fetchone()
+                task = update(json.loads(row[0]) if row else None)
+                if task is not None:
+                    conn.execute(
+                        f"""
+                        INSERT INTO {_TABLE} (id, client_id, status, deadline, doc)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT(id) DO UPDATE SET
+                            client_id = excluded.client_id,
+                            status = excluded.status,
+                            deadline = excluded.deadline,
+                            doc = excluded.doc
+                        """,
+                        self._row_values(task),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return task
+
+    def add_tasks_if_absent(self, tasks: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        added: List[Dict[str, Any]] = []
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for task in tasks:
+                    cur = conn.execute(
+                        f"""
+                        INSERT OR IGNORE INTO {_TABLE} (id, client_id, status, deadline, doc)
+                        VALUES (?, ?, ?, ?, ?)
+                        """,
+                        self._row_values(task),
+                    )
+                    if cur.rowcount:
+                        added.append(task)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def count(self) -> int:
+        row = self._connect().execute(f"SELECT COUNT(*) FROM {_TABLE}").fetchone()
+        return int(row[0]) if row else 0
+
+    def version_paths(self) -> List[Path]:
+        # Commits land in the WAL first, checkpoints rewrite the main file.
+        return [Path(self.db_path), Path(self.db_path + "-wal")]
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._connect().execute(
+            f"SELECT value FROM {_TABLE}_meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        self._connect().execute(
+            f"INSERT OR REPLACE INTO {_TABLE}_meta (key, value) VALUES (?, ?)", (key, value)
+        )
+
+
+def migrate_json_to_sqlite(
+    json_path: Optional[Path] = None,
+    db_path: Optional[Path] = None,
+    *,
+    force: bool = False,
+) -> int:
+    """
+    One-shot migration of tasks_store.json into SQLite.
+
+    The migration is recorded in the meta table and is skipped on later calls
+    unless force=True. Returns number of migrated tasks.
+    """
+    source = JsonTaskRepository(json_path)
+    target = SqliteTaskRepository(db_path)
+
+    if not force and target.get_meta("migrated_from_json"):
+        return 0
+
+    tasks = [t for t in source.list_tasks() if isinstance(t, dict) and t.get("id") is not None]
+    target.save_tasks(tasks)
+    target.set_meta(
+        "migrated_from_json",
+        json.dumps({"path": str(source.path), "count": len(tasks), "at": datetime.utcnow().isoformat() + "Z"}),
+    )
+
+    logger.info("TASK_STORE_MIGRATED_TO_SQLITE: count=%s path=%s", len(tasks), source.path)
+    return len(tasks)
+
+
+_REPOSITORY: Optional[TaskRepository] = None
+_REPOSITORY_LOCK = threading.Lock()
+
+
+def get_task_repository() -> TaskRepository:
+    """
+    Return process-wide task repository.
+
+    Backend is selected by env TASKS_STORE_BACKEND: "json" (default) or "sqlite".
+    SQLite file: env TASKS_SQLITE_PATH or data/app.db. On first use the SQLite
+    backend imports the existing tasks_store.json once.
+    """
+    global _REPOSITORY
+
+    if _REPOSITORY is not None:
+        return _REPOSITORY
+
+    with _REPOSITORY_LOCK:
+        if _REPOSITORY is None:
+            backend = os.getenv("TASKS_STORE_BACKEND", "json").strip().lower()
+            if backend == "sqlite":
+                db_path = Path(os.getenv("TASKS_SQLITE_PATH", str(DEFAULT_SQLITE_PATH)))
+                try:
+                    migrate_json_to_sqlite(DEFAULT_JSON_PATH, db_path)
+                except Exception:
+                    logger.exception("TASK_STORE_MIGRATION_FAILED")
+                _REPOSITORY = SqliteTaskRepository(db_path)
+            else:
+                _REPOSITORY = JsonTaskRepository(DEFAULT_JSON_PATH)
+            logger.info("TASK_REPOSITORY_SELECTED: backend=%s", _REPOSITORY.backend)
+
+    return _REPOSITORY
+
+
+if __name__ == "__main__":
+    # python -m app.core.task_repository [--force]
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    count = migrate_json_to_sqlite(
+        DEFAULT_JSON_PATH,
+        Path(os.getenv("TASKS_SQLITE_PATH", str(DEFAULT_SQLITE_PATH))),
+        force="--force" in sys.argv[1:],
+    )
+    print(f"migrated tasks: {count}")
@@ -2,98 +2,147 @@ from __future__ import annotations
 
 import csv
 import io
-import os
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
-import httpx
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import PlainTextResponse
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.core.task_repository import TaskRepository, get_task_repository
 
 router = APIRouter()
 
-# Base URL for calling this backend from inside container
-BACKEND_BASE = os.getenv("SELF_BASE_URL", "http://127.0.0.1:8000")
+# Export header when there are no tasks and no columns were requested.
+EMPTY_EXPORT_COLUMNS = ["id", "title", "assignee", "status"]
+# Tasks read from the repository per page while exporting.
+EXPORT_PAGE_SIZE = 500
+# CSV text is sent in chunks of about this many characters.
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+def _task_assignee(task: Dict[str, Any]) -> str:
+    return (
+        task.get("assignee")
+        or task.get("assigned_to")
+        or task.get("user")
+        or task.get("owner")
+        or task.get("responsible")
+        or "unassigned"
+    )
 
 
-async def _get_json(path: str):
-    """
-    Internal HTTP client to this backend.
-    Path must start with '/' (e.g. '/api/tasks').
-    """
-    url = BACKEND_BASE.rstrip("/") + path
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        resp = await client.get(url)
-    resp.raise_for_status()
-    return resp.json()
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date, expected YYYY-MM-DD")
+
+
+def _parse_columns(value: Optional[str]) -> Optional[List[str]]:
+    if not value:
+        return None
+    columns = [c.strip() for c in value.split(",") if c.strip()]
+    return columns or None
 
 
 @router.get("/api/tasks/report/today_by_assignee")
-async def tasks_report_today_by_assignee():
+def tasks_report_today_by_assignee(
+    day: Optional[str] = Query(None, alias="date", description="Only tasks with deadline on this day (YYYY-MM-DD)"),
+):
     """
     Build simple report: number of tasks per assignee.
-    Try /api/tasks/today first, then /api/tasks.
+    Reads the task repository directly; with ?date= only tasks due that day
+    are counted (deadline index).
 
     Response format:
     { "items": [ {"assignee": "...", "tasks_count": N}, ... ] }
     """
-    try:
-        tasks = await _get_json("/api/tasks/today")
-    except httpx.HTTPError:
-        tasks = await _get_json("/api/tasks")
-
-    if not isinstance(tasks, list):
-        raise HTTPException(status_code=502, detail="Unexpected tasks format")
+    d = _parse_date(day)
+    repo = get_task_repository()
+    if d is None:
+        tasks = repo.list_tasks()
+    else:
+        tasks = repo.list_tasks(
+            deadline_from=d.isoformat(),
+            deadline_before=(d + timedelta(days=1)).isoformat(),
+        )
 
-    summary = {}
+    summary: Dict[str, int] = {}
     for t in tasks:
-        assignee = (
-            t.get("assignee")
-            or t.get("assigned_to")
-            or t.get("user")
-            or t.get("owner")
-            or t.get("responsible")
-            or "unassigned"
-        )
+        if not isinstance(t, dict):
+            continue
+        assignee = _task_assignee(t)
         summary[assignee] = summary.get(assignee, 0) + 1
 
     items = [{"assignee": k, "tasks_count": v} for k, v in summary.items()]
     return {"items": items}
 
 
-@router.get("/api/tasks/export", response_class=PlainTextResponse)
-async def tasks_export():
+def _iter_tasks(repo: TaskRepository, **filters: Any) -> Iterator[Dict[str, Any]]:
     """
-    Export tasks to CSV using /api/tasks JSON.
+    Tasks in store order, read page by page (only one page in memory).
     """
-    tasks = await _get_json("/api/tasks")
-
-    if not isinstance(tasks, list):
-        raise HTTPException(status_code=502, detail="Unexpected tasks format")
-
-    if not tasks:
-        headers = ["id", "title", "assignee", "status"]
-        text = ",".join(headers) + "\n"
-        return PlainTextResponse(
-            content=text,
-            media_type="text/csv",
-            headers={"Content-Disposition": 'attachment; filename="tasks.csv"'},
-        )
+    after: Optional[int] = None
+    while True:
+        page, after = repo.page_tasks(after=after, limit=EXPORT_PAGE_SIZE, **filters)
+        for item in page:
+            if isinstance(item, dict):
+                yield item
+        if after is None:
+            return
 
-    # Collect all keys from all items
-    keys = sorted({k for item in tasks for k in item.keys()})
 
+def _iter_csv(columns: List[str], tasks: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """
+    Yield CSV text in chunks of about EXPORT_CHUNK_SIZE characters.
+    """
     buf = io.StringIO()
     writer = csv.writer(buf)
-    writer.writerow(keys)
 
+    def _flush() -> str:
+        text = buf.getvalue()
+        buf.seek(0)
+        buf.truncate(0)
+        return text
+
+    writer.writerow(columns)
     for item in tasks:
-        row = [item.get(k, "") for k in keys]
-        writer.writerow(row)
+        writer.writerow([item.get(k, "") for k in columns])
+        if buf.tell() >= EXPORT_CHUNK_SIZE:
+            yield _flush()
 
-    csv_text = buf.getvalue()
-    buf.close()
+    tail = _flush()
+    if tail:
+        yield tail
 
-    return PlainTextResponse(
-        content=csv_text,
+
+@router.get("/api/tasks/export")
+def tasks_export(
+    columns: Optional[str] = Query(None, description="Comma-separated columns, e.g. id,title,status,deadline"),
+    client_id: Optional[str] = None,
+    status: Optional[str] = None,
+):
+    """
+    Export tasks to CSV, streamed in chunks while the task repository is read
+    page by page.
+
+    Without ?columns= the header is the union of keys of all exported tasks
+    (an extra paged pass over the tasks); pass columns to skip it.
+    """
+    repo = get_task_repository()
+    filters = {"client_id": client_id, "status": status}
+
+    cols = _parse_columns(columns)
+    if cols is None:
+        keys: set = set()
+        for item in _iter_tasks(repo, **filters):
+            keys.update(item.keys())
+        cols = sorted(keys) or EMPTY_EXPORT_COLUMNS
+
+    return StreamingResponse(
+        _iter_csv(cols, _iter_tasks(repo, **filters)),
         media_type="text/csv",
         headers={"Content-Disposition": 'attachment; filename="tasks.csv"'},
     )
@@ -6,7 +6,7 @@ from datetime import datetime
 
 from sqlalchemy.orm import Session
 
-from app.core.events import get_event_system, EventTypes
+from app.core.event_system import get_event_system, EventTypes
 from app.models.task import Task
 from app.schemas.task import TaskCreate, TaskUpdate
 
@@ -0,0 +1,123 @@
+"""
+Local fake Dolibarr REST API for the mirror / proxy (no Dolibarr needed).
+
+Replays backend/_debug_clients_sample.json, _debug_invoices_sample.json and
+_debug_products_sample.json as /api/index.php/{thirdparties,invoices,products}
+with Dolibarr paging (limit, page, sortfield t.rowid, 404 on an empty page) and
+the sqlfilters forms used by the mirror: (t.tms:>=:'YYYY-MM-DD HH:MM:SS') and
+(t.rowid:>:N), joined with "and".
+
+    python scripts/fake_dolibarr.py --port 8282 [--copies 50]
+
+then run the backend with DOLI_API_URL=http://127.0.0.1:8282/api/index.php
+DOLI_API_KEY=test. --copies multiplies the samples (new ids) for paging tests.
+"""
+
+import argparse
+import json
+import re
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+SAMPLES = {
+    "thirdparties": "_debug_clients_sample.json",
+    "invoices": "_debug_invoices_sample.json",
+    "products": "_debug_products_sample.json",
+}
+
+_TMS_FILTER = re.compile(r"\(t\.tms:>=:'([^']+)'\)")
+_ROWID_FILTER = re.compile(r"\(t\.rowid:>:(\d+)\)")
+
+
+def _modified(record):
+    value = record.get("date_modification")
+    if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+        return int(value)
+    try:
+        return int(datetime.fromisoformat(str(value)).replace(tzinfo=timezone.utc).timestamp())
+    except ValueError:
+        return 0
+
+
+def load_records(copies=1):
+    data = {}
+    for entity, name in SAMPLES.items():
+        samples = json.loads((BACKEND_DIR / name).read_text(encoding="utf-8-sig"))
+        records = []
+        for n in range(copies):
+            for r in samples:
+                r = dict(r)
+                r["id"] = str(len(records) + 1)
+                records.append(r)
+        data[entity] = records
+    return data
+
+
+def make_handler(data, pagination=True):
+    """
+    Request handler serving data ({entity: [records]}; changes to it are served
+    live). pagination=False ignores pagination_data like older Dolibarr versions.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code, body):
+            raw = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            entity = url.path.rstrip("/").rsplit("/", 1)[-1]
+            if entity not in data:
+                return self._send(404, {"error": {"code": 404, "message": "Not found"}})
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            if not query.get("DOLAPIKEY"):
+                return self._send(401, {"error": {"code": 401, "message": "Unauthorized"}})
+
+            records = sorted(data[entity], key=lambda r: int(r["id"]))
+            match = _TMS_FILTER.search(query.get("sqlfilters", ""))
+            if match:
+                since = datetime.fromisoformat(match.group(1)).replace(tzinfo=timezone.utc).timestamp()
+                records = [r for r in records if _modified(r) >= since]
+            match = _ROWID_FILTER.search(query.get("sqlfilters", ""))
+            if match:
+                records = [r for r in records if int(r["id"]) > int(match.group(1))]
+
+            limit = int(query.get("limit", 100))
+            page = int(query.get("page", 0))
+            chunk = records[page * limit:(page + 1) * limit]
+            if not chunk:
+                return self._send(404, {"error": {"code": 404, "message": f"No {entity} found"}})
+            if query.get("properties"):
+                keep = query["properties"].split(",")
+                chunk = [{k: r.get(k) for k in keep} for r in chunk]
+            if pagination and query.get("pagination_data") == "true":
+                return self._send(200, {"data": chunk, "pagination": {"total": len(records), "page": page, "limit": limit}})
+            return self._send(200, chunk)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8282)
+    parser.add_argument("--copies", type=int, default=1)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(load_records(args.copies)))
+    print(f"Fake Dolibarr on http://{args.host}:{args.port}/api/index.php")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
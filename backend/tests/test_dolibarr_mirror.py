@@ -0,0 +1,203 @@
+"""
+Dolibarr mirror, /stats counts and page iterators against scripts/fake_dolibarr.py.
+
+    cd backend && python -m pytest tests
+"""
+
+import asyncio
+import importlib.util
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("httpx")
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+_spec = importlib.util.spec_from_file_location("fake_dolibarr", BACKEND_DIR / "scripts" / "fake_dolibarr.py")
+fake_dolibarr = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(fake_dolibarr)
+
+from app.core import dolibarr_http  # noqa: E402
+from app.core.dolibarr_mirror import DolibarrMirror  # noqa: E402
+
+
+def _serve(handler):
+    # Port 0: the OS picks a free port.
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def dolibarr(monkeypatch):
+    """
+    Fake Dolibarr on a free port; yields its live data ({entity: [records]}).
+    """
+    data = fake_dolibarr.load_records(copies=30)
+    server = _serve(fake_dolibarr.make_handler(data))
+    monkeypatch.setenv("DOLI_API_URL", f"http://127.0.0.1:{server.server_port}/api/index.php")
+    monkeypatch.setenv("DOLI_API_KEY", "test")
+    yield data
+    server.shutdown()
+    server.server_close()
+
+
+def _run(coro):
+    async def _main():
+        try:
+            return await coro
+        finally:
+            # The pooled client is bound to this test's event loop.
+            await dolibarr_http.close_dolibarr_client()
+
+    return asyncio.run(_main())
+
+
+def _mirror(tmp_path, monkeypatch):
+    monkeypatch.setenv("DOLI_MIRROR_PAGE_SIZE", "7")
+    monkeypatch.setenv("DOLI_MIRROR_OVERLAP_SEC", "0")
+    return DolibarrMirror(tmp_path / "mirror.db")
+
+
+def test_full_sync_mirrors_all_records(dolibarr, tmp_path, monkeypatch):
+    mirror = _mirror(tmp_path, monkeypatch)
+
+    async def scenario():
+        results = await mirror.sync_all()
+        invoices = await mirror.query("invoices", limit=1000)
+        return results, invoices, await mirror.is_ready("invoices"), await mirror.status()
+
+    results, invoices, ready, status = _run(scenario())
+
+    assert [r["mode"] for r in results] == ["full", "full", "full"]
+    assert [r["id"] for r in invoices] == [r["id"] for r in dolibarr["invoices"]]
+    assert ready
+    assert status["thirdparties"]["count"] == len(dolibarr["thirdparties"])
+
+
+def test_incremental_sync_picks_up_modified_records(dolibarr, tmp_path, monkeypatch):
+    mirror = _mirror(tmp_path, monkeypatch)
+
+    for n, record in enumerate(dolibarr["invoices"]):
+        record["date_modification"] = 1700000000 + n
+
+    async def scenario():
+        await mirror.sync("invoices")
+        changed = dict(dolibarr["invoices"][3], ref_client="CHANGED", date_modification=int(time.time()))
+        dolibarr["invoices"][3] = changed
+        result = await mirror.sync("invoices")
+        return result, await mirror.query("invoices", q="changed")
+
+    result, found = _run(scenario())
+
+    assert result["mode"] == "incremental"
+    # t.tms >= cursor: the newest record seen before and the changed one.
+    assert result["records"] == 2
+    assert [r["id"] for r in found] == [dolibarr["invoices"][3]["id"]]
+
+
+def test_full_sync_drops_deleted_records(dolibarr, tmp_path, monkeypatch):
+    mirror = _mirror(tmp_path, monkeypatch)
+
+    async def scenario():
+        await mirror.sync("invoices")
+        del dolibarr["invoices"][10:20]
+        await mirror.sync("invoices", full=True)
+        return await mirror.query("invoices", limit=1000)
+
+    invoices = _run(scenario())
+
+    assert [r["id"] for r in invoices] == [r["id"] for r in dolibarr["invoices"]]
+
+
+def test_full_sync_keeps_records_when_rows_are_deleted_mid_walk(tmp_path, monkeypatch):
+    # Offset paging would skip a live record once an earlier row disappears.
+    data = fake_dolibarr.load_records(copies=30)
+    base = fake_dolibarr.make_handler(data)
+
+    class Handler(base):
+        def do_GET(self):
+            super().do_GET()
+            if data["invoices"] and data["invoices"][0]["id"] == "1":
+                del data["invoices"][0]
+
+    server = _serve(Handler)
+    monkeypatch.setenv("DOLI_API_URL", f"http://127.0.0.1:{server.server_port}/api/index.php")
+    monkeypatch.setenv("DOLI_API_KEY", "test")
+    mirror = _mirror(tmp_path, monkeypatch)
+    try:
+        _run(mirror.sync("invoices", full=True))
+        invoices = _run(mirror.query("invoices", limit=1000))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    live = {r["id"] for r in data["invoices"]}
+    assert live <= {r["id"] for r in invoices}
+
+
+def test_mirror_is_not_ready_when_stale(dolibarr, tmp_path, monkeypatch):
+    mirror = _mirror(tmp_path, monkeypatch)
+    _run(mirror.sync("products"))
+    mirror.max_age_sec = 0.0
+    time.sleep(0.01)
+
+    assert not _run(mirror.is_ready("products"))
+
+
+def test_stats_count_falls_back_to_id_walk(monkeypatch):
+    pytest.importorskip("fastapi")
+    from app import stats
+
+    data = fake_dolibarr.load_records(copies=30)
+    server = _serve(fake_dolibarr.make_handler(data, pagination=False))
+    base = f"http://127.0.0.1:{server.server_port}/api/index.php"
+    monkeypatch.setattr(stats, "COUNT_PAGE_SIZE", 7)
+    try:
+        count, ok = _run(stats._safe_count(base, "invoices", "test"))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert ok
+    assert count == len(data["invoices"])
+
+
+def test_iter_pages_prefetches_and_stops_early(dolibarr, monkeypatch):
+    inflight = {"now": 0, "peak": 0}
+    fetch = dolibarr_http.fetch_dolibarr_page
+
+    async def counting_fetch(*args, **kwargs):
+        inflight["now"] += 1
+        inflight["peak"] = max(inflight["peak"], inflight["now"])
+        try:
+            return await fetch(*args, **kwargs)
+        finally:
+            inflight["now"] -= 1
+
+    monkeypatch.setattr(dolibarr_http, "fetch_dolibarr_page", counting_fetch)
+
+    async def walk():
+        ids = []
+        async for records in dolibarr_http.iter_dolibarr_pages("invoices", page_size=5, prefetch=3):
+            ids += [r["id"] for r in records]
+        return ids
+
+    async def stop_early():
+        pages = dolibarr_http.iter_dolibarr_pages("invoices", page_size=5, prefetch=3)
+        async for _ in pages:
+            break
+        await pages.aclose()
+        await asyncio.sleep(0)
+        return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    assert _run(walk()) == [r["id"] for r in dolibarr["invoices"]]
+    # The page being consumed plus up to 3 prefetched ones.
+    assert 1 < inflight["peak"] <= 4
+    assert _run(stop_early()) == []
@@ -0,0 +1,53 @@
+"""
+/api/risk/summary and /api/coverage/summary over a temporary task store.
+
+    cd backend && python -m pytest tests
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.core.task_repository import JsonTaskRepository  # noqa: E402
+from app.routes import coverage_api, risk_api  # noqa: E402
+
+TASKS = [
+    {"id": "t1", "client_id": "c1", "status": "done", "deadline": "2020-01-01"},
+    {"id": "t2", "client_id": "c1", "status": "open", "deadline": "2020-01-01"},
+    {"id": "t3", "client_id": "c2", "status": "open"},
+]
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    repo = JsonTaskRepository(tmp_path / "tasks_store.json")
+    repo.save_tasks(TASKS)
+    monkeypatch.setattr(risk_api, "get_task_repository", lambda: repo)
+    monkeypatch.setattr(coverage_api, "get_task_repository", lambda: repo)
+    # Always score with the built-in fallback.
+    monkeypatch.setitem(sys.modules, "app.services.risk_service", None)
+    return repo
+
+
+@pytest.mark.parametrize("client_id, total, overdue", [(None, 3, 1), ("c1", 2, 1), ("c2", 1, 0)])
+def test_risk_summary(repo, client_id, total, overdue):
+    out = risk_api.risk_summary(client_id=client_id)
+
+    assert not out.get("error", "").startswith("risk_summary_failed")
+    assert out["totalTasks"] == total
+    assert out["overdueTasks"] == overdue
+
+
+@pytest.mark.parametrize("client_id, total, covered", [(None, 3, 1), ("c1", 2, 1), ("c2", 1, 0)])
+def test_coverage_summary(repo, client_id, total, covered):
+    out = coverage_api.coverage_summary(period="30d", client_id=client_id)
+
+    assert "error" not in out
+    assert out["totalTasks"] == total
+    assert out["coveredTasks"] == covered
@@ -14,14 +14,20 @@ type Task = {
   deadline?: string;
 };
 
-type ProcessInstance = {
-  id: string;
-  client_code?: string;
-  client_label?: string;
-  period?: string;
-  status?: string;
-  deadline?: string;
-  due_date?: string;
+type DashboardBlock = {
+  count: number;
+  items: Task[];
+};
+
+// GET /api/internal/dashboard/day
+type DayDashboard = {
+  date: string;
+  kpi: { overdue: number; today: number; upcoming: number };
+  overdue: DashboardBlock;
+  today: DashboardBlock;
+  upcoming: DashboardBlock;
+  calendar: { month: string; from: string; to: string; days: Record<string, number> };
+  processes: { total: number; planned: number };
 };
 
 type StoredAttachment = {
@@ -50,75 +56,6 @@ type ManualTask = {
 const LS_ATTACH_KEY = "erpv2_task_attachments_v1";
 const LS_MANUAL_KEY = "erpv2_manual_tasks_v1";
 
-const LS_DEMO_REGL_TASKS = "erpv2_demo_reglement_tasks_v1";
-
-function loadDemoReglementTasks(): Task[] {
-  try {
-    const raw = localStorage.getItem(LS_DEMO_REGL_TASKS);
-    if (!raw) return [];
-    const arr = JSON.parse(raw);
-    return Array.isArray(arr) ? arr : [];
-  } catch {
-    return [];
-  }
-}
-
-function saveDemoReglementTasks(items: Task[]) {
-  try {
-    localStorage.setItem(LS_DEMO_REGL_TASKS, JSON.stringify(items));
-  } catch {
-    // ignore
-  }
-}
-
-function genDemoReglementTasks(now: Date): Task[] {
-  const y = now.getFullYear();
-  const m = now.getMonth();
-  const base = new Date(y, m, 1);
-  const out: Task[] = [];
-
-  const clients = [
-    { code: "demo_a", label: "Demo Client A" },
-    { code: "demo_b", label: "Demo Client B" },
-    { code: "demo_c", label: "Demo Client C" },
-  ];
-
-  const titles = [
-    "Bank statement request",
-    "Document request",
-    "USN advance",
-    "Payroll check",
-    "VAT draft",
-    "Reconcile with counterparty",
-    "Primary docs review",
-    "Contact client",
-    "Tax payment reminder",
-  ];
-
-  let idn = 1;
-  for (const c of clients) {
-    for (let i = 0; i < 28; i++) {
-      const d = new Date(base.getTime());
-      d.setDate(1 + i * 2 + (c.code === "demo_b" ? 1 : 0));
-      d.setMonth(m + (i > 18 ? 1 : 0));
-      const deadline = new Date(d.getFullYear(), d.getMonth(), d.getDate(), 12, 0, 0, 0);
-
-      const title = titles[(i + (c.code === "demo_c" ? 3 : 0)) % titles.length];
-      out.push({
-        id: "demo_regl_" + c.code + "_" + (idn++).toString().padStart(4, "0"),
-        client_code: c.code,
-        client_label: c.label,
-        title: title + " (" + isoDateOnly(deadline).slice(0, 7) + ")",
-        status: "open",
-        priority: i % 7 === 0 ? "high" : "normal",
-        deadline,
-      });
-    }
-  }
-
-  return out;
-}
-
 const MAX_FILE_BYTES = 2 * 1024 * 1024;
 
 function nowIso(): string {
@@ -186,39 +123,6 @@ function parseDateOnly(s?: any): Date | null {
   return toDateSafe(s);
 }
 
-function isOverdueBackend(task: Task, today: Date): boolean {
-  const dd = parseDateOnly(task.deadline);
-  if (!dd) return false;
-  const t0 = new Date(today.getFullYear(), today.getMonth(), today.getDate());
-  const d0 = new Date(dd.getFullYear(), dd.getMonth(), dd.getDate());
-  return d0.getTime() < t0.getTime() && String(task.status || "").toLowerCase() !== "done";
-}
-
-function isTodayBackend(task: Task, today: Date): boolean {
-  const dd = parseDateOnly(task.deadline);
-  if (!dd) return false;
-  return isoDateLocal(dd) === isoDateLocal(today);
-}
-
-function isLegacyUrgentBackend(task: Task): boolean {
-  const pr = String(task.priority || "").toLowerCase();
-  const noDeadline = !task.deadline;
-  const t = String(task.title || "").trim();
-  return ((pr === "urgent" || pr === "high" || pr === "p1") && noDeadline) || t.startsWith("!");
-}
-
-function groupTasksByDateBackend(tasks: Task[]): Record<string, Task[]> {
-  const map: Record<string, Task[]> = {};
-  for (const t of tasks) {
-    const dd = parseDateOnly(t.deadline);
-    if (!dd) continue;
-    const key = isoDateLocal(dd);
-    if (!map[key]) map[key] = [];
-    map[key].push(t);
-  }
-  return map;
-}
-
 function groupManualByDate(tasks: ManualTask[]): Record<string, ManualTask[]> {
   const map: Record<string, ManualTask[]> = {};
   for (const t of tasks) {
@@ -363,10 +267,10 @@ export default function DayDashboardPage() {
     return `${y}-${m}-${day}`;
   };
 
-  const [tasks, setTasks] = useState<Task[]>([]);
+  const [dash, setDash] = useState<DayDashboard | null>(null);
+  const [calDays, setCalDays] = useState<Record<string, number>>({});
   const [clients, setClients] = useState<ClientProfile[]>([]);
   const [clientQ, setClientQ] = useState<string>("");
-  const [proc, setProc] = useState<ProcessInstance[]>([]);
   const [manual, setManual] = useState<ManualTask[]>(() => loadManualTasks());
 
   
@@ -464,39 +368,17 @@ const [loading, setLoading] = useState<boolean>(true);
     setLoading(true);
     setErr(null);
     try {
-      const [t, p] = await Promise.all([
-        apiGetJson("/api/internal/tasks"),
-        apiGetJson("/api/internal/process-instances-v2/"),
-      ]);
-      const backendTasks = Array.isArray(t) ? t : [];
-      const demo = loadDemoReglementTasks();
-      setTasks(backendTasks.length > 0 ? backendTasks : demo);
-
-      setProc(Array.isArray(p) ? p : []);
+      const d = await apiGetJson<DayDashboard>(`/api/internal/dashboard/day?date=${isoDateLocal(today)}`);
+      setDash(d);
       setAttIdx(loadIndex());
     } catch (e: any) {
       setErr(String(e?.message || e || "error"));
-      setTasks([]);
-      setProc([]);
+      setDash(null);
     } finally {
       setLoading(false);
     }
   }
 
-  function generateDemoCalendarData() {
-    const demo = genDemoReglementTasks(new Date());
-    saveDemoReglementTasks(demo);
-    setTasks(demo);
-  }
-
-  function clearDemoCalendarData() {
-    try {
-      localStorage.removeItem(LS_DEMO_REGL_TASKS);
-    } catch {
-      // ignore
-    }
-  }
-
   function reloadManual() {
     const m = loadManualTasks();
     m.sort(compareManual);
@@ -517,43 +399,41 @@ const [loading, setLoading] = useState<boolean>(true);
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
-  const backendVisible = useMemo(() => tasks.filter((t) => !isLegacyUrgentBackend(t)), [tasks]);
-
-  const overdue = useMemo(
-    () => backendVisible.filter((t) => isOverdueBackend(t, today) && !isDoneLocal("backend", t.id)).slice(0, 8),
-    [backendVisible, today],
-  );
-
-  const kpiOverdueCount = useMemo(
-    () => backendVisible.filter((t) => isOverdueBackend(t, today) && !isDoneLocal("backend", t.id)).length,
-    [backendVisible, today],
-  );
+  // Calendar counts of another month come from the same endpoint dated to that month.
+  useEffect(() => {
+    if (!dash) return;
+    const month = `${calYear}-${String(calMonth + 1).padStart(2, "0")}`;
+    if (dash.calendar.month === month) {
+      setCalDays(dash.calendar.days);
+      return;
+    }
+    let cancelled = false;
+    apiGetJson<DayDashboard>(`/api/internal/dashboard/day?date=${month}-01`)
+      .then((d) => {
+        if (!cancelled) setCalDays(d.calendar.days);
+      })
+      .catch(() => {
+        if (!cancelled) setCalDays({});
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [dash, calYear, calMonth]);
 
-  const kpiTodayCount = useMemo(
-    () => backendVisible.filter((t) => isTodayBackend(t, today) && !isDoneLocal("backend", t.id)).length,
-    [backendVisible, today],
+  const backendItems = useMemo(
+    () => (dash ? [...dash.overdue.items, ...dash.today.items, ...dash.upcoming.items] : []),
+    [dash],
   );
 
-  const kpiUpcomingCount = useMemo(
-    () =>
-      backendVisible.filter((t) => !isOverdueBackend(t, today) && !isTodayBackend(t, today) && !isDoneLocal("backend", t.id))
-        .length,
-    [backendVisible, today],
-  );
+  const kpiOverdueCount = dash ? dash.kpi.overdue : 0;
+  const kpiTodayCount = dash ? dash.kpi.today : 0;
+  const kpiUpcomingCount = dash ? dash.kpi.upcoming : 0;
   const activeDate = useMemo(() => {
     return calSelectedIso ? parseDateOnly(calSelectedIso) : today;
   }, [calSelectedIso, today]);
 
   const activeIso = useMemo(() => isoDateOnly(activeDate), [activeDate]);
 
-  const todayTasks = useMemo(
-    () =>
-      backendVisible
-        .filter((t) => !!t.deadline && isoDateOnly(t.deadline!) === activeIso)
-        .slice(0, 10),
-    [backendVisible, activeIso],
-  );
-
   const manualFiltered = useMemo(() => {
     const q = normalizeManualQuery(mQuery);
     return manual.filter((t) => {
@@ -575,7 +455,7 @@ const [loading, setLoading] = useState<boolean>(true);
     }
 
     if (selected.kind === "backend") {
-      const t = backendVisible.find((x) => x.id === selected.id);
+      const t = backendItems.find((x) => x.id === selected.id);
       if (!t) {
         closePanel();
         return;
@@ -678,16 +558,11 @@ const [loading, setLoading] = useState<boolean>(true);
       widthPx: 560,
       onClose: () => setSelected(null),
     });
-  }, [selected, openPanel, closePanel, backendVisible, manualUrgent, manual, noteDraft, doneMap, notesMap]);
-  const tasksByDate = useMemo(() => groupTasksByDateBackend(backendVisible), [backendVisible]);
+  }, [selected, openPanel, closePanel, backendItems, manualUrgent, manual, noteDraft, doneMap, notesMap]);
   const manualByDate = useMemo(() => groupManualByDate(manual), [manual]);
   const grid = useMemo(() => monthGrid(calYear, calMonth), [calYear, calMonth]);
 
-  const procSummary = useMemo(() => {
-    const total = proc.length;
-    const planned = proc.filter((x) => String(x.status || "").toLowerCase() === "planned").length;
-    return { total, planned };
-  }, [proc]);
+  const procSummary = dash ? dash.processes : { total: 0, planned: 0 };
 
   const monthLabel = useMemo(() => {
     const names = [
@@ -824,7 +699,7 @@ const [loading, setLoading] = useState<boolean>(true);
   }
 
   function dayCount(key: string): number {
-    const a = (tasksByDate[key] || []).length;
+    const a = calDays[key] || 0;
     const b = (manualByDate[key] || []).length;
     return a + b;
   }
@@ -971,17 +846,8 @@ const [loading, setLoading] = useState<boolean>(true);
           <div className="ddq-main">
             <>
           {(() => {
-            const nowQueue = backendVisible
-              .filter((t) => isOverdueBackend(t, today) && !isDoneLocal("backend", t.id))
-              .sort((a, b) => (Date.parse(a.deadline || "") || 0) - (Date.parse(b.deadline || "") || 0));
-
-            const todayQueue = backendVisible
-              .filter((t) => !isOverdueBackend(t, today) && isTodayBackend(t, today) && !isDoneLocal("backend", t.id))
-              .sort((a, b) => (Date.parse(a.deadline || "") || 0) - (Date.parse(b.deadline || "") || 0));
-
-            const laterQueue = backendVisible
-              .filter((t) => !isOverdueBackend(t, today) && !isTodayBackend(t, today) && !isDoneLocal("backend", t.id))
-              .sort((a, b) => (Date.parse(a.deadline || "") || 0) - (Date.parse(b.deadline || "") || 0));
+            const nowQueue = (dash ? dash.overdue.items : []).filter((t) => !isDoneLocal("backend", t.id));
+            const todayQueue = (dash ? dash.today.items : []).filter((t) => !isDoneLocal("backend", t.id));
 
             const renderRow = (t: Task, kind: "overdue" | "soon" | "ok") => {
               const due = t.deadline ? fmtDateIsoLike(t.deadline) : "";
@@ -1066,7 +932,7 @@ const [loading, setLoading] = useState<boolean>(true);
                   <div className="ddq-section-head">
                     <div className="ddq-section-title">{"\u0421\u0435\u0439\u0447\u0430\u0441"}</div>
                     <div className="ddq-section-sub">
-                      {"\u041f\u0440\u043e\u0441\u0440\u043e\u0447\u0435\u043d\u043e"}: {nowQueue.length}
+                      {"\u041f\u0440\u043e\u0441\u0440\u043e\u0447\u0435\u043d\u043e"}: {dash ? dash.overdue.count : 0}
                     </div>
                   </div>
 
@@ -1083,7 +949,7 @@ const [loading, setLoading] = useState<boolean>(true);
                   <div className="ddq-section-head">
                     <div className="ddq-section-title">{"\u0421\u0435\u0433\u043e\u0434\u043d\u044f"}</div>
                     <div className="ddq-section-sub">
-                      {"\u0421\u0440\u043e\u043a \u0441\u0435\u0433\u043e\u0434\u043d\u044f"}: {todayQueue.length}
+                      {"\u0421\u0440\u043e\u043a \u0441\u0435\u0433\u043e\u0434\u043d\u044f"}: {dash ? dash.today.count : 0}
                     </div>
                   </div>
 